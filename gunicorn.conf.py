@@ -0,0 +1,31 @@
+# gunicorn reads this file automatically from the working directory.
+import os
+
+# Opt in with GUNICORN_PRELOAD=1: the app and the lazily imported heavy
+# dependencies are loaded once in the master and shared by forked workers.
+preload_app = os.environ.get('GUNICORN_PRELOAD') == '1'
+
+# Serving project_config.asgi (as render.yaml does) needs uvicorn workers: one
+# process then keeps many weather lookups in flight on its event loop.
+if os.environ.get('GUNICORN_ASGI') == '1':
+    worker_class = 'uvicorn_worker.UvicornWorker'
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from records.warmup import preload
+
+    failed = preload()
+    server.log.info("Preloaded lazy view dependencies%s", f" (failed: {', '.join(failed)})" if failed else "")
+
+
+def post_worker_init(worker):
+    # The app is loaded by now, so Django settings are available.
+    from django.conf import settings
+
+    if settings.JOBS_WORKER_THREAD:
+        from records.jobs import start_worker_thread
+
+        start_worker_thread()
+        worker.log.info("Started background job worker thread")
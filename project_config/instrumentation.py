@@ -0,0 +1,138 @@
+"""リクエストごとの処理時間・SQL・外部 HTTP の計測
+
+InstrumentationMiddleware が1リクエスト分の RequestTimings を contextvar に
+置き、SQL はデータベース接続の execute_wrapper で、外部 HTTP は
+outbound_timer() で加算する。集計はプロセスごとのリングバッファに持つ。
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar('request_timings', default=None)
+
+PERCENTILES = (50, 95, 99)
+
+
+class RequestTimings:
+    """1リクエスト分の計測値"""
+
+    def __init__(self):
+        self.db = 0.0
+        self.queries = 0
+        # Weather lookups run on worker threads, so durations are appended
+        # (atomic) rather than summed in place.
+        self._outbound = []
+
+    @property
+    def outbound(self):
+        return sum(self._outbound)
+
+    @property
+    def outbound_calls(self):
+        return len(self._outbound)
+
+    def add_outbound(self, seconds):
+        self._outbound.append(seconds)
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def server_timing(self, wall):
+        """Server-Timing ヘッダーの値"""
+        metrics = [
+            f'app;dur={wall * 1000:.1f}',
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+        ]
+        if self._outbound:
+            metrics.append(f'ext;dur={self.outbound * 1000:.1f};desc="{self.outbound_calls} requests"')
+        return ', '.join(metrics)
+
+
+def start():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+@contextmanager
+def outbound_timer():
+    """外部 HTTP 呼び出しの時間を現在のリクエストに加算する (リクエスト外では何もしない)"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add_outbound(time.perf_counter() - started)
+
+
+def _percentile(ordered, percent):
+    # Nearest-rank percentile on an already sorted list
+    index = max(0, min(len(ordered) - 1, -(-len(ordered) * percent // 100) - 1))
+    return ordered[index]
+
+
+class TimingBuffer:
+    """ビューごとに直近 size 件の計測値を持つリングバッファ"""
+
+    def __init__(self, size):
+        self.size = size
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, view, wall, timings):
+        sample = (wall, timings.db, timings.queries, timings.outbound)
+        with self._lock:
+            samples = self._samples.get(view)
+            if samples is None:
+                samples = self._samples[view] = deque(maxlen=self.size)
+            samples.append(sample)
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        """ビューごとの件数と p50/p95/p99 (時間はミリ秒)"""
+        with self._lock:
+            snapshot = {view: list(samples) for view, samples in self._samples.items()}
+        result = {}
+        for view, samples in sorted(snapshot.items()):
+            columns = list(zip(*samples))
+            entry = {'count': len(samples)}
+            for name, values, scale in (
+                ('wall_ms', columns[0], 1000),
+                ('db_ms', columns[1], 1000),
+                ('queries', columns[2], 1),
+                ('outbound_ms', columns[3], 1000),
+            ):
+                ordered = sorted(values)
+                entry[name] = {f'p{p}': round(_percentile(ordered, p) * scale, 2) for p in PERCENTILES}
+            result[view] = entry
+        return result
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            from django.conf import settings
+
+            _buffer = TimingBuffer(settings.INSTRUMENTATION_BUFFER_SIZE)
+        return _buffer
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware", # Whitenoise middleware
+    "project_config.middleware.InstrumentationMiddleware", # Timing / query counts
     "django.contrib.sessions.middleware.SessionMiddleware",
     "project_config.middleware.BasicAuthMiddleware", # Custom Basic Auth
     "django.middleware.common.CommonMiddleware",
@@ -67,6 +68,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "project_config.wsgi.application"
+ASGI_APPLICATION = "project_config.asgi.application"
+
+# Route the network-bound and read-only URLs to their async views. asgi.py
+# turns this on; under WSGI each async view would need its own event loop.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS') == '1'
 
 
 # Database
@@ -76,10 +82,131 @@ DATABASES = {
     "default": dj_database_url.config(
         # Replace this with your actual database URL in production
         default='sqlite:///db.sqlite3',
-        conn_max_age=600
+        # Under ASGI every request runs its ORM calls on a fresh thread, so
+        # persistent connections would pile up instead of being reused.
+        conn_max_age=0 if ASYNC_VIEWS else 600
     )
 }
 
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # Concurrent writers (threads under ASGI) queue for the write lock
+    # instead of failing with "database is locked".
+    DATABASES["default"].setdefault("OPTIONS", {}).update(transaction_mode="IMMEDIATE", timeout=20)
+
+# PostgreSQL: each process keeps a psycopg 3 pool (DB_POOL=1) of up to
+# DB_POOL_MAX_SIZE connections, so requests (a new thread per request under
+# ASGI) borrow an open connection instead of connecting every time.
+DB_POOL = os.environ.get('DB_POOL', '1') == '1'
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 2))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+# Connections above the minimum are closed after this many idle seconds.
+DB_POOL_MAX_IDLE = float(os.environ.get('DB_POOL_MAX_IDLE', 300))
+# Server-side limits in milliseconds (0 turns them off)
+DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 30000))
+DB_IDLE_IN_TRANSACTION_TIMEOUT = int(os.environ.get('DB_IDLE_IN_TRANSACTION_TIMEOUT', 60000))
+
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    options = DATABASES["default"].setdefault("OPTIONS", {})
+    options["options"] = " ".join(filter(None, [
+        options.get("options"),
+        f"-c statement_timeout={DB_STATEMENT_TIMEOUT}",
+        f"-c idle_in_transaction_session_timeout={DB_IDLE_IN_TRANSACTION_TIMEOUT}",
+    ]))
+    # Checks a persistent connection before reusing it; with the pool,
+    # a borrowed connection is checked instead.
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+    if DB_POOL:
+        options["pool"] = {
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": DB_POOL_TIMEOUT,
+            "max_idle": DB_POOL_MAX_IDLE,
+        }
+        # Django returns the connection to the pool at the end of each request.
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+
+
+# Cache
+# Cached views and fragments are keyed on the data version (records/caching.py),
+# so changes to the records never serve stale pages. The default local-memory
+# cache is per process; with several workers use CACHE_BACKEND=file (a shared
+# directory) or db (a table created by "manage.py createcachetable").
+
+CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "hibinokanri"),
+    "file": ("django.core.cache.backends.filebased.FileBasedCache", str(BASE_DIR / "cache")),
+    "db": ("django.core.cache.backends.db.DatabaseCache", "django_cache"),
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+# Entries of older data versions are never read again and just age out.
+VIEW_CACHE_TIMEOUT = int(os.environ.get('VIEW_CACHE_TIMEOUT', 24 * 60 * 60))
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND][0],
+        "LOCATION": os.environ.get('CACHE_LOCATION', CACHE_BACKENDS[CACHE_BACKEND][1]),
+        "TIMEOUT": VIEW_CACHE_TIMEOUT,
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get('CACHE_MAX_ENTRIES', 1000))},
+    }
+}
+
+
+# Open-Meteo
+# The URLs can be pointed at a local stub server for testing.
+
+OPEN_METEO_FORECAST_URL = os.environ.get('OPEN_METEO_FORECAST_URL', "https://api.open-meteo.com/v1/forecast")
+OPEN_METEO_AIR_QUALITY_URL = os.environ.get('OPEN_METEO_AIR_QUALITY_URL', "https://air-quality-api.open-meteo.com/v1/air-quality")
+OPEN_METEO_CONNECT_TIMEOUT = float(os.environ.get('OPEN_METEO_CONNECT_TIMEOUT', 3.05))
+OPEN_METEO_READ_TIMEOUT = float(os.environ.get('OPEN_METEO_READ_TIMEOUT', 10))
+OPEN_METEO_RETRIES = int(os.environ.get('OPEN_METEO_RETRIES', 2))
+OPEN_METEO_BACKOFF = float(os.environ.get('OPEN_METEO_BACKOFF', 0.5))
+# After this many consecutive failures an API is skipped for OPEN_METEO_BREAKER_RESET seconds.
+OPEN_METEO_BREAKER_THRESHOLD = int(os.environ.get('OPEN_METEO_BREAKER_THRESHOLD', 5))
+OPEN_METEO_BREAKER_RESET = float(os.environ.get('OPEN_METEO_BREAKER_RESET', 60))
+
+# Cached responses for today/future dates expire after this many seconds.
+# Past dates are cached forever.
+WEATHER_CACHE_TTL = int(os.environ.get('WEATHER_CACHE_TTL', 3600))
+
+
+# Mood prediction model (records/mood_model.py)
+# Artifacts are saved as MOOD_MODEL_DIR/mood_model_v<data version>.joblib.
+
+MOOD_MODEL_DIR = Path(os.environ.get('MOOD_MODEL_DIR', BASE_DIR / 'mood_models'))
+MOOD_MODEL_MIN_RECORDS = int(os.environ.get('MOOD_MODEL_MIN_RECORDS', 30))
+# Retrain in a background thread once this many changes have accumulated since the last model.
+MOOD_MODEL_RETRAIN_AFTER = int(os.environ.get('MOOD_MODEL_RETRAIN_AFTER', 20))
+MOOD_MODEL_BACKGROUND_RETRAIN = os.environ.get('MOOD_MODEL_BACKGROUND_RETRAIN', '1') == '1'
+# Workers look for a newer artifact at most this often (seconds).
+MOOD_MODEL_RELOAD_INTERVAL = float(os.environ.get('MOOD_MODEL_RELOAD_INTERVAL', 60))
+MOOD_MODEL_KEEP = int(os.environ.get('MOOD_MODEL_KEEP', 3))
+
+
+# Background jobs (records/jobs.py)
+# Run the worker with "manage.py run_jobs", or set JOBS_WORKER_THREAD=1 to run
+# one in a thread of each gunicorn worker (no separate worker service needed).
+
+JOBS_WORKER_THREAD = os.environ.get('JOBS_WORKER_THREAD') == '1'
+JOBS_POLL_INTERVAL = float(os.environ.get('JOBS_POLL_INTERVAL', 2))
+JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', 3))
+# A failed job is retried after JOBS_BACKOFF * 2^(attempts - 1) seconds.
+JOBS_BACKOFF = float(os.environ.get('JOBS_BACKOFF', 30))
+# A worker refreshes its running job every JOBS_HEARTBEAT_INTERVAL seconds; a job
+# not refreshed for JOBS_LOCK_TIMEOUT seconds is assumed lost with its worker and retried.
+JOBS_LOCK_TIMEOUT = int(os.environ.get('JOBS_LOCK_TIMEOUT', 600))
+JOBS_HEARTBEAT_INTERVAL = float(os.environ.get('JOBS_HEARTBEAT_INTERVAL', JOBS_LOCK_TIMEOUT / 4))
+JOBS_RETENTION_DAYS = int(os.environ.get('JOBS_RETENTION_DAYS', 7))
+JOBS_FILE_DIR = Path(os.environ.get('JOBS_FILE_DIR', BASE_DIR / 'job_files'))
+
+
+# Request instrumentation (Server-Timing headers and /_stats/timings/)
+# Samples are kept per process, for the last INSTRUMENTATION_BUFFER_SIZE requests of each view.
+
+INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', '1') == '1'
+INSTRUMENTATION_BUFFER_SIZE = int(os.environ.get('INSTRUMENTATION_BUFFER_SIZE', 1000))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from . import views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('_stats/timings/', views.timing_stats, name='timing_stats'),
     path('', include('records.urls')),
 ]
@@ -0,0 +1,20 @@
+import os
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+
+from . import instrumentation
+
+@never_cache
+@staff_member_required
+def timing_stats(request):
+    """このプロセスで計測したビューごとの p50/p95/p99 (管理者のみ)"""
+    buffer = instrumentation.get_buffer()
+    if request.method == 'POST' and request.POST.get('reset'):
+        buffer.clear()
+    return JsonResponse({
+        'pid': os.getpid(),
+        'buffer_size': buffer.size,
+        'views': buffer.summary(),
+    })
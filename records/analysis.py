@@ -0,0 +1,153 @@
+import math
+
+from django.db import transaction
+
+from .models import CorrelationStats, DailyRecord, DataVersion
+
+RATING_MAPPING = {'S': 5, 'A': 4, 'B': 3, 'C': 2, 'D': 1}
+MEDICINE_MAPPING = {'yes': 1, 'no': 0}
+WEATHER_VALUES = ['sunny', 'cloudy', 'rainy']
+
+# Fields read from DailyRecord for the analysis
+ANALYSIS_FIELDS = [
+    'weather', 'max_pressure', 'min_pressure', 'max_temperature', 'min_temperature',
+    'humidity', 'pollen', 'pm25', 'my_mood', 'wife_mood', 'headache_medicine', 'mishap'
+]
+
+# Encoded feature columns, in the same encoding ai_analysis has always used
+BASE_COLS = ['max_pressure', 'min_pressure', 'max_temperature', 'min_temperature', 'humidity']
+MOOD_COLS = ['my_mood_num', 'wife_mood_num']
+RATING_COLS = ['pollen_num', 'pm25_num']
+BINARY_COLS = ['headache_medicine_num', 'mishap_num']
+WEATHER_COLS = [f'weather_{value}' for value in WEATHER_VALUES]
+FEATURES = BASE_COLS + MOOD_COLS + RATING_COLS + BINARY_COLS + WEATHER_COLS
+
+FEATURE_LABELS = {
+    'max_pressure': '最高気圧',
+    'min_pressure': '最低気圧',
+    'max_temperature': '最高気温',
+    'min_temperature': '最低気温',
+    'humidity': '湿度',
+    'my_mood_num': '自分の機嫌',
+    'wife_mood_num': '妻の機嫌',
+    'pollen_num': '花粉',
+    'pm25_num': 'PM2.5',
+    'headache_medicine_num': '頭痛薬接種',
+    'mishap_num': '失態の有無',
+    'weather_sunny': '天気: 晴れ',
+    'weather_cloudy': '天気: くもり',
+    'weather_rainy': '天気: 雨',
+}
+
+STATS_NAME = 'mood'
+
+
+def encode_record(values):
+    """1日分の値を FEATURES の順の数値ベクトルにする。欠損があれば None"""
+    vector = [values.get(col) for col in BASE_COLS]
+    vector += [RATING_MAPPING.get(values.get(field)) for field in ('my_mood', 'wife_mood', 'pollen', 'pm25')]
+    vector.append(MEDICINE_MAPPING.get(values.get('headache_medicine')))
+    vector.append(int(bool(values.get('mishap'))))
+    vector += [int(values.get('weather') == value) for value in WEATHER_VALUES]
+    if any(v is None for v in vector):
+        # Rows with any missing value are dropped, like DataFrame.dropna()
+        return None
+    return [float(v) for v in vector]
+
+
+def instance_values(record):
+    return {field: getattr(record, field) for field in ANALYSIS_FIELDS}
+
+
+def _accumulate(stats, vector, sign):
+    size = len(FEATURES)
+    stats.n += sign
+    for i in range(size):
+        stats.sums[i] += sign * vector[i]
+        row = stats.products[i]
+        for j in range(size):
+            row[j] += sign * vector[i] * vector[j]
+
+
+def _correlations(stats):
+    size = len(FEATURES)
+    result = {feature: {} for feature in FEATURES}
+    if stats.n < 2:
+        return result
+    n = stats.n
+    cov = [
+        [stats.products[i][j] - stats.sums[i] * stats.sums[j] / n for j in range(size)]
+        for i in range(size)
+    ]
+    for i, a in enumerate(FEATURES):
+        for j, b in enumerate(FEATURES):
+            denominator = cov[i][i] * cov[j][j]
+            # Rounding noise from incremental updates can leave tiny non-zero variances
+            if denominator <= 1e-12:
+                result[a][b] = None
+            else:
+                result[a][b] = max(-1.0, min(1.0, cov[i][j] / math.sqrt(denominator)))
+    return result
+
+
+def _empty_stats(stats):
+    size = len(FEATURES)
+    stats.features = FEATURES
+    stats.n = 0
+    stats.sums = [0.0] * size
+    stats.products = [[0.0] * size for _ in range(size)]
+
+
+def rebuild_correlation_stats():
+    """全レコードから十分統計量を作り直す"""
+    with transaction.atomic():
+        version = DataVersion.current(DailyRecord._meta.db_table)
+        stats, _ = CorrelationStats.objects.select_for_update().get_or_create(name=STATS_NAME)
+        _empty_stats(stats)
+        for values in DailyRecord.objects.values(*ANALYSIS_FIELDS).iterator(chunk_size=2000):
+            vector = encode_record(values)
+            if vector is not None:
+                _accumulate(stats, vector, 1)
+        stats.correlations = _correlations(stats)
+        stats.data_version = version.version if version else 0
+        stats.save()
+    return stats
+
+
+def apply_record_change(old_values, new_values, data_version):
+    """1件の追加・変更・削除を十分統計量に反映する (O(特徴量²))
+
+    data_version は変更後のバージョン。保存済みの統計がその直前の
+    バージョンのものでなければ何もせず、次の読み込み時に作り直させる。
+    """
+    with transaction.atomic():
+        stats = CorrelationStats.objects.select_for_update().filter(name=STATS_NAME).first()
+        if stats is None or stats.features != FEATURES or stats.data_version != data_version - 1:
+            return
+        for values, sign in ((old_values, -1), (new_values, 1)):
+            vector = encode_record(values) if values else None
+            if vector is not None:
+                _accumulate(stats, vector, sign)
+        stats.correlations = _correlations(stats)
+        stats.data_version = data_version
+        stats.save()
+
+
+def get_correlation_stats():
+    """データバージョンに一致する相関統計を返す。古ければ作り直す"""
+    version = DataVersion.current(DailyRecord._meta.db_table)
+    current = version.version if version else 0
+    stats = CorrelationStats.objects.filter(name=STATS_NAME).first()
+    if stats is None or stats.features != FEATURES or stats.data_version != current:
+        stats = rebuild_correlation_stats()
+    return stats
+
+
+def mood_correlations(stats, target):
+    """target との相関を絶対値の大きい順に並べた (ラベル, 値) のリスト"""
+    pairs = [
+        (FEATURE_LABELS[feature], value)
+        for feature, value in stats.correlations.get(target, {}).items()
+        if feature != target and value is not None
+    ]
+    return sorted(pairs, key=lambda pair: abs(pair[1]), reverse=True)
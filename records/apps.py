@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class RecordsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "records"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import ensure_index, register_functions
+
+        post_migrate.connect(ensure_index, sender=self)
+        # The SQLite search triggers call a Python function.
+        connection_created.connect(register_functions)
@@ -0,0 +1,94 @@
+"""データバージョンをキーに含めたビュー・テンプレート断片のキャッシュ
+
+キャッシュキーには DailyRecord のデータバージョン (保存・削除のシグナルと
+一括取り込みで進む) が入るので、記録が変わると次のリクエストからは
+別のキーになり、古いエントリは使われずに期限切れで消える。明示的な
+削除はいらない。キャッシュのバックエンドは settings.CACHES で選ぶ。
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import DailyRecord, DataVersion
+
+DAILY_RECORD_TABLE = DailyRecord._meta.db_table
+
+
+def data_version(request=None):
+    """現在のデータバージョン。request があればそのリクエストの間は使い回す"""
+    if request is not None and hasattr(request, '_data_version'):
+        return request._data_version
+    version = DataVersion.objects.filter(table=DAILY_RECORD_TABLE).values_list('version', flat=True).first() or 0
+    if request is not None:
+        request._data_version = version
+    return version
+
+
+async def adata_version(request=None):
+    if request is not None and hasattr(request, '_data_version'):
+        return request._data_version
+    version = await DataVersion.objects.filter(table=DAILY_RECORD_TABLE).values_list('version', flat=True).afirst() or 0
+    if request is not None:
+        request._data_version = version
+    return version
+
+
+def cache_key(name, version, *parts):
+    # Hashed so arbitrary query strings make valid keys for every backend.
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode(), usedforsecurity=False).hexdigest()
+    return f'records:{name}:v{version}:{digest}'
+
+
+def cached_fragment(request, name, parts, render_fragment):
+    """render_fragment() で描画した HTML を (name, データバージョン, parts) ごとにキャッシュする"""
+    key = cache_key(name, data_version(request), *parts)
+    html = cache.get(key)
+    if html is None:
+        html = render_fragment()
+        cache.set(key, html, settings.VIEW_CACHE_TIMEOUT)
+    return html
+
+
+async def acached_fragment(request, name, parts, render_fragment):
+    """cached_fragment の非同期版 (render_fragment はコルーチン関数)"""
+    key = cache_key(name, await adata_version(request), *parts)
+    html = await cache.aget(key)
+    if html is None:
+        html = await render_fragment()
+        await cache.aset(key, html, settings.VIEW_CACHE_TIMEOUT)
+    return html
+
+
+def table_versions(tables):
+    """tables (テーブル名) ごとのデータバージョン。ないテーブルは 0"""
+    versions = dict(DataVersion.objects.filter(table__in=tables).values_list('table', 'version'))
+    return [versions.get(table, 0) for table in tables]
+
+
+def cache_on_data_version(view=None, *, tables=()):
+    """GET の応答を (ビュー, データバージョン, URL) ごとにキャッシュするデコレーター
+
+    DailyRecord 以外のデータも表示するビューは、そのテーブル名を tables に
+    渡すとそれらのバージョンもキーに入る。
+    CSRF トークンやメッセージなど、リクエストごとに変わる内容を含む
+    ビューには使わないこと (そういうページは cached_fragment で一部だけ)。
+    """
+    if view is None:
+        return lambda view: cache_on_data_version(view, tables=tables)
+    name = f'{view.__module__}.{view.__name__}'
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        extra = table_versions(tables) if tables else ()
+        key = cache_key(name, data_version(request), request.get_full_path(), args, sorted(kwargs.items()), extra)
+        response = cache.get(key)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                cache.set(key, response, settings.VIEW_CACHE_TIMEOUT)
+        return response
+    return wrapper
@@ -0,0 +1,177 @@
+from django.db.models import Avg, Case, IntegerField, Max, Min, Value, When
+
+from .models import PeriodRollup
+
+RATING_MAPPING = {'S': 5, 'A': 4, 'B': 3, 'C': 2, 'D': 1}
+
+RESOLUTIONS = ('daily', 'weekly', 'monthly')
+
+# Dataset key -> (model field, aggregate used when grouping by week/month)
+CHART_FIELDS = {
+    'my_mood': ('my_mood', Avg),
+    'wife_mood': ('wife_mood', Avg),
+    'max_temp': ('max_temperature', Max),
+    'min_temp': ('min_temperature', Min),
+    'max_pressure': ('max_pressure', Max),
+    'min_pressure': ('min_pressure', Min),
+    'humidity': ('humidity', Avg),
+    'pollen': ('pollen', Avg),
+    'pm25': ('pm25', Avg),
+}
+RATING_FIELDS = {'my_mood', 'wife_mood', 'pollen', 'pm25'}
+
+# Dataset key -> PeriodRollup field holding the same aggregate
+ROLLUP_FIELDS = {
+    'my_mood': 'my_mood_avg',
+    'wife_mood': 'wife_mood_avg',
+    'max_temp': 'temperature_max',
+    'min_temp': 'temperature_min',
+    'max_pressure': 'pressure_max',
+    'min_pressure': 'pressure_min',
+    'humidity': 'humidity_mean',
+    'pollen': 'pollen_avg',
+    'pm25': 'pm25_avg',
+}
+ROLLUP_PERIODS = {'weekly': 'week', 'monthly': 'month'}
+
+
+def rating_value(field):
+    """S〜Dの評価をDB側で5〜1の数値に変換する式"""
+    return Case(
+        *[When(**{field: key}, then=Value(value)) for key, value in RATING_MAPPING.items()],
+        default=None,
+        output_field=IntegerField(),
+    )
+
+
+def _round(value):
+    return round(value, 2) if isinstance(value, float) else value
+
+
+def _period_datasets(columns, resolution):
+    """スナップショットの列を週 (月曜始まり) または月ごとに CHART_FIELDS の集計でまとめる"""
+    import numpy as np
+
+    from .snapshot import to_numbers
+
+    days = columns['date'].astype(np.int64)
+    if resolution == 'weekly':
+        # 1970-01-01 was a Thursday
+        periods = (days - (days + 3) % 7).astype('datetime64[D]')
+    else:
+        periods = columns['date'].astype('datetime64[M]').astype('datetime64[D]')
+    if not len(periods):
+        return [], {key: [] for key in CHART_FIELDS}
+    starts = np.flatnonzero(np.concatenate(([True], periods[1:] != periods[:-1])))
+    datasets = {}
+    for key, (field, aggregate) in CHART_FIELDS.items():
+        values = to_numbers(field, columns[field])
+        if aggregate is Avg:
+            present = ~np.isnan(values)
+            counts = np.add.reduceat(present, starts)
+            with np.errstate(invalid='ignore'):
+                result = np.add.reduceat(np.where(present, values, 0.0), starts) / counts
+        else:
+            # fmax/fmin skip NaN, like MAX/MIN skip NULL
+            result = (np.fmax if aggregate is Max else np.fmin).reduceat(values, starts)
+        datasets[key] = [None if value != value else _round(value) for value in result.tolist()]
+    return np.datetime_as_string(periods[starts]).tolist(), datasets
+
+
+def build_chart_data(start=None, end=None, resolution='daily', points=None):
+    """グラフ用の dates/datasets を組み立てる
+
+    記録はプロセスごとのスナップショット (records/snapshot.py) から読み、
+    weekly/monthly は期間ごとに集計する (期間の指定がなければ PeriodRollup
+    を読む)。points が指定されていれば LTTB で点数をそこまで間引く。
+    """
+    rollups = None
+    if resolution in ROLLUP_PERIODS and not start and not end:
+        # Whole-history views read the precomputed rollups (O(periods)).
+        rollups = PeriodRollup.objects.filter(period=ROLLUP_PERIODS[resolution])
+        if not rollups.exists():
+            rollups = None
+    if rollups is not None:
+        rows = list(rollups.order_by('period_start').values('period_start', *ROLLUP_FIELDS.values()))
+        dates = [row['period_start'].strftime('%Y-%m-%d') for row in rows]
+        datasets = {key: [_round(row[field]) for row in rows] for key, field in ROLLUP_FIELDS.items()}
+    else:
+        # NumPy is only loaded by workers that actually build chart data.
+        import numpy as np
+
+        from .snapshot import get_snapshot, to_values
+
+        columns = get_snapshot().between(start, end)
+        if resolution in ('weekly', 'monthly'):
+            dates, datasets = _period_datasets(columns, resolution)
+        else:
+            dates = np.datetime_as_string(columns['date']).tolist()
+            datasets = {}
+            for key, (field, _) in CHART_FIELDS.items():
+                if field in RATING_FIELDS:
+                    # Stored as 5〜1 already, 0 when blank
+                    datasets[key] = [value or None for value in columns[field].tolist()]
+                else:
+                    datasets[key] = to_values(field, columns[field])
+
+    if points and len(dates) > points:
+        keep = lttb_indices(list(datasets.values()), points)
+        dates = [dates[i] for i in keep]
+        datasets = {key: [values[i] for i in keep] for key, values in datasets.items()}
+
+    return {'dates': dates, 'datasets': datasets}
+
+
+def lttb_indices(series, threshold):
+    """Largest-Triangle-Three-Buckets で残す点のインデックスを返す
+
+    複数系列の x 軸を揃えたまま間引くため、各系列を 0〜1 に正規化した
+    三角形の面積の合計で代表点を選ぶ。欠損値 (None) は面積に寄与しない。
+    """
+    n = len(series[0]) if series else 0
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    normalized = []
+    for values in series:
+        present = [v for v in values if v is not None]
+        if not present:
+            continue
+        low, high = min(present), max(present)
+        span = (high - low) or 1
+        normalized.append([None if v is None else (v - low) / span for v in values])
+
+    def bucket_average(values, lo, hi):
+        present = [(i, values[i]) for i in range(lo, hi) if values[i] is not None]
+        if not present:
+            return None
+        return (
+            sum(i for i, _ in present) / len(present),
+            sum(v for _, v in present) / len(present),
+        )
+
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for bucket in range(threshold - 2):
+        lo = int(bucket * every) + 1
+        hi = min(int((bucket + 1) * every) + 1, n - 1)
+        next_lo = hi
+        next_hi = min(int((bucket + 2) * every) + 1, n)
+        averages = [bucket_average(values, next_lo, next_hi) for values in normalized]
+
+        best, best_area = lo, -1.0
+        for b in range(lo, hi):
+            area = 0.0
+            for values, avg in zip(normalized, averages):
+                ay, by = values[a], values[b]
+                if ay is None or by is None or avg is None:
+                    continue
+                cx, cy = avg
+                area += abs((a - cx) * (by - ay) - (a - b) * (cy - ay))
+            if area > best_area:
+                best, best_area = b, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
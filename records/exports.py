@@ -0,0 +1,76 @@
+import codecs
+import csv
+import zlib
+
+from .models import DailyRecord, Location
+
+CSV_FIELDS = [field.name for field in DailyRecord._meta.fields]
+CSV_HEADER = [field.verbose_name for field in DailyRecord._meta.fields]
+
+WEATHER_DISPLAY = dict(DailyRecord.WEATHER_CHOICES)
+MEDICINE_DISPLAY = dict(DailyRecord.MEDICINE_CHOICES)
+MISHAP_DISPLAY = {True: "有り", False: "無し"}
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """csv.writer の書き込み先。書き込まれた行をそのまま返す"""
+
+    def write(self, value):
+        return value
+
+
+def export_columns(start=None, end=None):
+    """start〜end の記録を、プロセスごとのスナップショット (records/snapshot.py) の列で返す"""
+    # NumPy is only loaded by workers that actually export.
+    from .snapshot import get_snapshot
+
+    return get_snapshot().between(start, end)
+
+
+def iter_csv_rows(columns):
+    """CSV の各行 (ヘッダー含む) を値の並びとして返す"""
+    from .snapshot import to_values
+
+    yield CSV_HEADER
+    # Locations are exported by name; there are only a handful.
+    location_names = dict(Location.objects.values_list('pk', 'name'))
+    displays = {
+        'weather': lambda value: WEATHER_DISPLAY.get(value, value),
+        'headache_medicine': lambda value: MEDICINE_DISPLAY.get(value, value),
+        'mishap': MISHAP_DISPLAY.__getitem__,
+        'location': lambda value: location_names.get(value, ''),
+    }
+    for offset in range(0, len(columns['id']), EXPORT_CHUNK_SIZE):
+        # Only this chunk is turned into Python values.
+        chunk = []
+        for field in CSV_FIELDS:
+            values = to_values(field, columns[field][offset:offset + EXPORT_CHUNK_SIZE])
+            if field in displays:
+                values = map(displays[field], values)
+            chunk.append(values)
+        yield from zip(*chunk)
+
+
+def iter_csv_bytes(columns, compress=False):
+    """BOM 付き UTF-8 の CSV をバイト列のチャンクとして返す (compress なら gzip)"""
+    writer = csv.writer(Echo())
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = [codecs.BOM_UTF8]
+    size = len(codecs.BOM_UTF8)
+    for row in iter_csv_rows(columns):
+        line = writer.writerow(row).encode('utf-8')
+        buffer.append(line)
+        size += len(line)
+        if size >= 64 * 1024:
+            chunk = b''.join(buffer)
+            buffer, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    chunk = b''.join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
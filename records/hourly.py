@@ -0,0 +1,120 @@
+"""毎時の気圧・PM2.5 の保存 (HourlySeries) と NumPy での読み出し
+
+1日分の24時間を float32 の配列として1行に詰めるので、数千日分でも
+日数分の行を読むだけで済む。書き込み (Open-Meteo の応答の保存) は
+NumPy を使わず、読み出し側の関数だけが NumPy を読み込む。
+"""
+import math
+import struct
+from collections import defaultdict
+from datetime import timedelta
+
+from .models import DataVersion, HourlySeries
+
+HOURS = 24
+_PACKED = struct.Struct(f'<{HOURS}f')
+
+# HourlySeries column -> (Open-Meteo API as in weather.py, hourly variable)
+SERIES = {
+    'pressure': ('forecast', 'pressure_msl'),
+    'pm25': ('air_quality', 'pm2_5'),
+}
+
+
+def pack(values):
+    """24個の値 (None は欠測) を float32 のバイト列にする。足りない時間は欠測"""
+    values = [math.nan if value is None else value for value in list(values)[:HOURS]]
+    values += [math.nan] * (HOURS - len(values))
+    return _PACKED.pack(*values)
+
+
+def unpack(blob):
+    return [None if math.isnan(value) else value for value in _PACKED.unpack(bytes(blob))]
+
+
+def store_payloads(api, entries):
+    """1日分の Open-Meteo の応答 [(緯度, 経度, 日付, 応答)] から毎時の値を保存する
+
+    同じ日の別の列 (もう一方の API の値) はそのまま残す。
+    """
+    columns = [column for column, (source, _) in SERIES.items() if source == api]
+    rows = {}
+    for lat, lon, day, payload in entries:
+        hourly = payload.get('hourly') or {}
+        values = {column: hourly.get(SERIES[column][1]) for column in columns}
+        values = {column: pack(series) for column, series in values.items() if series}
+        if values:
+            rows[lat, lon, day] = HourlySeries(latitude=lat, longitude=lon, date=day, **values)
+    if not rows:
+        return 0
+    HourlySeries.objects.bulk_create(
+        rows.values(), batch_size=500, update_conflicts=True,
+        unique_fields=['latitude', 'longitude', 'date'],
+        update_fields=columns + ['updated_at'],
+    )
+    # Pages built from the series (the lag analysis) are cached on this version.
+    DataVersion.bump(HourlySeries._meta.db_table)
+    return len(rows)
+
+
+def load_series(column, lat, lon, start, end):
+    """start〜end の毎時の値を (日付の配列, 日数 × 24 の float32 配列) で返す
+
+    日付は1日おきに連続し、保存されていない日は NaN の行になる。
+    """
+    import numpy as np
+
+    length = (end - start).days + 1
+    dates = np.datetime64(start, 'D') + np.arange(max(length, 0))
+    values = np.full((max(length, 0), HOURS), np.nan, dtype=np.float32)
+    rows = HourlySeries.objects.filter(
+        latitude=lat, longitude=lon, date__range=(start, end), **{f'{column}__isnull': False}
+    ).values_list('date', column)
+    days, blobs = [], []
+    for day, blob in rows.iterator(chunk_size=2000):
+        days.append((day - start).days)
+        blobs.append(blob)
+    if days:
+        values[days] = np.frombuffer(b''.join(blobs), dtype='<f4').reshape(len(days), HOURS)
+    return dates, values
+
+
+def max_pressure_drop(values, hours=3):
+    """各日の「hours 時間で最も大きく下がった気圧」(hPa, 下がらなければ 0 以下) を返す
+
+    values は load_series('pressure', ...) の日数 × 24 の配列。日をまたぐ変化は
+    下がり終えた時刻の日に数える。値がない日は NaN。
+    """
+    import numpy as np
+
+    flat = values.reshape(-1).astype(np.float64)
+    drops = np.full(flat.shape, np.nan)
+    drops[hours:] = flat[:-hours] - flat[hours:]
+    drops = drops.reshape(values.shape)
+    result = np.full(values.shape[0], np.nan)
+    has_value = ~np.isnan(drops).all(axis=1)
+    result[has_value] = np.nanmax(drops[has_value], axis=1)
+    return result
+
+
+def pressure_drops(keys, hours=3):
+    """[(緯度, 経度, 日付)] ごとの max_pressure_drop を同じ順の配列で返す
+
+    場所ごとに期間をまとめて1回ずつ読み出す。
+    """
+    import numpy as np
+
+    result = np.full(len(keys), np.nan)
+    by_location = defaultdict(list)
+    for i, (lat, lon, day) in enumerate(keys):
+        by_location[lat, lon].append((i, day))
+    for (lat, lon), items in by_location.items():
+        first = min(day for _, day in items)
+        last = max(day for _, day in items)
+        # One day earlier, for drops that start before midnight
+        _, values = load_series('pressure', lat, lon, first - timedelta(days=1), last)
+        drops = max_pressure_drop(values, hours)[1:]
+        indexes = np.fromiter((i for i, _ in items), dtype=np.int64, count=len(items))
+        offsets = np.fromiter(((day - first).days for _, day in items), dtype=np.int64, count=len(items))
+        result[indexes] = drops[offsets]
+    return result
@@ -0,0 +1,156 @@
+import csv
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .exports import CSV_FIELDS, CSV_HEADER, MEDICINE_DISPLAY, MISHAP_DISPLAY, WEATHER_DISPLAY
+from .forms import DailyRecordForm
+from .models import DailyRecord, Location
+from .mood_model import maybe_retrain
+from .rollups import rebuild_rollups, refresh_for_dates
+from .signals import bump_daily_records
+
+IMPORT_BATCH_SIZE = 1000
+
+# export_csv の見出し (verbose_name) とフィールド名のどちらでも受け付ける
+HEADER_TO_FIELD = {**dict(zip(CSV_HEADER, CSV_FIELDS)), **{field: field for field in CSV_FIELDS}}
+
+# 表示値 -> 保存値 (保存値そのものも受け付ける)
+WEATHER_VALUES = {**{label: key for key, label in WEATHER_DISPLAY.items()}, **{key: key for key in WEATHER_DISPLAY}}
+MEDICINE_VALUES = {**{label: key for key, label in MEDICINE_DISPLAY.items()}, **{key: key for key in MEDICINE_DISPLAY}}
+MISHAP_VALUES = {label: value for value, label in MISHAP_DISPLAY.items()}
+
+UPDATE_FIELDS = [field for field in CSV_FIELDS if field not in ('id', 'date')]
+
+# Above this many distinct dates it is cheaper to rebuild every rollup than to refresh periods one by one.
+ROLLUP_REFRESH_LIMIT = 366
+
+
+class ImportResult:
+    def __init__(self):
+        self.processed = 0
+        self.saved = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.errors.append((line, message))
+
+
+def _form_data(row):
+    data = {}
+    for key, value in row.items():
+        field = HEADER_TO_FIELD.get((key or '').strip())
+        if field is None or field == 'id':
+            continue
+        if value is None:
+            value = ''
+        if isinstance(value, str):
+            value = value.strip()
+        if field == 'weather':
+            value = WEATHER_VALUES.get(value, value)
+        elif field == 'headache_medicine':
+            value = MEDICINE_VALUES.get(value, value)
+        elif field == 'mishap':
+            # CheckboxInput treats 'false'/'0'/'' as unchecked
+            value = MISHAP_VALUES.get(value, value)
+        data[field] = value
+    for field in UPDATE_FIELDS:
+        # Missing columns fall back to the model default, as on the entry form.
+        model_field = DailyRecord._meta.get_field(field)
+        if field not in data and model_field.has_default():
+            data[field] = model_field.get_default()
+    return data
+
+
+def iter_csv_rows(stream):
+    """export_csv 形式の CSV を1行ずつ (行番号, フォーム用の dict) で返す"""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, _form_data(row)
+
+
+def iter_json_rows(stream):
+    """JSON 配列または JSON Lines を1件ずつ (行番号, フォーム用の dict) で返す"""
+    first = stream.read(1)
+    while first and first.isspace():
+        first = stream.read(1)
+    if first == '[':
+        # A JSON array has to be parsed as a whole; JSON Lines streams.
+        for index, row in enumerate(json.loads(first + stream.read()), start=1):
+            yield index, _form_data(row)
+        return
+    pending = first
+    for line_number, line in enumerate(stream, start=1):
+        line = pending + line
+        pending = ''
+        if line.strip():
+            yield line_number, _form_data(json.loads(line))
+
+
+def _validate(batch, result):
+    # Instantiating a ModelForm per row dominates the import time, so the
+    # form's fields are built once and each row is cleaned field by field.
+    # Duplicate dates are upserted, so the form's unique check is not wanted.
+    fields = DailyRecordForm().fields
+    # Locations are given by name (as exported) or by id; resolved without a query per row.
+    locations = {}
+    for location in Location.objects.all():
+        locations[location.name] = locations[str(location.pk)] = location
+    records = {}
+    for line, data in batch:
+        result.processed += 1
+        cleaned, errors = {}, []
+        for name, field in fields.items():
+            value = field.widget.value_from_datadict(data, {}, name)
+            if name == 'location':
+                value = str(value or '')
+                if value and value not in locations:
+                    errors.append(f'location: 場所「{value}」が登録されていません。')
+                cleaned[name] = locations.get(value)
+                continue
+            try:
+                cleaned[name] = field.clean(value)
+            except ValidationError as e:
+                errors.append(f'{name}: {" ".join(e.messages)}')
+        if errors:
+            result.add_error(line, '; '.join(errors))
+            continue
+        record = DailyRecord(**cleaned)
+        # The last row wins when a date appears twice in one batch.
+        records[record.date] = record
+    return list(records.values())
+
+
+def import_rows(rows, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+    """検証済みの行を date をキーに upsert する"""
+    result = ImportResult()
+    touched_dates = set()
+    rows = iter(rows)
+    with transaction.atomic():
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            records = _validate(batch, result)
+            if records and not dry_run:
+                DailyRecord.objects.bulk_create(
+                    records,
+                    update_conflicts=True,
+                    unique_fields=['date'],
+                    update_fields=UPDATE_FIELDS,
+                )
+            result.saved += len(records)
+            touched_dates.update(record.date for record in records)
+
+        if touched_dates and not dry_run:
+            # bulk_create doesn't send signals: bump the version (the correlation
+            # statistics rebuild themselves on the next read) and refresh rollups.
+            version = bump_daily_records()
+            transaction.on_commit(lambda: maybe_retrain(version))
+            if len(touched_dates) > ROLLUP_REFRESH_LIMIT:
+                rebuild_rollups()
+            else:
+                refresh_for_dates(touched_dates)
+    return result
@@ -0,0 +1,252 @@
+"""データベースを使った軽量なジョブキュー
+
+重い処理 (天気の取得、大きなエクスポートなど) はリクエストの中で行わず、
+enqueue() で Job として登録してすぐに応答を返す。登録したジョブは
+run_jobs コマンド、または Web プロセス内のワーカースレッド
+(JOBS_WORKER_THREAD) が取り出して実行する。外部のブローカーは使わない。
+
+失敗したジョブは JOBS_BACKOFF * 2^(試行回数 - 1) 秒後に再実行され、
+max_attempts 回失敗すると failed になる。実行中のジョブはワーカーが
+JOBS_HEARTBEAT_INTERVAL 秒ごとに locked_at を更新し、JOBS_LOCK_TIMEOUT 秒
+更新が止まったもの (ワーカーが落ちた) も1回の失敗として扱う。
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs (and their files) are purged at most this often (seconds).
+PURGE_INTERVAL = 3600
+
+_tasks = {}
+
+_worker_thread = None
+_worker_lock = threading.Lock()
+
+
+def task(name):
+    """関数をジョブとして登録するデコレーター。引数はキーワードで JSON にできる値だけ"""
+    def register(fn):
+        _tasks[name] = fn
+        return fn
+    return register
+
+
+def get_task(name):
+    from . import tasks  # noqa: F401  (registers the tasks)
+
+    return _tasks[name]
+
+
+def enqueue(name, delay=0, max_attempts=None, **kwargs):
+    """ジョブを登録して返す
+
+    呼び出し元のトランザクションの中で保存されるので、ロールバックされれば
+    ジョブも消える。
+    """
+    return Job.objects.create(
+        task=name,
+        args=kwargs,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+
+
+LOST_WORKER_ERROR = 'ワーカーが応答しなくなりました (JOBS_LOCK_TIMEOUT)。'
+
+
+def _requeue_stale():
+    """ワーカーごと失われた実行中のジョブ (デプロイ、OOM など) を再実行に回す
+
+    失われた実行も試行回数に数え、max_attempts に達していれば failed にする。
+    再実行に回した数と failed にした数を返す。
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT))
+    # claim() already counted the lost run in attempts when it took the job.
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, locked_at=None, finished_at=now, last_error=LOST_WORKER_ERROR,
+    )
+    requeued = 0
+    for job in stale.only('pk', 'attempts'):
+        # The worker may have finished the job since; only still-stale rows change.
+        requeued += stale.filter(pk=job.pk).update(
+            status=Job.QUEUED, locked_at=None, worker='', last_error=LOST_WORKER_ERROR,
+            run_at=now + timedelta(seconds=backoff(job.attempts)),
+        )
+    if failed or requeued:
+        logger.warning('Requeued %d and failed %d jobs left running by a lost worker', requeued, failed)
+    return requeued, failed
+
+
+def _beat(job):
+    """実行中のジョブの locked_at を更新する。ほかのワーカーに取られていれば False"""
+    return bool(Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker).update(locked_at=timezone.now()))
+
+
+def _heartbeat(job, stop):
+    interval = settings.JOBS_HEARTBEAT_INTERVAL
+    try:
+        while not stop.wait(interval):
+            if not _beat(job):
+                logger.warning('Job %s #%s is no longer held by %s', job.task, job.pk, job.worker)
+                return
+    except Exception:
+        logger.exception('Heartbeat for job %s #%s failed', job.task, job.pk)
+    finally:
+        # The thread has its own connection.
+        connection.close()
+
+
+def claim(worker):
+    """実行予定を過ぎたジョブを1つ取り出し、実行中にして返す (なければ None)
+
+    SELECT ... FOR UPDATE SKIP LOCKED は SQLite にないので、状態が
+    queued のままのときだけ書き換える UPDATE で取り合う。
+    """
+    while True:
+        candidate = (
+            Job.objects.filter(status=Job.QUEUED, run_at__lte=timezone.now())
+            .order_by('run_at', 'pk').values_list('pk', flat=True).first()
+        )
+        if candidate is None:
+            return None
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=candidate, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_at=now, worker=worker, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=candidate)
+        # Another worker took it first; try the next one.
+
+
+def backoff(attempts):
+    return settings.JOBS_BACKOFF * (2 ** (attempts - 1))
+
+
+def run(job):
+    """ジョブを1つ実行し、結果 (または再実行の予定) を保存する
+
+    実行中は別スレッドで locked_at を更新し続けるので、JOBS_LOCK_TIMEOUT より
+    長くかかるジョブが二重に実行されることはない。
+    """
+    started = time.perf_counter()
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job, stop), name=f'job-heartbeat-{job.pk}', daemon=True)
+    heartbeat.start()
+    try:
+        result = get_task(job.task)(**job.args)
+    except Exception:
+        error = traceback.format_exc()
+        job.last_error = error
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + timedelta(seconds=backoff(job.attempts))
+            logger.warning('Job %s #%s failed (attempt %d/%d), retrying at %s', job.task, job.pk, job.attempts, job.max_attempts, job.run_at)
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+            logger.error('Job %s #%s failed permanently:\n%s', job.task, job.pk, error)
+    else:
+        job.status = Job.SUCCEEDED
+        job.result = result
+        job.finished_at = timezone.now()
+        logger.info('Job %s #%s finished in %.2fs', job.task, job.pk, time.perf_counter() - started)
+    finally:
+        stop.set()
+        heartbeat.join()
+    job.locked_at = None
+    job.save(update_fields=['status', 'result', 'last_error', 'run_at', 'locked_at', 'finished_at'])
+    return job
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def work(burst=False, max_jobs=None, poll_interval=None, stop=None):
+    """ジョブを取り出して実行し続ける。burst なら待機中のジョブがなくなった時点で戻る
+
+    実行したジョブの数を返す。
+    """
+    poll_interval = settings.JOBS_POLL_INTERVAL if poll_interval is None else poll_interval
+    name = worker_name()
+    done = 0
+    purged_at = None
+    while stop is None or not stop.is_set():
+        close_old_connections()
+        if purged_at is None or time.monotonic() - purged_at >= PURGE_INTERVAL:
+            purge()
+            purged_at = time.monotonic()
+        _requeue_stale()
+        job = claim(name)
+        if job is None:
+            if burst:
+                break
+            if stop is not None:
+                stop.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+            continue
+        run(job)
+        done += 1
+        if max_jobs is not None and done >= max_jobs:
+            break
+    return done
+
+
+def _work_in_thread():
+    while True:
+        try:
+            work()
+        except Exception:
+            # e.g. the database went away; keep the thread alive and retry.
+            logger.exception('Job worker crashed, restarting')
+            connection.close()
+            time.sleep(settings.JOBS_POLL_INTERVAL)
+
+
+def start_worker_thread():
+    """Web プロセスの中でワーカーをデーモンスレッドとして動かす (1プロセス1つまで)"""
+    global _worker_thread
+    with _worker_lock:
+        if _worker_thread is not None and _worker_thread.is_alive():
+            return False
+        _worker_thread = threading.Thread(target=_work_in_thread, name='job-worker', daemon=True)
+        _worker_thread.start()
+    return True
+
+
+def purge(days=None):
+    """終了してから days 日 (JOBS_RETENTION_DAYS) 以上たったジョブを消し、消した数を返す"""
+    days = settings.JOBS_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    old = Job.objects.filter(status__in=(Job.SUCCEEDED, Job.FAILED), finished_at__lt=cutoff)
+    for job in old.iterator():
+        path = job_file(job)
+        if path is not None:
+            path.unlink(missing_ok=True)
+    deleted, _ = old.delete()
+    return deleted
+
+
+def job_file(job):
+    """ジョブが書き出したファイル (結果の 'file') のパス。なければ None"""
+    name = job.result.get('file') if isinstance(job.result, dict) else None
+    if not name:
+        return None
+    # Only ever a bare file name inside JOBS_FILE_DIR
+    return Path(settings.JOBS_FILE_DIR) / Path(name).name
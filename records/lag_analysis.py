@@ -0,0 +1,173 @@
+"""時間差 (ラグ) 相関と移動窓相関を NumPy でまとめて計算する"""
+import warnings
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .analysis import (
+    BASE_COLS, FEATURE_LABELS, FEATURES, MEDICINE_MAPPING, WEATHER_VALUES,
+)
+from .hourly import pressure_drops
+from .models import Location
+from .snapshot import CHOICE_FIELDS, get_snapshot, to_numbers
+from .weather import coordinates
+
+DERIVED_FEATURES = ['pressure_range', 'pressure_change', 'pressure_drop_3h']
+LAG_FEATURES = FEATURES + DERIVED_FEATURES
+LAG_FEATURE_LABELS = {
+    **FEATURE_LABELS,
+    'pressure_range': '気圧差 (最高−最低)',
+    'pressure_change': '気圧の前日差',
+    'pressure_drop_3h': '3時間での最大の気圧低下',
+}
+
+_RATING_FIELDS = ['my_mood', 'wife_mood', 'pollen', 'pm25']
+
+
+def load_daily_matrix(start=None, end=None):
+    """日付順の特徴量行列 (日数 × LAG_FEATURES) を返す
+
+    記録はプロセスごとのスナップショット (records/snapshot.py) から読む。
+    記録のない日も NaN の行として含め、行の間隔がちょうど1日になるようにする。
+    """
+    columns = get_snapshot().between(start, end)
+    if not len(columns['date']):
+        return np.empty(0, dtype='datetime64[D]'), np.empty((0, len(LAG_FEATURES)))
+
+    first = columns['date'][0]
+    offsets = (columns['date'] - first).astype(np.int64)
+    length = int(offsets[-1]) + 1
+    dates = first + np.arange(length)
+
+    matrix = np.full((length, len(LAG_FEATURES)), np.nan)
+    for field in BASE_COLS + _RATING_FIELDS:
+        matrix[offsets, LAG_FEATURES.index(f'{field}_num' if field in _RATING_FIELDS else field)] = to_numbers(field, columns[field])
+    medicine = np.array([MEDICINE_MAPPING.get(value, np.nan) for value in CHOICE_FIELDS['headache_medicine']])
+    matrix[offsets, LAG_FEATURES.index('headache_medicine_num')] = medicine[columns['headache_medicine']]
+    matrix[offsets, LAG_FEATURES.index('mishap_num')] = columns['mishap']
+    for value in WEATHER_VALUES:
+        code = CHOICE_FIELDS['weather'].index(value)
+        matrix[offsets, LAG_FEATURES.index(f'weather_{value}')] = columns['weather'] == code
+
+    max_pressure = matrix[:, LAG_FEATURES.index('max_pressure')]
+    min_pressure = matrix[:, LAG_FEATURES.index('min_pressure')]
+    matrix[:, LAG_FEATURES.index('pressure_range')] = max_pressure - min_pressure
+    mean_pressure = (max_pressure + min_pressure) / 2
+    change = np.full(length, np.nan)
+    change[1:] = np.diff(mean_pressure)
+    matrix[:, LAG_FEATURES.index('pressure_change')] = change
+
+    # From the hourly series stored for each record's location
+    location_coords = {location.pk: coordinates(location) for location in Location.objects.all()}
+    home = coordinates()
+    keys = [
+        (*location_coords.get(location, home), day)
+        for location, day in zip(columns['location'].tolist(), columns['date'].tolist())
+    ]
+    matrix[offsets, LAG_FEATURES.index('pressure_drop_3h')] = pressure_drops(keys)
+    return dates, matrix
+
+
+def _masked_corr(x, y, axis):
+    """NaN を除いた組ごとのピアソン相関 (axis 方向に集計)"""
+    mask = ~np.isnan(x) & ~np.isnan(y)
+    n = mask.sum(axis=axis)
+    x = np.where(mask, x, 0.0)
+    y = np.where(mask, y, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_x = x.sum(axis=axis) / n
+        mean_y = y.sum(axis=axis) / n
+        cov = (x * y).sum(axis=axis) / n - mean_x * mean_y
+        var_x = (x * x).sum(axis=axis) / n - mean_x ** 2
+        var_y = (y * y).sum(axis=axis) / n - mean_y ** 2
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[(n < 3) | (var_x <= 1e-12) | (var_y <= 1e-12)] = np.nan
+    return np.clip(corr, -1.0, 1.0), n
+
+
+def lagged_correlations(matrix, target, max_lag):
+    """特徴量の lag 日前と target の当日の相関 (lag × 特徴量) を返す
+
+    全ラグで同じ目的日の集合を使うため、先頭 max_lag 日は目的日から除く。
+    """
+    days = matrix.shape[0]
+    if days <= max_lag:
+        empty = np.full((max_lag + 1, matrix.shape[1]), np.nan)
+        return empty, np.zeros_like(empty, dtype=np.int64)
+    # windows[t, f, k] = matrix[t + k, f]; reverse k so index = lag
+    windows = sliding_window_view(matrix, max_lag + 1, axis=0)[:, :, ::-1]
+    y = matrix[max_lag:, LAG_FEATURES.index(target)]
+    corr, n = _masked_corr(windows, y[:, None, None], axis=0)
+    corr, n = corr.T, n.T
+    corr[0, LAG_FEATURES.index(target)] = np.nan
+    return corr, n
+
+
+def _window_sums(values, window):
+    """values の window 行ごとの移動和 (累積和の差)"""
+    cumulative = np.zeros((values.shape[0] + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=cumulative[1:])
+    return cumulative[window:] - cumulative[:-window]
+
+
+def rolling_correlations(matrix, target, window):
+    """window 日の移動窓ごとの当日相関 (窓の数 × 特徴量) を返す
+
+    x, y, x², y², xy と組の数の累積和から窓ごとのモーメントを求めるので、
+    窓の大きさによらず O(日数 × 特徴量) のメモリで済む。
+    """
+    days = matrix.shape[0]
+    if days < window:
+        return np.full((0, matrix.shape[1]), np.nan)
+    y = matrix[:, LAG_FEATURES.index(target)][:, None]
+    mask = ~np.isnan(matrix) & ~np.isnan(y)
+    # Centred first, so the cumulative sums of squares stay small.
+    with np.errstate(invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        x = np.where(mask, matrix - np.nanmean(matrix, axis=0), 0.0)
+        y = np.where(mask, y - np.nanmean(y), 0.0)
+    n = _window_sums(mask.astype(np.float64), window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_x = _window_sums(x, window) / n
+        mean_y = _window_sums(y, window) / n
+        cov = _window_sums(x * y, window) / n - mean_x * mean_y
+        var_x = _window_sums(x * x, window) / n - mean_x ** 2
+        var_y = _window_sums(y * y, window) / n - mean_y ** 2
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[(n < 3) | (var_x <= 1e-12) | (var_y <= 1e-12)] = np.nan
+    corr = np.clip(corr, -1.0, 1.0)
+    corr[:, LAG_FEATURES.index(target)] = np.nan
+    return corr
+
+
+def _clean(value):
+    return None if np.isnan(value) else float(value)
+
+
+def lag_report(target, max_lag, window, start=None, end=None):
+    """テンプレート表示用にラグ相関と移動窓相関をまとめる"""
+    dates, matrix = load_daily_matrix(start, end)
+    lag_corr, lag_n = lagged_correlations(matrix, target, max_lag)
+    rolling = rolling_correlations(matrix, target, window)
+
+    rows = []
+    for f, feature in enumerate(LAG_FEATURES):
+        values = [_clean(v) for v in lag_corr[:, f]]
+        if all(v is None for v in values):
+            continue
+        column = rolling[:, f] if rolling.size else np.empty(0)
+        valid = column[~np.isnan(column)]
+        rows.append({
+            'label': LAG_FEATURE_LABELS[feature],
+            'lags': values,
+            'rolling_latest': _clean(column[-1]) if column.size else None,
+            'rolling_min': float(valid.min()) if valid.size else None,
+            'rolling_max': float(valid.max()) if valid.size else None,
+        })
+    return {
+        'lags': list(range(max_lag + 1)),
+        'rows': rows,
+        'days': int(matrix.shape[0]),
+        'samples': [int(v) for v in lag_n.max(axis=1)] if lag_n.size else [],
+        'latest_window_end': str(dates[-1]) if dates.size else None,
+    }
@@ -0,0 +1,96 @@
+import json
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from records.models import DailyRecord
+from records.mood_model import maybe_retrain
+from records.rollups import refresh_for_dates
+from records.signals import bump_daily_records
+from records.weather import fetch_weather_batch, fill_empty_weather
+
+
+class Command(BaseCommand):
+    help = (
+        '指定した期間の天気・気圧・PM2.5を Open-Meteo からまとめて取得し、空の項目だけを埋めます。'
+        '場所が設定された記録はその場所の天気を取得します。'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('start', type=date.fromisoformat, help='開始日 (YYYY-MM-DD)')
+        parser.add_argument('end', type=date.fromisoformat, help='終了日 (YYYY-MM-DD)')
+        parser.add_argument('--chunk-days', type=int, default=92, help='1回のリクエストで取得する日数')
+        parser.add_argument('--dry-run', action='store_true', help='取得と差分の表示だけを行い、保存しない')
+        parser.add_argument('--checkpoint', default='.backfill_weather.json', help='再開用のチェックポイントファイル')
+        parser.add_argument('--restart', action='store_true', help='チェックポイントを無視して最初から実行する')
+
+    def handle(self, *args, **options):
+        start, end = options['start'], options['end']
+        if start > end:
+            raise CommandError('開始日は終了日以前にしてください。')
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days は1以上にしてください。')
+
+        checkpoint = Path(options['checkpoint'])
+        resume_from = self.load_checkpoint(checkpoint, start, end) if not options['restart'] else None
+        if resume_from:
+            self.stdout.write(f'{resume_from} から再開します。')
+            start = resume_from
+
+        total_updated = 0
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=options['chunk_days'] - 1), end)
+            updated = self.apply(chunk_start, chunk_end, options['dry_run'])
+            total_updated += updated
+            self.stdout.write(f'{chunk_start} 〜 {chunk_end}: 更新 {updated} 件')
+            if not options['dry_run']:
+                self.save_checkpoint(checkpoint, options['start'], end, chunk_end + timedelta(days=1))
+            chunk_start = chunk_end + timedelta(days=1)
+
+        if not options['dry_run']:
+            checkpoint.unlink(missing_ok=True)
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(f'{prefix}完了: 更新 {total_updated} 件'))
+
+    def apply(self, chunk_start, chunk_end, dry_run):
+        existing = {r.date: r for r in DailyRecord.objects.filter(date__range=(chunk_start, chunk_end)).select_related('location')}
+        pairs = [(record.location, day) for day, record in existing.items() if record.empty_weather_fields()]
+        # Grouped by location into a few multi-location range requests
+        days = fetch_weather_batch(pairs)
+
+        to_update, changed_fields = [], set()
+        for (_, day), values in sorted(days.items(), key=lambda item: item[0][1]):
+            record = existing[day]
+            fields = fill_empty_weather(record, values)
+            if fields:
+                to_update.append(record)
+                changed_fields.update(fields)
+
+        if to_update and not dry_run:
+            # Each chunk is committed on its own, so an interrupted run leaves
+            # the version, rollups and statistics consistent with what was saved.
+            with transaction.atomic():
+                DailyRecord.objects.bulk_update(to_update, sorted(changed_fields), batch_size=500)
+                # bulk_update doesn't send signals: bump the version (the correlation
+                # statistics rebuild themselves on the next read) and refresh rollups.
+                version = bump_daily_records(0)
+                transaction.on_commit(lambda: maybe_retrain(version))
+                refresh_for_dates({record.date for record in to_update})
+        return len(to_update)
+
+    def load_checkpoint(self, path, start, end):
+        if not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if data.get('start') != start.isoformat() or data.get('end') != end.isoformat():
+            return None
+        return date.fromisoformat(data['next'])
+
+    def save_checkpoint(self, path, start, end, next_date):
+        path.write_text(json.dumps({'start': start.isoformat(), 'end': end.isoformat(), 'next': next_date.isoformat()}))
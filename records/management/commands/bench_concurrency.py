@@ -0,0 +1,120 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from records.open_meteo_stub import start_stub
+
+# gunicorn invocations compared, each with a single worker process as on Render
+MODES = {
+    'wsgi': ['project_config.wsgi:application'],
+    'asgi': ['project_config.asgi:application', '-k', 'uvicorn_worker.UvicornWorker'],
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise CommandError(f'{url} が起動しませんでした。')
+
+
+async def _fire(base_url, requests, concurrency, first_date):
+    # Distinct past dates, so every lookup misses the weather cache.
+    urls = [f'{base_url}/api/get-weather/?date={first_date + timedelta(days=i)}' for i in range(requests)]
+    limits = httpx.Limits(max_connections=concurrency)
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def one(url):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(url) for url in urls))
+        elapsed = time.perf_counter() - started
+    return elapsed, sorted(latencies), errors
+
+
+class Command(BaseCommand):
+    help = (
+        '天気 API (遅延付きスタブ) への同時リクエストを、WSGI (同期ビュー) と '
+        'ASGI (uvicorn ワーカー + 非同期ビュー) の gunicorn 1プロセスで比較します。'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', nargs='+', choices=list(MODES), default=list(MODES))
+        parser.add_argument('--requests', type=int, default=40, help='送るリクエストの数')
+        parser.add_argument('--concurrency', type=int, default=20, help='同時に送るリクエストの数')
+        parser.add_argument('--stub-latency', type=float, default=0.3, help='スタブの応答遅延 (秒)')
+
+    def handle(self, *args, **options):
+        stub, stub_url = start_stub(options['stub_latency'])
+        with tempfile.TemporaryDirectory() as directory:
+            env = {
+                **os.environ,
+                'DJANGO_SETTINGS_MODULE': 'project_config.settings',
+                # A scratch database: the lookups fill the weather cache.
+                'DATABASE_URL': f'sqlite:///{directory}/bench.sqlite3',
+                'OPEN_METEO_FORECAST_URL': f'{stub_url}/forecast',
+                'OPEN_METEO_AIR_QUALITY_URL': f'{stub_url}/air-quality',
+                'OPEN_METEO_BREAKER_THRESHOLD': '1000000',
+            }
+            env.pop('BASIC_AUTH_USER', None)
+            env.pop('ASYNC_VIEWS', None)
+            subprocess.run(
+                [sys.executable, 'manage.py', 'migrate', '-v0'],
+                cwd=settings.BASE_DIR, env=env, check=True,
+            )
+            try:
+                for i, mode in enumerate(options['mode']):
+                    # Each mode gets its own dates; the database is shared.
+                    first_date = date(1900, 1, 1) + timedelta(days=i * options['requests'])
+                    self.run_mode(mode, env, options, first_date)
+            finally:
+                stub.shutdown()
+
+    def run_mode(self, mode, env, options, first_date):
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', *MODES[mode], '-w', '1', '-b', f'127.0.0.1:{port}', '--log-level', 'warning'],
+            cwd=settings.BASE_DIR, env=env,
+        )
+        base_url = f'http://127.0.0.1:{port}'
+        try:
+            asyncio.run(_wait_until_up(f'{base_url}/'))
+            elapsed, latencies, errors = asyncio.run(_fire(base_url, options['requests'], options['concurrency'], first_date))
+        finally:
+            server.terminate()
+            server.wait()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f'{mode}: {options["requests"]} 件 (同時 {options["concurrency"]}) を {elapsed:.2f} 秒, '
+            f'{options["requests"] / elapsed:.1f} 件/秒, p50 {statistics.median(latencies):.0f} ms, '
+            f'p95 {p95:.0f} ms, エラー {errors} 件'
+        )
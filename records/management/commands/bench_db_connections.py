@@ -0,0 +1,109 @@
+import copy
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.utils import ConnectionHandler
+
+# How each simulated request gets its connection
+MODES = {
+    # A new connection per request: CONN_MAX_AGE=0 without the pool (ASGI before the pool)
+    'direct': {'CONN_MAX_AGE': 0},
+    # One connection kept per thread (WSGI with CONN_MAX_AGE=600)
+    'persistent': {'CONN_MAX_AGE': 600},
+    # Borrowed from the psycopg 3 pool and returned at the end of the request
+    'pool': {'CONN_MAX_AGE': 0},
+}
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def _database_settings(mode, pool_size):
+    database = copy.deepcopy(settings.DATABASES['default'])
+    database.update(MODES[mode])
+    options = database.setdefault('OPTIONS', {})
+    options.pop('pool', None)
+    if mode == 'pool':
+        options['pool'] = {
+            'min_size': min(settings.DB_POOL_MIN_SIZE, pool_size),
+            'max_size': pool_size,
+            'timeout': settings.DB_POOL_TIMEOUT,
+            'max_idle': settings.DB_POOL_MAX_IDLE,
+        }
+    return database
+
+
+class Command(BaseCommand):
+    help = (
+        'PostgreSQL で、同時に処理するリクエストごとの接続のオーバーヘッドを、'
+        '毎回接続する場合・スレッドごとに接続を使い回す場合・接続プールの場合で比較します。'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', nargs='+', choices=list(MODES), default=list(MODES))
+        parser.add_argument('--requests', type=int, default=2000, help='リクエストの数')
+        parser.add_argument('--concurrency', type=int, default=20, help='同時に処理するスレッドの数')
+        parser.add_argument('--pool-size', type=int, default=settings.DB_POOL_MAX_SIZE, help='プールの最大接続数')
+        parser.add_argument('--query', default='SELECT pg_backend_pid()', help='リクエストごとに実行する SQL')
+
+    def handle(self, *args, **options):
+        if settings.DATABASES['default']['ENGINE'] != 'django.db.backends.postgresql':
+            raise CommandError('DATABASE_URL に PostgreSQL を指定してください。')
+        for mode in options['mode']:
+            self.run_mode(mode, options)
+
+    def run_mode(self, mode, options):
+        alias = f'bench_{mode}'
+        handler = ConnectionHandler({
+            'default': copy.deepcopy(settings.DATABASES['default']),
+            alias: _database_settings(mode, options['pool_size']),
+        })
+        connect_ms, request_ms, backends = [], [], set()
+        lock = threading.Lock()
+        remaining = iter(range(options['requests']))
+
+        def worker():
+            connection = handler[alias]
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        break
+                started = time.perf_counter()
+                # What a request pays before its first query
+                connection.ensure_connection()
+                connected = time.perf_counter()
+                with connection.cursor() as cursor:
+                    cursor.execute(options['query'])
+                    row = cursor.fetchone()
+                # request_finished: close, or return to the pool / keep per CONN_MAX_AGE
+                connection.close_if_unusable_or_obsolete()
+                finished = time.perf_counter()
+                with lock:
+                    connect_ms.append((connected - started) * 1000)
+                    request_ms.append((finished - started) * 1000)
+                    if row:
+                        backends.add(row[0])
+            connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        if mode == 'pool':
+            handler[alias].close_pool()
+
+        connect_ms.sort()
+        request_ms.sort()
+        self.stdout.write(
+            f'{mode}: {len(request_ms)} 件 (同時 {options["concurrency"]}) を {elapsed:.2f} 秒, '
+            f'{len(request_ms) / elapsed:.0f} 件/秒, 接続 p50 {statistics.median(connect_ms):.2f} ms / '
+            f'p95 {_percentile(connect_ms, 0.95):.2f} ms, リクエスト p50 {statistics.median(request_ms):.2f} ms / '
+            f'p95 {_percentile(request_ms, 0.95):.2f} ms, サーバー接続 {len(backends)} 本'
+        )
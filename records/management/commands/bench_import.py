@@ -0,0 +1,53 @@
+import csv
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from records.exports import CSV_HEADER, MEDICINE_DISPLAY, MISHAP_DISPLAY, WEATHER_DISPLAY
+from records.imports import IMPORT_BATCH_SIZE, import_rows, iter_csv_rows
+
+RATINGS = ['S', 'A', 'B', 'C', 'D']
+
+
+def write_sample_csv(stream, rows, seed=0):
+    """export_csv と同じ形式の CSV を rows 行書き出す"""
+    rng = random.Random(seed)
+    writer = csv.writer(stream)
+    writer.writerow(CSV_HEADER)
+    start = date(1800, 1, 1)
+    for i in range(rows):
+        pressure = rng.uniform(995, 1025)
+        writer.writerow([
+            '', start + timedelta(days=i), rng.choice(list(WEATHER_DISPLAY.values())),
+            round(pressure + rng.uniform(0, 8), 1), round(pressure, 1),
+            round(rng.uniform(5, 35), 1), round(rng.uniform(-5, 20), 1), rng.randint(20, 95),
+            rng.choice(RATINGS), rng.choice(RATINGS), rng.choice(RATINGS), rng.choice(RATINGS),
+            rng.choice(list(MEDICINE_DISPLAY.values())), MISHAP_DISPLAY[rng.random() < 0.1],
+            f'サンプルの日記 {i}', '',
+        ])
+
+
+class Command(BaseCommand):
+    help = '一括取り込みのスループット (行/秒) を計測します。書き込みはロールバックするのでデータは変わりません。'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000], help='計測する行数')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        for rows in options['rows']:
+            with tempfile.TemporaryFile('w+', encoding='utf-8', newline='') as stream:
+                write_sample_csv(stream, rows)
+                stream.seek(0)
+                with transaction.atomic():
+                    started = time.perf_counter()
+                    result = import_rows(iter_csv_rows(stream), batch_size=options['batch_size'])
+                    elapsed = time.perf_counter() - started
+                    transaction.set_rollback(True)
+            self.stdout.write(
+                f'{rows:>8} 行: {elapsed:7.2f} 秒, {result.saved / elapsed:9.0f} 行/秒 (エラー {len(result.errors)} 件)'
+            )
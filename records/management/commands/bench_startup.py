@@ -0,0 +1,73 @@
+import json
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Each snippet runs in a fresh interpreter and prints its elapsed seconds.
+SNIPPETS = {
+    'wsgi_app': """
+import os, time
+t = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project_config.settings')
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import resolve
+resolve('/')
+print(time.perf_counter() - t)
+""",
+    'wsgi_app_with_preload': """
+import os, time
+t = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project_config.settings')
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import resolve
+resolve('/')
+from records.warmup import preload
+preload()
+print(time.perf_counter() - t)
+""",
+    'first_lazy_imports': """
+import os, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project_config.settings')
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+t = time.perf_counter()
+from records.warmup import preload
+preload()
+print(time.perf_counter() - t)
+""",
+}
+
+
+class Command(BaseCommand):
+    help = 'ワーカー起動にかかる時間と、遅延 import される依存の読み込み時間を計測します。'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='各計測の実行回数')
+        parser.add_argument('--json', action='store_true', help='結果を JSON で出力する')
+
+    def handle(self, *args, **options):
+        results = {}
+        for name, code in SNIPPETS.items():
+            timings = []
+            for _ in range(options['runs']):
+                output = subprocess.run(
+                    [sys.executable, '-c', code],
+                    cwd=settings.BASE_DIR, check=True, capture_output=True, text=True,
+                ).stdout
+                timings.append(float(output.strip().splitlines()[-1]))
+            results[name] = {
+                'median_ms': round(statistics.median(timings) * 1000, 1),
+                'min_ms': round(min(timings) * 1000, 1),
+                'max_ms': round(max(timings) * 1000, 1),
+            }
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for name, result in results.items():
+            self.stdout.write(f"{name:24s} median {result['median_ms']:8.1f} ms  (min {result['min_ms']:.1f}, max {result['max_ms']:.1f})")
@@ -0,0 +1,191 @@
+import base64
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+
+from records.open_meteo_stub import start_stub
+from records.synthetic import SYNTHETIC_END, seed_records
+
+# (name, URL); {date} changes on every request, so each weather lookup misses the cache.
+SCENARIOS = [
+    ('record_list', '/list/'),
+    ('data_visualization', '/visualize/'),
+    ('chart_data_daily', '/api/chart-data/?resolution=daily&points=2000'),
+    ('chart_data_monthly', '/api/chart-data/?resolution=monthly'),
+    ('export_csv', '/export/csv/'),
+    ('ai_analysis', '/analysis/'),
+    ('ai_analysis_lag', '/analysis/?mode=lag'),
+    ('get_weather_data', '/api/get-weather/?date={date}'),
+]
+
+# Changes smaller than these are noise, whatever the relative tolerance says.
+MIN_LATENCY_DELTA_MS = 2.0
+MIN_MEMORY_DELTA_KIB = 256
+
+
+class QueryCounter:
+    # An execute_wrapper rather than CaptureQueriesContext: connection.queries
+    # is reset by every request the test client makes and needs DEBUG.
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _get(client, url):
+    response = client.get(url)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    else:
+        response.content
+    return response.status_code
+
+
+class Command(BaseCommand):
+    help = (
+        '合成データで主要なビューを実行し、レイテンシ・ピークメモリ・クエリ数を計測します。'
+        '書き込みはロールバックするのでデータは変わりません。'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, nargs='+', default=[1_000, 10_000], help='データの日数 (例: 1000 10000 100000)')
+        parser.add_argument('--iterations', type=int, default=5, help='各ビューを計測する回数')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--scenario', nargs='+', choices=[name for name, _ in SCENARIOS], help='計測するビュー (省略時はすべて)')
+        parser.add_argument('--stub-latency', type=float, default=0.0, help='天気 API スタブの応答遅延 (秒)')
+        parser.add_argument('--save-baseline', metavar='PATH', help='結果を JSON で保存する')
+        parser.add_argument('--compare', metavar='PATH', help='保存済みの結果と比較し、悪化していればエラー終了する')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='悪化とみなす割合 (既定 0.25 = 25%%)')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations は1以上にしてください。')
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'{options["compare"]} を読み込めませんでした: {e}')
+        scenarios = [(name, url) for name, url in SCENARIOS if not options['scenario'] or name in options['scenario']]
+
+        server, stub_url = start_stub(options['stub_latency'])
+
+        headers = {}
+        if os.environ.get('BASIC_AUTH_USER') and os.environ.get('BASIC_AUTH_PASSWORD'):
+            credentials = f"{os.environ['BASIC_AUTH_USER']}:{os.environ['BASIC_AUTH_PASSWORD']}"
+            headers['HTTP_AUTHORIZATION'] = 'Basic ' + base64.b64encode(credentials.encode()).decode()
+
+        results = {}
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=['testserver'],
+                OPEN_METEO_FORECAST_URL=f'{stub_url}/forecast',
+                OPEN_METEO_AIR_QUALITY_URL=f'{stub_url}/air-quality',
+            ):
+                for days in options['days']:
+                    results[str(days)] = self.run_size(days, scenarios, options, Client(**headers))
+        finally:
+            server.shutdown()
+
+        report = {
+            'meta': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'seed': options['seed'],
+            },
+            'results': results,
+        }
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f'{options["save_baseline"]} に保存しました。'))
+        if baseline is not None:
+            regressions = self.compare(baseline, report, options['tolerance'])
+            if regressions:
+                raise CommandError(f'{len(regressions)} 件の悪化が見つかりました。')
+            self.stdout.write(self.style.SUCCESS('ベースラインからの悪化はありません。'))
+
+    def run_size(self, days, scenarios, options, client):
+        results = {}
+        with transaction.atomic():
+            started = time.perf_counter()
+            seed_records(days, seed=options['seed'], replace=True)
+            self.stdout.write(f'{days} 日分のデータを作成 ({time.perf_counter() - started:.1f} 秒)')
+            counter = iter(range(1_000_000))
+
+            def url_for(template):
+                # A different past date each time, so weather lookups miss the cache.
+                return template.format(date=SYNTHETIC_END - timedelta(days=next(counter)))
+
+            for name, template in scenarios:
+                # Warm-up (also builds the correlation statistics on first use)
+                _get(client, url_for(template))
+
+                queries = QueryCounter()
+                with connection.execute_wrapper(queries):
+                    tracemalloc.start()
+                    try:
+                        status = _get(client, url_for(template))
+                        _, peak = tracemalloc.get_traced_memory()
+                    finally:
+                        tracemalloc.stop()
+
+                timings = []
+                for _ in range(options['iterations']):
+                    url = url_for(template)
+                    started = time.perf_counter()
+                    _get(client, url)
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                results[name] = {
+                    'status': status,
+                    'median_ms': round(statistics.median(timings), 2),
+                    'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+                    'min_ms': round(timings[0], 2),
+                    'queries': queries.count,
+                    'peak_kib': round(peak / 1024, 1),
+                }
+                row = results[name]
+                self.stdout.write(
+                    f'  {name:<20} {row["median_ms"]:9.2f} ms (p95 {row["p95_ms"]:9.2f})'
+                    f' {row["queries"]:4} queries {row["peak_kib"]:10.1f} KiB  [{status}]'
+                )
+            transaction.set_rollback(True)
+        return results
+
+    def compare(self, baseline, report, tolerance):
+        regressions = []
+        for days, scenarios in report['results'].items():
+            for name, current in scenarios.items():
+                previous = baseline.get('results', {}).get(days, {}).get(name)
+                if previous is None:
+                    continue
+                checks = [
+                    ('median_ms', current['median_ms'] > previous['median_ms'] * (1 + tolerance)
+                        and current['median_ms'] - previous['median_ms'] > MIN_LATENCY_DELTA_MS),
+                    ('queries', current['queries'] > previous['queries']),
+                    ('peak_kib', current['peak_kib'] > previous['peak_kib'] * (1 + tolerance)
+                        and current['peak_kib'] - previous['peak_kib'] > MIN_MEMORY_DELTA_KIB),
+                ]
+                for metric, worse in checks:
+                    if worse:
+                        regressions.append((days, name, metric))
+                        self.stdout.write(self.style.ERROR(
+                            f'{days} 日 {name}: {metric} {previous[metric]} -> {current[metric]}'
+                        ))
+        return regressions
@@ -0,0 +1,107 @@
+import re
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Max
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from records.analysis import ANALYSIS_FIELDS
+from records.models import DailyRecord, DataVersion, PeriodRollup
+from records.signals import DAILY_RECORD_TABLE
+from records.snapshot import appended_queryset, snapshot_queryset
+
+# Plan lines that read a whole table of this app, or a whole index on it.
+# SQLite's SCAN has no search bound even USING INDEX; a bounded read is a SEARCH.
+SEQUENTIAL_SCAN = re.compile(r'Seq Scan on records_\w+|\bSCAN records_\w+\b(?: USING (?:COVERING )?INDEX (\S+))?')
+# PostgreSQL index scans are full scans unless followed by an Index Cond.
+INDEX_SCAN = re.compile(r'Index (?:Only )?Scan (?:Backward )?using (\S+) on records_\w+')
+
+# Scanning a partial index only reads the rows matching its condition.
+PARTIAL_INDEXES = {index.name for index in DailyRecord._meta.indexes if index.condition is not None}
+
+# Queries that read every record on purpose
+FULL_READS = {'スナップショット (作り直し)', 'ai_analysis (再計算)'}
+
+
+def is_full_scan(plan):
+    lines = plan.splitlines()
+    for i, line in enumerate(lines):
+        match = SEQUENTIAL_SCAN.search(line)
+        if match:
+            if match.group(1) not in PARTIAL_INDEXES:
+                return True
+            continue
+        match = INDEX_SCAN.search(line)
+        if not match or match.group(1) in PARTIAL_INDEXES:
+            continue
+        # The node's details follow until the next node (->).
+        details = []
+        for detail in lines[i + 1:]:
+            if '->' in detail:
+                break
+            details.append(detail)
+        if not any('Index Cond' in detail for detail in details):
+            return True
+    return False
+
+
+def main_queries():
+    """各ビューの主なクエリ (名前, クエリセット)"""
+    today = timezone.localdate()
+    month_ago = today - timedelta(days=30)
+    list_columns = DailyRecord.objects.only('date', 'weather', 'my_mood', 'wife_mood')
+    # The snapshot asks for the rows after the largest id it holds.
+    max_id = DailyRecord.objects.aggregate(max_id=Max('pk'))['max_id'] or 0
+    return [
+        ('record_list (先頭ページ)', list_columns.order_by('-date')[:51]),
+        ('record_list (?before=)', list_columns.filter(date__lt=today).order_by('-date')[:51]),
+        ('record_list (?after=)', list_columns.filter(date__gt=month_ago).order_by('date')[:51]),
+        # The row count and newest date are kept on the version row (records/signals.py).
+        ('chart_data_api (検証子)', DataVersion.objects.filter(table=DAILY_RECORD_TABLE)),
+        # chart_data_api, export_csv and ai_analysis read the in-memory snapshot
+        ('スナップショット (作り直し)', snapshot_queryset()),
+        ('スナップショット (追加された日)', appended_queryset(max_id)),
+        ('ai_analysis (再計算)', DailyRecord.objects.values(*ANALYSIS_FIELDS)),
+        ('機嫌Dで頭痛薬ありの日', DailyRecord.objects.filter(my_mood='D', headache_medicine='yes').order_by('-date')),
+        # Grouping the records would read all of them; rollups.mood_counts adds up the months.
+        ('妻の機嫌ごとの件数', PeriodRollup.objects.filter(period='month').values_list('wife_mood_counts', flat=True)),
+        ('雨の日 (期間指定)', DailyRecord.objects.filter(weather='rainy', date__gte=month_ago).order_by('date')),
+        ('失態のあった日', DailyRecord.objects.filter(mishap=True).order_by('-date')),
+        ('頭痛薬を飲んだ日', DailyRecord.objects.filter(headache_medicine='yes').order_by('-date')),
+    ]
+
+
+class Command(BaseCommand):
+    help = '各ビューの主なクエリの実行計画 (EXPLAIN) を表示し、全件スキャンになっているものを警告します。'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true', help='PostgreSQL で EXPLAIN ANALYZE を使う (クエリを実際に実行する)')
+
+    def handle(self, *args, **options):
+        explain_options = {}
+        if options['analyze'] and connection.vendor == 'postgresql':
+            explain_options = {'analyze': True, 'buffers': True}
+
+        flagged = []
+        for name, query in main_queries():
+            plan = query.explain(**explain_options)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'== {name}'))
+            self.stdout.write(plan)
+            if is_full_scan(plan):
+                # A LIMIT stops an ordered index scan early.
+                bounded = query.query.high_mark is not None
+                if name in FULL_READS:
+                    self.stdout.write('  -> 全件スキャン (全件を読むクエリ)')
+                elif bounded:
+                    self.stdout.write('  -> インデックス順の読み出し (LIMIT で打ち切り)')
+                else:
+                    flagged.append(name)
+                    self.stdout.write(self.style.WARNING('  -> 全件スキャン'))
+            self.stdout.write('')
+
+        if flagged:
+            self.stdout.write(self.style.WARNING(f'全件スキャンのクエリ: {", ".join(flagged)}'))
+            self.stdout.write('(行数が少ないとプランナーが全件スキャンを選ぶことがあります。データが増えた状態で確認してください。)')
+        else:
+            self.stdout.write(self.style.SUCCESS('全件スキャンになっているクエリはありません。'))
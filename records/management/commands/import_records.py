@@ -0,0 +1,34 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from records.imports import IMPORT_BATCH_SIZE, import_rows, iter_csv_rows, iter_json_rows
+
+
+class Command(BaseCommand):
+    help = 'export_csv 形式の CSV (または JSON / JSON Lines) から記録をまとめて取り込みます。同じ日付の記録は上書きします。'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='取り込むファイル')
+        parser.add_argument('--format', choices=['csv', 'json'], help='省略時は拡張子から判断 (.json/.jsonl は JSON)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='1回の検証・書き込みで扱う行数')
+        parser.add_argument('--dry-run', action='store_true', help='検証だけを行い、保存しない')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'{path} が見つかりません。')
+        file_format = options['format'] or ('json' if path.suffix in ('.json', '.jsonl') else 'csv')
+
+        with path.open(encoding='utf-8-sig', newline='') as stream:
+            rows = iter_csv_rows(stream) if file_format == 'csv' else iter_json_rows(stream)
+            result = import_rows(rows, batch_size=options['batch_size'], dry_run=options['dry_run'])
+
+        for line, message in result.errors[:50]:
+            self.stderr.write(f'{line}行目: {message}')
+        if len(result.errors) > 50:
+            self.stderr.write(f'...ほか {len(result.errors) - 50} 件のエラー')
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{result.processed} 行を処理し、{result.saved} 件を保存しました (エラー {len(result.errors)} 件)。'
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from records.analysis import rebuild_correlation_stats
+
+
+class Command(BaseCommand):
+    help = '相関分析の十分統計量を全レコードから作り直します。'
+
+    def handle(self, *args, **options):
+        stats = rebuild_correlation_stats()
+        self.stdout.write(self.style.SUCCESS(f'相関統計を再計算しました (n={stats.n}, データバージョン {stats.data_version})。'))
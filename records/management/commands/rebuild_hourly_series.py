@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from records.hourly import store_payloads
+from records.models import WeatherCache
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = '天気キャッシュ (WeatherCache) に残っている Open-Meteo の応答から毎時の気圧・PM2.5 (HourlySeries) を作り直します。'
+
+    def handle(self, *args, **options):
+        stored = 0
+        batches = {}
+        entries = WeatherCache.objects.order_by('pk').values_list('api', 'latitude', 'longitude', 'date', 'payload')
+        for api, lat, lon, day, payload in entries.iterator(chunk_size=BATCH_SIZE):
+            batch = batches.setdefault(api, [])
+            batch.append((lat, lon, day, payload))
+            if len(batch) >= BATCH_SIZE:
+                stored += store_payloads(api, batch)
+                batch.clear()
+        for api, batch in batches.items():
+            stored += store_payloads(api, batch)
+        self.stdout.write(self.style.SUCCESS(f'{stored} 件の毎時の値を保存しました。'))
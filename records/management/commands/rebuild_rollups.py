@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from records.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = '週・月ごとの集計 (PeriodRollup) を全レコードから作り直します。'
+
+    def handle(self, *args, **options):
+        created = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'{created} 件の期間集計を作成しました。'))
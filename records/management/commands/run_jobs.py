@@ -0,0 +1,32 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from records.jobs import purge, work
+
+
+class Command(BaseCommand):
+    help = 'バックグラウンドジョブ (天気の取得、CSV の書き出しなど) を実行するワーカーを起動します。'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help='待機中のジョブがなくなったら終了する')
+        parser.add_argument('--max-jobs', type=int, help='この数のジョブを実行したら終了する')
+        parser.add_argument('--poll-interval', type=float, help='ジョブがないときに待つ秒数')
+        parser.add_argument('--purge', action='store_true', help='古い終了済みジョブを削除して終了する')
+
+    def handle(self, *args, **options):
+        if options['purge']:
+            self.stdout.write(self.style.SUCCESS(f'{purge()} 件のジョブを削除しました。'))
+            return
+
+        # Finish the current job on SIGTERM/Ctrl-C instead of dying mid-way.
+        stop = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
+
+        done = work(
+            burst=options['burst'], max_jobs=options['max_jobs'],
+            poll_interval=options['poll_interval'], stop=stop,
+        )
+        self.stdout.write(self.style.SUCCESS(f'{done} 件のジョブを実行しました。'))
@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from records.synthetic import seed_records
+
+
+class Command(BaseCommand):
+    help = '既存の記録を削除し、合成データ (同じ seed なら同じ内容) を投入します。'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='作成する日数 (例: 1000, 10000, 100000)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--end', help='最終日 (YYYY-MM-DD、省略時は今日)')
+
+    def handle(self, *args, **options):
+        try:
+            end = date.fromisoformat(options['end']) if options['end'] else timezone.localdate()
+        except ValueError:
+            raise CommandError('--end は YYYY-MM-DD 形式で指定してください。')
+        self.stdout.write('Deleting existing data and seeding the database...')
+        saved = seed_records(options['days'], seed=options['seed'], end=end, replace=True)
+        self.stdout.write(self.style.SUCCESS(f'Successfully seeded {saved} days of sample data.'))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = '天気・花粉・PM2.5・気圧の変化から機嫌を予測するモデルを学習し、データバージョン付きで保存します。'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='同じデータバージョンのモデルがあっても学習し直す')
+        parser.add_argument('--keep', type=int, default=settings.MOOD_MODEL_KEEP, help='残す過去のモデルの数')
+
+    def handle(self, *args, **options):
+        from records.mood_training import train_mood_model
+
+        model = train_mood_model(force=options['force'], keep=max(1, options['keep']))
+        if model is None:
+            self.stdout.write(f'記録が {settings.MOOD_MODEL_MIN_RECORDS} 件未満のため学習しませんでした。')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'機嫌予測モデル (データバージョン {model["data_version"]}, {model["samples"]} 日分) を保存しました。'
+        ))
+        for target, scores in (model['holdout'] or {}).items():
+            self.stdout.write(f'  {target}: 直近の検証データでの R² {scores["r2"]}, 平均絶対誤差 {scores["mae"]}')
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("records", "0003_dataversion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WeatherCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("latitude", models.FloatField(verbose_name="緯度")),
+                ("longitude", models.FloatField(verbose_name="経度")),
+                ("date", models.DateField(verbose_name="日付")),
+                ("api", models.CharField(max_length=20, verbose_name="API")),
+                ("payload", models.JSONField(verbose_name="応答")),
+                (
+                    "fetched_at",
+                    models.DateTimeField(auto_now=True, verbose_name="取得日時"),
+                ),
+                (
+                    "expires_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="空の場合は期限なし (過去の日付)",
+                        null=True,
+                        verbose_name="有効期限",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "天気キャッシュ",
+                "verbose_name_plural": "天気キャッシュ",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("latitude", "longitude", "date", "api"),
+                        name="unique_weather_cache_key",
+                    )
+                ],
+            },
+        ),
+    ]
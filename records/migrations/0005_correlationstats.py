@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("records", "0004_weathercache"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CorrelationStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=50, unique=True, verbose_name="名前"),
+                ),
+                ("features", models.JSONField(default=list, verbose_name="特徴量")),
+                ("n", models.PositiveIntegerField(default=0, verbose_name="件数")),
+                ("sums", models.JSONField(default=list, verbose_name="Σx")),
+                ("products", models.JSONField(default=list, verbose_name="Σxy")),
+                (
+                    "correlations",
+                    models.JSONField(default=dict, verbose_name="相関係数"),
+                ),
+                (
+                    "data_version",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="データバージョン"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="更新日時"),
+                ),
+            ],
+            options={
+                "verbose_name": "相関統計",
+                "verbose_name_plural": "相関統計",
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:15
+
+from django.db import migrations, models
+
+
+def create_brin_index(apps, schema_editor):
+    # BRIN suits the append-mostly date column; it only exists on PostgreSQL.
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS record_date_brin "
+            "ON records_dailyrecord USING brin (date)"
+        )
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS record_date_brin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("records", "0005_correlationstats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="dailyrecord",
+            index=models.Index(
+                fields=["my_mood", "headache_medicine", "date"],
+                name="record_my_mood_med_date",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dailyrecord",
+            index=models.Index(
+                fields=["wife_mood", "headache_medicine", "date"],
+                name="record_wife_mood_med_date",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dailyrecord",
+            index=models.Index(fields=["weather", "date"], name="record_weather_date"),
+        ),
+        migrations.AddIndex(
+            model_name="dailyrecord",
+            index=models.Index(
+                condition=models.Q(("mishap", True)),
+                fields=["date"],
+                name="record_mishap_date",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dailyrecord",
+            index=models.Index(
+                condition=models.Q(("headache_medicine", "yes")),
+                fields=["date"],
+                name="record_medicine_taken_date",
+            ),
+        ),
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
@@ -0,0 +1,136 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("records", "0006_dailyrecord_analytics_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PeriodRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("week", "週"), ("month", "月")],
+                        max_length=5,
+                        verbose_name="期間の種類",
+                    ),
+                ),
+                ("period_start", models.DateField(verbose_name="期間の開始日")),
+                (
+                    "days",
+                    models.PositiveIntegerField(default=0, verbose_name="記録日数"),
+                ),
+                (
+                    "my_mood_avg",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="自分の機嫌 (平均)"
+                    ),
+                ),
+                (
+                    "wife_mood_avg",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="妻の機嫌 (平均)"
+                    ),
+                ),
+                (
+                    "my_mood_counts",
+                    models.JSONField(default=dict, verbose_name="自分の機嫌 (分布)"),
+                ),
+                (
+                    "wife_mood_counts",
+                    models.JSONField(default=dict, verbose_name="妻の機嫌 (分布)"),
+                ),
+                (
+                    "temperature_max",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="最高気温 (最大)"
+                    ),
+                ),
+                (
+                    "temperature_min",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="最低気温 (最小)"
+                    ),
+                ),
+                (
+                    "temperature_mean",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="気温 (平均)"
+                    ),
+                ),
+                (
+                    "pressure_max",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="最高気圧 (最大)"
+                    ),
+                ),
+                (
+                    "pressure_min",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="最低気圧 (最小)"
+                    ),
+                ),
+                (
+                    "pressure_mean",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="気圧 (平均)"
+                    ),
+                ),
+                (
+                    "humidity_mean",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="湿度 (平均)"
+                    ),
+                ),
+                (
+                    "pollen_avg",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="花粉 (平均)"
+                    ),
+                ),
+                (
+                    "pm25_avg",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="PM2.5 (平均)"
+                    ),
+                ),
+                (
+                    "medicine_taken_days",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="頭痛薬を飲んだ日数"
+                    ),
+                ),
+                (
+                    "mishap_days",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="失態のあった日数"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "期間集計",
+                "verbose_name_plural": "期間集計",
+                "ordering": ["period", "period_start"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("period", "period_start"), name="unique_period_rollup"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("records", "0009_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Location",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=100, unique=True, verbose_name="名前"),
+                ),
+                ("latitude", models.FloatField(verbose_name="緯度")),
+                ("longitude", models.FloatField(verbose_name="経度")),
+            ],
+            options={
+                "verbose_name": "場所",
+                "verbose_name_plural": "場所",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.AddField(
+            model_name="dailyrecord",
+            name="location",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="空の場合は自宅 (天気の既定の座標)",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                to="records.location",
+                verbose_name="場所",
+            ),
+        ),
+    ]
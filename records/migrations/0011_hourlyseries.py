@@ -0,0 +1,56 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("records", "0010_location"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HourlySeries",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("latitude", models.FloatField(verbose_name="緯度")),
+                ("longitude", models.FloatField(verbose_name="経度")),
+                ("date", models.DateField(verbose_name="日付")),
+                (
+                    "pressure",
+                    models.BinaryField(
+                        blank=True, null=True, verbose_name="気圧 (hPa, 毎時)"
+                    ),
+                ),
+                (
+                    "pm25",
+                    models.BinaryField(
+                        blank=True, null=True, verbose_name="PM2.5 (µg/m³, 毎時)"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="更新日時"),
+                ),
+            ],
+            options={
+                "verbose_name": "毎時の観測値",
+                "verbose_name_plural": "毎時の観測値",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("latitude", "longitude", "date"),
+                        name="unique_hourly_series_key",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:12
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def fill_row_stats(apps, schema_editor):
+    # From here on the DailyRecord signals keep them up to date.
+    DailyRecord = apps.get_model("records", "DailyRecord")
+    DataVersion = apps.get_model("records", "DataVersion")
+    stats = DailyRecord.objects.aggregate(row_count=Count("id"), max_date=Max("date"))
+    DataVersion.objects.update_or_create(table=DailyRecord._meta.db_table, defaults=stats)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("records", "0011_hourlyseries"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataversion",
+            name="max_date",
+            field=models.DateField(blank=True, null=True, verbose_name="最新の日付"),
+        ),
+        migrations.AddField(
+            model_name="dataversion",
+            name="row_count",
+            field=models.PositiveBigIntegerField(
+                blank=True, null=True, verbose_name="行数"
+            ),
+        ),
+        migrations.RunPython(fill_row_stats, migrations.RunPython.noop),
+    ]
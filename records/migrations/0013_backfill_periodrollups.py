@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def rebuild_rollups(apps, schema_editor):
+    # The charts read PeriodRollup as soon as any row exists, so records
+    # saved before 0007 need their weeks and months too.
+    from records.rollups import rebuild_rollups
+
+    rebuild_rollups()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("records", "0012_dataversion_row_stats"),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def install_bigram_index(apps, schema_editor):
+    from records.search import install_bigram_index
+
+    install_bigram_index(schema_editor)
+
+
+def drop_bigram_index(apps, schema_editor):
+    from records.search import drop_bigram_index
+
+    drop_bigram_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("records", "0013_backfill_periodrollups"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_bigram_index, drop_bigram_index),
+    ]
@@ -1,6 +1,22 @@
 from django.db import models
 from django.utils import timezone
 
+class Location(models.Model):
+    """記録した場所 (旅行先や家族の住まい)。天気はこの座標で取得する"""
+
+    name = models.CharField(verbose_name='名前', max_length=100, unique=True)
+    latitude = models.FloatField(verbose_name='緯度')
+    longitude = models.FloatField(verbose_name='経度')
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = '場所'
+        verbose_name_plural = '場所'
+        ordering = ['name']
+
+
 class DailyRecord(models.Model):
     """日々の記録を保存するモデル"""
 
@@ -24,6 +40,9 @@ class DailyRecord(models.Model):
         ('unknown', '不明'),
     ]
 
+    # Fields that can be filled in from Open-Meteo
+    WEATHER_FIELDS = ['weather', 'max_pressure', 'min_pressure', 'max_temperature', 'min_temperature', 'humidity', 'pm25']
+
     date = models.DateField(
         verbose_name='日付',
         default=timezone.now,
@@ -107,11 +126,234 @@ class DailyRecord(models.Model):
         verbose_name='日記',
         blank=True
     )
+    location = models.ForeignKey(
+        Location,
+        verbose_name='場所',
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        help_text='空の場合は自宅 (天気の既定の座標)'
+    )
 
     def __str__(self):
         return f"{self.date}"
 
+    def empty_weather_fields(self):
+        return [field for field in self.WEATHER_FIELDS if getattr(self, field) in (None, '')]
+
     class Meta:
         verbose_name = '日々の記録'
         verbose_name_plural = '日々の記録'
         ordering = ['-date']
+        indexes = [
+            # e.g. "D-mood days with medicine taken", newest first
+            models.Index(fields=['my_mood', 'headache_medicine', 'date'], name='record_my_mood_med_date'),
+            models.Index(fields=['wife_mood', 'headache_medicine', 'date'], name='record_wife_mood_med_date'),
+            models.Index(fields=['weather', 'date'], name='record_weather_date'),
+            # Partial indexes for the rare flags
+            models.Index(fields=['date'], condition=models.Q(mishap=True), name='record_mishap_date'),
+            models.Index(fields=['date'], condition=models.Q(headache_medicine='yes'), name='record_medicine_taken_date'),
+        ]
+
+
+class DataVersion(models.Model):
+    """テーブルごとの変更カウンタ (キャッシュの検証子に使う)"""
+
+    table = models.CharField(verbose_name='テーブル名', max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(verbose_name='バージョン', default=0)
+    updated_at = models.DateTimeField(verbose_name='更新日時', auto_now=True)
+    # Kept for DailyRecord only (records/signals.py), so the chart validator
+    # doesn't have to count the table.
+    row_count = models.PositiveBigIntegerField(verbose_name='行数', null=True, blank=True)
+    max_date = models.DateField(verbose_name='最新の日付', null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.table}: {self.version}"
+
+    @classmethod
+    def bump(cls, table, **stats):
+        """カウンタを1つ進め、新しいバージョンを返す
+
+        stats (row_count, max_date) は同じ UPDATE で書き換える値 (式でもよい)。
+        """
+        updated = cls.objects.filter(table=table).update(
+            version=models.F('version') + 1, updated_at=timezone.now(), **stats
+        )
+        if not updated:
+            # Created at 0 and bumped by the update, which evaluates the stats.
+            cls.objects.get_or_create(table=table)
+            return cls.bump(table, **stats)
+        return cls.objects.values_list('version', flat=True).get(table=table)
+
+    @classmethod
+    def current(cls, table):
+        return cls.objects.filter(table=table).first()
+
+    @classmethod
+    async def acurrent(cls, table):
+        return await cls.objects.filter(table=table).afirst()
+
+    class Meta:
+        verbose_name = 'データバージョン'
+        verbose_name_plural = 'データバージョン'
+
+
+class WeatherCache(models.Model):
+    """Open-Meteo の応答を (緯度, 経度, 日付, API) ごとに保存するキャッシュ"""
+
+    latitude = models.FloatField(verbose_name='緯度')
+    longitude = models.FloatField(verbose_name='経度')
+    date = models.DateField(verbose_name='日付')
+    api = models.CharField(verbose_name='API', max_length=20)
+    payload = models.JSONField(verbose_name='応答')
+    fetched_at = models.DateTimeField(verbose_name='取得日時', auto_now=True)
+    expires_at = models.DateTimeField(
+        verbose_name='有効期限',
+        null=True,
+        blank=True,
+        help_text='空の場合は期限なし (過去の日付)'
+    )
+
+    def __str__(self):
+        return f"{self.api} ({self.latitude}, {self.longitude}) {self.date}"
+
+    class Meta:
+        verbose_name = '天気キャッシュ'
+        verbose_name_plural = '天気キャッシュ'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['latitude', 'longitude', 'date', 'api'],
+                name='unique_weather_cache_key',
+            ),
+        ]
+
+
+class HourlySeries(models.Model):
+    """1日分の毎時の値を (緯度, 経度, 日付) ごとに1行で保存する
+
+    各列は 0〜23時の24個の値を float32 (リトルエンディアン) で詰めたもの。
+    欠測は NaN、まだ取得していない列は NULL。読み書きは records/hourly.py。
+    """
+
+    latitude = models.FloatField(verbose_name='緯度')
+    longitude = models.FloatField(verbose_name='経度')
+    date = models.DateField(verbose_name='日付')
+    pressure = models.BinaryField(verbose_name='気圧 (hPa, 毎時)', null=True, blank=True)
+    pm25 = models.BinaryField(verbose_name='PM2.5 (µg/m³, 毎時)', null=True, blank=True)
+    updated_at = models.DateTimeField(verbose_name='更新日時', auto_now=True)
+
+    def __str__(self):
+        return f"({self.latitude}, {self.longitude}) {self.date}"
+
+    class Meta:
+        verbose_name = '毎時の観測値'
+        verbose_name_plural = '毎時の観測値'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['latitude', 'longitude', 'date'],
+                name='unique_hourly_series_key',
+            ),
+        ]
+
+
+class CorrelationStats(models.Model):
+    """相関分析の十分統計量 (n, Σx, Σxy) と計算済みの相関係数"""
+
+    name = models.CharField(verbose_name='名前', max_length=50, unique=True)
+    features = models.JSONField(verbose_name='特徴量', default=list)
+    n = models.PositiveIntegerField(verbose_name='件数', default=0)
+    sums = models.JSONField(verbose_name='Σx', default=list)
+    products = models.JSONField(verbose_name='Σxy', default=list)
+    correlations = models.JSONField(verbose_name='相関係数', default=dict)
+    data_version = models.PositiveBigIntegerField(verbose_name='データバージョン', default=0)
+    updated_at = models.DateTimeField(verbose_name='更新日時', auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} (n={self.n}, v{self.data_version})"
+
+    class Meta:
+        verbose_name = '相関統計'
+        verbose_name_plural = '相関統計'
+
+
+class PeriodRollup(models.Model):
+    """週・月ごとの集計値 (DailyRecord の保存・削除のたびに該当期間を更新)"""
+
+    PERIOD_CHOICES = [
+        ('week', '週'),
+        ('month', '月'),
+    ]
+
+    period = models.CharField(verbose_name='期間の種類', max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField(verbose_name='期間の開始日')
+    days = models.PositiveIntegerField(verbose_name='記録日数', default=0)
+    my_mood_avg = models.FloatField(verbose_name='自分の機嫌 (平均)', null=True, blank=True)
+    wife_mood_avg = models.FloatField(verbose_name='妻の機嫌 (平均)', null=True, blank=True)
+    my_mood_counts = models.JSONField(verbose_name='自分の機嫌 (分布)', default=dict)
+    wife_mood_counts = models.JSONField(verbose_name='妻の機嫌 (分布)', default=dict)
+    temperature_max = models.FloatField(verbose_name='最高気温 (最大)', null=True, blank=True)
+    temperature_min = models.FloatField(verbose_name='最低気温 (最小)', null=True, blank=True)
+    temperature_mean = models.FloatField(verbose_name='気温 (平均)', null=True, blank=True)
+    pressure_max = models.FloatField(verbose_name='最高気圧 (最大)', null=True, blank=True)
+    pressure_min = models.FloatField(verbose_name='最低気圧 (最小)', null=True, blank=True)
+    pressure_mean = models.FloatField(verbose_name='気圧 (平均)', null=True, blank=True)
+    humidity_mean = models.FloatField(verbose_name='湿度 (平均)', null=True, blank=True)
+    pollen_avg = models.FloatField(verbose_name='花粉 (平均)', null=True, blank=True)
+    pm25_avg = models.FloatField(verbose_name='PM2.5 (平均)', null=True, blank=True)
+    medicine_taken_days = models.PositiveIntegerField(verbose_name='頭痛薬を飲んだ日数', default=0)
+    mishap_days = models.PositiveIntegerField(verbose_name='失態のあった日数', default=0)
+
+    def __str__(self):
+        return f"{self.get_period_display()} {self.period_start}"
+
+    class Meta:
+        verbose_name = '期間集計'
+        verbose_name_plural = '期間集計'
+        ordering = ['period', 'period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'period_start'], name='unique_period_rollup'),
+        ]
+
+
+class Job(models.Model):
+    """バックグラウンドで実行する処理 (records/jobs.py のキュー)"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (QUEUED, '待機中'),
+        (RUNNING, '実行中'),
+        (SUCCEEDED, '完了'),
+        (FAILED, '失敗'),
+    ]
+
+    task = models.CharField(verbose_name='タスク', max_length=100)
+    args = models.JSONField(verbose_name='引数', default=dict, blank=True)
+    status = models.CharField(verbose_name='状態', max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(verbose_name='試行回数', default=0)
+    max_attempts = models.PositiveIntegerField(verbose_name='最大試行回数', default=3)
+    run_at = models.DateTimeField(verbose_name='実行予定日時', default=timezone.now)
+    locked_at = models.DateTimeField(verbose_name='実行開始日時', null=True, blank=True)
+    worker = models.CharField(verbose_name='ワーカー', max_length=100, blank=True)
+    result = models.JSONField(verbose_name='結果', null=True, blank=True)
+    last_error = models.TextField(verbose_name='最後のエラー', blank=True)
+    created_at = models.DateTimeField(verbose_name='作成日時', auto_now_add=True)
+    finished_at = models.DateTimeField(verbose_name='終了日時', null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+    @property
+    def finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    class Meta:
+        verbose_name = 'ジョブ'
+        verbose_name_plural = 'ジョブ'
+        indexes = [
+            # The worker's "next due job" lookup
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at'),
+        ]
@@ -0,0 +1,145 @@
+"""天気予報から機嫌を予測するモデルの読み込み・推論・再学習の起動
+
+学習 (scikit-learn) は mood_training にあり、ここでは import しない。
+学習済みモデルは MOOD_MODEL_DIR に mood_model_v<データバージョン>.joblib
+として保存され、ワーカーごとに一度だけ読み込んで使い回す。
+"""
+import math
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .analysis import BASE_COLS, RATING_MAPPING, RATING_COLS, WEATHER_COLS, WEATHER_VALUES
+
+# Same column names and encoding as lag_analysis.LAG_FEATURES
+MOOD_MODEL_FEATURES = BASE_COLS + RATING_COLS + WEATHER_COLS + ['pressure_range', 'pressure_change']
+MOOD_MODEL_TARGETS = ['my_mood_num', 'wife_mood_num']
+
+# Fields a forecast (get_weather_data) or the entry form can supply
+FORECAST_FIELDS = BASE_COLS + ['pollen', 'pm25', 'weather']
+
+ARTIFACT_PATTERN = re.compile(r'^mood_model_v(\d+)\.joblib$')
+
+_model = None
+_model_version = None
+_checked_at = None
+_model_lock = threading.Lock()
+
+_training_lock = threading.Lock()
+_last_attempt_version = 0
+
+
+def artifact_path(version):
+    return settings.MOOD_MODEL_DIR / f'mood_model_v{version}.joblib'
+
+
+def artifacts():
+    """保存済みのモデルを (データバージョン, パス) の古い順で返す"""
+    directory = settings.MOOD_MODEL_DIR
+    if not directory.is_dir():
+        return []
+    found = []
+    for path in directory.iterdir():
+        match = ARTIFACT_PATTERN.match(path.name)
+        if match:
+            found.append((int(match.group(1)), path))
+    return sorted(found)
+
+
+def latest_artifact():
+    found = artifacts()
+    return found[-1] if found else None
+
+
+def get_model():
+    """最新のモデルを返す (なければ None)
+
+    読み込みはワーカーごとに一度だけ。新しいモデルができていないかは
+    MOOD_MODEL_RELOAD_INTERVAL 秒ごとにしか確かめない。
+    """
+    global _model, _model_version, _checked_at
+    now = time.monotonic()
+    if _checked_at is not None and now - _checked_at < settings.MOOD_MODEL_RELOAD_INTERVAL:
+        return _model
+    with _model_lock:
+        if _checked_at is None or now - _checked_at >= settings.MOOD_MODEL_RELOAD_INTERVAL:
+            latest = latest_artifact()
+            if latest is not None and latest[0] != _model_version:
+                import joblib
+
+                _model = joblib.load(latest[1])
+                _model_version = latest[0]
+            _checked_at = now
+    return _model
+
+
+def _number(value):
+    if value is None or value == '':
+        return math.nan
+    return float(value)
+
+
+def feature_row(values, previous=None):
+    """1日分の値 (と前日の気圧) を MOOD_MODEL_FEATURES の順の数値にする。欠損は NaN"""
+    row = [_number(values.get(col)) for col in BASE_COLS]
+    row += [RATING_MAPPING.get(values.get(field), math.nan) for field in ('pollen', 'pm25')]
+    row += [float(values.get('weather') == value) for value in WEATHER_VALUES]
+    max_pressure, min_pressure = _number(values.get('max_pressure')), _number(values.get('min_pressure'))
+    row.append(max_pressure - min_pressure)
+    previous = previous or {}
+    previous_mean = (_number(previous.get('max_pressure')) + _number(previous.get('min_pressure'))) / 2
+    row.append((max_pressure + min_pressure) / 2 - previous_mean)
+    return row
+
+
+def _rating(score):
+    # Inverse of RATING_MAPPING, rounding to the nearest grade
+    grade = max(1, min(5, round(score)))
+    return next(key for key, value in RATING_MAPPING.items() if value == grade)
+
+
+def predict_moods(values, previous=None):
+    """予測した機嫌を返す。モデルがまだなければ None"""
+    model = get_model()
+    if model is None:
+        return None
+    import numpy as np
+
+    scores = model['pipeline'].predict(np.array([feature_row(values, previous)]))[0]
+    result = {'model_version': model['data_version'], 'trained_at': model['trained_at']}
+    for target, score in zip(model['targets'], scores):
+        field = target.removesuffix('_num')
+        score = max(1.0, min(5.0, float(score)))
+        result[field] = _rating(score)
+        result[f'{field}_score'] = round(score, 2)
+    return result
+
+
+def _train():
+    try:
+        from .mood_training import train_mood_model
+
+        train_mood_model()
+    finally:
+        # This thread's connection would otherwise stay open until the worker exits.
+        connection.close()
+        _training_lock.release()
+
+
+def maybe_retrain(data_version):
+    """前回の学習から MOOD_MODEL_RETRAIN_AFTER 回以上変更があれば別スレッドで学習し直す"""
+    global _last_attempt_version
+    if not settings.MOOD_MODEL_BACKGROUND_RETRAIN:
+        return False
+    latest = latest_artifact()
+    trained = max(latest[0] if latest else 0, _last_attempt_version)
+    if data_version - trained < settings.MOOD_MODEL_RETRAIN_AFTER:
+        return False
+    if not _training_lock.acquire(blocking=False):
+        return False
+    _last_attempt_version = data_version
+    threading.Thread(target=_train, name='mood-model-training').start()
+    return True
@@ -0,0 +1,89 @@
+"""機嫌予測モデルの学習 (scikit-learn)"""
+import os
+
+import joblib
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from .lag_analysis import LAG_FEATURES, load_daily_matrix
+from .models import DailyRecord, DataVersion
+from .mood_model import MOOD_MODEL_FEATURES, MOOD_MODEL_TARGETS, artifact_path, artifacts
+
+# The most recent share of days is held out to report how well the model does
+HOLDOUT_FRACTION = 0.2
+MIN_HOLDOUT_SAMPLES = 5
+
+
+def training_data(start=None, end=None):
+    """学習用の (X, Y)。機嫌のない日 (記録のない日) は除く"""
+    _, matrix = load_daily_matrix(start, end)
+    X = matrix[:, [LAG_FEATURES.index(feature) for feature in MOOD_MODEL_FEATURES]]
+    Y = matrix[:, [LAG_FEATURES.index(target) for target in MOOD_MODEL_TARGETS]]
+    keep = ~np.isnan(Y).any(axis=1)
+    return X[keep], Y[keep]
+
+
+def _pipeline():
+    # Forecasts have no pollen and may miss other fields: impute with the mean.
+    return make_pipeline(
+        SimpleImputer(strategy='mean', keep_empty_features=True),
+        StandardScaler(),
+        Ridge(alpha=1.0),
+    )
+
+
+def _holdout_scores(X, Y):
+    split = int(len(X) * (1 - HOLDOUT_FRACTION))
+    if len(X) - split < MIN_HOLDOUT_SAMPLES:
+        return None
+    predicted = _pipeline().fit(X[:split], Y[:split]).predict(X[split:])
+    return {
+        target: {
+            'r2': round(float(r2_score(Y[split:, i], predicted[:, i])), 3),
+            'mae': round(float(mean_absolute_error(Y[split:, i], predicted[:, i])), 3),
+        }
+        for i, target in enumerate(MOOD_MODEL_TARGETS)
+    }
+
+
+def train_mood_model(force=False, keep=None):
+    """現在のデータで学習して保存し、保存したモデル (dict) を返す
+
+    記録が MOOD_MODEL_MIN_RECORDS 件に満たなければ None。同じデータバージョンの
+    モデルがすでにあれば force でない限り学習しない。
+    """
+    version = DataVersion.current(DailyRecord._meta.db_table)
+    data_version = version.version if version else 0
+    path = artifact_path(data_version)
+    if path.exists() and not force:
+        return joblib.load(path)
+
+    X, Y = training_data()
+    if len(X) < settings.MOOD_MODEL_MIN_RECORDS:
+        return None
+    model = {
+        'pipeline': _pipeline().fit(X, Y),
+        'features': MOOD_MODEL_FEATURES,
+        'targets': MOOD_MODEL_TARGETS,
+        'data_version': data_version,
+        'samples': len(X),
+        'holdout': _holdout_scores(X, Y),
+        'trained_at': timezone.now().isoformat(),
+    }
+
+    settings.MOOD_MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so a worker never loads a half-written file.
+    temporary = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    joblib.dump(model, temporary)
+    os.replace(temporary, path)
+
+    keep = settings.MOOD_MODEL_KEEP if keep is None else keep
+    for _, old in artifacts()[:-keep]:
+        old.unlink(missing_ok=True)
+    return model
@@ -0,0 +1,65 @@
+"""ベンチマーク用の Open-Meteo スタブサーバー"""
+import json
+import math
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class OpenMeteoStub(BaseHTTPRequestHandler):
+    """Open-Meteo の forecast / air-quality を真似る最小限のサーバー
+
+    緯度・経度がカンマ区切りで複数あれば、本物と同じく場所ごとの結果の
+    リストを返す。受けたリクエストの数は server.request_count。
+    """
+
+    latency = 0.0
+
+    def do_GET(self):
+        self.server.request_count += 1
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        locations = len(params['latitude'].split(','))
+        start = date.fromisoformat(params['start_date'])
+        end = date.fromisoformat(params['end_date'])
+        days = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+        hours = [f'{day}T{hour:02d}:00' for day in days for hour in range(24)]
+        if 'air' in url.path:
+            payload = {'hourly': {'time': hours, 'pm2_5': [12.5] * len(hours)}}
+        else:
+            payload = {'daily': {
+                'time': days,
+                'weather_code': [3] * len(days),
+                'temperature_2m_max': [21.0] * len(days),
+                'temperature_2m_min': [12.0] * len(days),
+                'pressure_msl_max': [1016.0] * len(days),
+                'pressure_msl_min': [1008.0] * len(days),
+                'relative_humidity_2m_mean': [60] * len(days),
+            }}
+            if 'hourly' in params:
+                # A slow swing of a few hPa, so the pressure drop features vary
+                payload['hourly'] = {
+                    'time': hours,
+                    'pressure_msl': [round(1012 + 6 * math.sin(i / 7), 1) for i in range(len(hours))],
+                }
+        time.sleep(self.latency)
+        body = json.dumps(payload if locations == 1 else [payload] * locations).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(latency=0.0, port=0):
+    """別スレッドでスタブを起動し、(サーバー, ベース URL) を返す。止めるときは server.shutdown()"""
+    handler = type('OpenMeteoStub', (OpenMeteoStub,), {'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
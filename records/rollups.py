@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, FloatField, Max, Min, Q
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .charts import RATING_MAPPING, rating_value
+from .models import DailyRecord, PeriodRollup
+
+TRUNCS = {'week': TruncWeek, 'month': TruncMonth}
+
+
+def period_bounds(period, day):
+    """day を含む期間の [開始日, 次の期間の開始日)"""
+    if period == 'week':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    start = day.replace(day=1)
+    if start.month == 12:
+        return start, start.replace(year=start.year + 1, month=1)
+    return start, start.replace(month=start.month + 1)
+
+
+def _aggregates():
+    aggregates = {
+        'days': Count('id'),
+        'my_mood_avg': Avg(rating_value('my_mood'), output_field=FloatField()),
+        'wife_mood_avg': Avg(rating_value('wife_mood'), output_field=FloatField()),
+        'temperature_max': Max('max_temperature'),
+        'temperature_min': Min('min_temperature'),
+        'temperature_mean': Avg((F('max_temperature') + F('min_temperature')) / 2.0, output_field=FloatField()),
+        'pressure_max': Max('max_pressure'),
+        'pressure_min': Min('min_pressure'),
+        'pressure_mean': Avg((F('max_pressure') + F('min_pressure')) / 2.0, output_field=FloatField()),
+        'humidity_mean': Avg('humidity', output_field=FloatField()),
+        'pollen_avg': Avg(rating_value('pollen'), output_field=FloatField()),
+        'pm25_avg': Avg(rating_value('pm25'), output_field=FloatField()),
+        'medicine_taken_days': Count('id', filter=Q(headache_medicine='yes')),
+        'mishap_days': Count('id', filter=Q(mishap=True)),
+    }
+    for field in ('my_mood', 'wife_mood'):
+        for rating in RATING_MAPPING:
+            aggregates[f'{field}_{rating}'] = Count('id', filter=Q(**{field: rating}))
+    return aggregates
+
+
+def compute_rollups(period, queryset):
+    """queryset を期間ごとに DB で集計し、未保存の PeriodRollup のリストを返す"""
+    rows = (
+        queryset.annotate(period_start=TRUNCS[period]('date'))
+        .values('period_start')
+        .annotate(**_aggregates())
+        .order_by('period_start')
+    )
+    rollups = []
+    for row in rows:
+        counts = {
+            field: {rating: row.pop(f'{field}_{rating}') for rating in RATING_MAPPING}
+            for field in ('my_mood', 'wife_mood')
+        }
+        rollups.append(PeriodRollup(
+            period=period,
+            my_mood_counts=counts['my_mood'],
+            wife_mood_counts=counts['wife_mood'],
+            **row,
+        ))
+    return rollups
+
+
+def refresh_periods(periods):
+    """(期間の種類, 開始日) ごとに生データ (最大31日分) から集計し直す"""
+    with transaction.atomic():
+        for period, start in set(periods):
+            _, end = period_bounds(period, start)
+            PeriodRollup.objects.filter(period=period, period_start=start).delete()
+            PeriodRollup.objects.bulk_create(
+                compute_rollups(period, DailyRecord.objects.filter(date__gte=start, date__lt=end))
+            )
+
+
+def refresh_for_dates(dates):
+    """指定した日付を含む週・月の集計を更新する"""
+    periods = []
+    for day in dates:
+        if day is None:
+            continue
+        for period in TRUNCS:
+            periods.append((period, period_bounds(period, day)[0]))
+    refresh_periods(periods)
+
+
+def rebuild_rollups():
+    """全期間の集計を作り直し、作成した件数を返す"""
+    with transaction.atomic():
+        PeriodRollup.objects.all().delete()
+        created = 0
+        for period in TRUNCS:
+            created += len(PeriodRollup.objects.bulk_create(compute_rollups(period, DailyRecord.objects.all())))
+    return created
+
+
+def mood_counts(field):
+    """my_mood / wife_mood の評価ごとの日数。記録を数えず、月ごとの集計を足し合わせる"""
+    counts = dict.fromkeys(RATING_MAPPING, 0)
+    for month in PeriodRollup.objects.filter(period='month').values_list(f'{field}_counts', flat=True):
+        for rating, days in month.items():
+            counts[rating] = counts.get(rating, 0) + days
+    return counts
@@ -0,0 +1,311 @@
+"""日記の全文検索
+
+SQLite では trigram トークナイザの FTS5 テーブル、PostgreSQL では pg_trgm の
+GIN インデックスを使う。日本語は単語の区切りがないので、どちらも3文字単位の
+部分一致で引く。「頭痛」のような3文字未満の語は、日記を2文字ずつに区切った
+索引 (SQLite は FTS5、PostgreSQL は1〜2文字の配列の GIN インデックス) で引く。
+"""
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import DailyRecord
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_TERMS = 8
+SNIPPET_CONTEXT = 40
+
+# The trigram indexes can only answer terms at least this long; queries
+# with a shorter term use the bigram indexes.
+TRIGRAM_LENGTH = 3
+
+# Queries matching more diaries than this are listed newest first instead of
+# by relevance, which would mean scoring every match.
+RANKED_MATCH_LIMIT = 2000
+
+TABLE = DailyRecord._meta.db_table
+FTS_TABLE = 'records_diary_fts'
+FTS_TRIGGERS = {
+    'records_diary_fts_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS records_diary_fts_insert AFTER INSERT ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, diary) VALUES (new.id, new.diary);
+        END""",
+    'records_diary_fts_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS records_diary_fts_delete AFTER DELETE ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, diary) VALUES ('delete', old.id, old.diary);
+        END""",
+    'records_diary_fts_update': f"""
+        CREATE TRIGGER IF NOT EXISTS records_diary_fts_update AFTER UPDATE OF id, diary ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, diary) VALUES ('delete', old.id, old.diary);
+            INSERT INTO {FTS_TABLE}(rowid, diary) VALUES (new.id, new.diary);
+        END""",
+}
+TRGM_INDEX = 'record_diary_trgm'
+
+# Contentless FTS5 table over records_diary_bigrams(diary). Everything but
+# whitespace and control characters is a token character, so punctuation in
+# a term matches as it does with LIKE; prefix='1' answers one-letter terms.
+BIGRAM_FTS_TABLE = 'records_diary_bigram_fts'
+BIGRAM_FUNCTION = 'records_diary_bigrams'
+BIGRAM_TRIGGERS = {
+    'records_diary_bigram_fts_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS records_diary_bigram_fts_insert AFTER INSERT ON {TABLE} BEGIN
+            INSERT INTO {BIGRAM_FTS_TABLE}(rowid, diary) VALUES (new.id, {BIGRAM_FUNCTION}(new.diary));
+        END""",
+    'records_diary_bigram_fts_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS records_diary_bigram_fts_delete AFTER DELETE ON {TABLE} BEGIN
+            INSERT INTO {BIGRAM_FTS_TABLE}({BIGRAM_FTS_TABLE}, rowid, diary)
+            VALUES ('delete', old.id, {BIGRAM_FUNCTION}(old.diary));
+        END""",
+    'records_diary_bigram_fts_update': f"""
+        CREATE TRIGGER IF NOT EXISTS records_diary_bigram_fts_update AFTER UPDATE OF id, diary ON {TABLE} BEGIN
+            INSERT INTO {BIGRAM_FTS_TABLE}({BIGRAM_FTS_TABLE}, rowid, diary)
+            VALUES ('delete', old.id, {BIGRAM_FUNCTION}(old.diary));
+            INSERT INTO {BIGRAM_FTS_TABLE}(rowid, diary) VALUES (new.id, {BIGRAM_FUNCTION}(new.diary));
+        END""",
+}
+# PostgreSQL: every 1- and 2-letter substring, lower-cased, as a text[]
+PG_BIGRAM_FUNCTION = f"""
+    CREATE OR REPLACE FUNCTION {BIGRAM_FUNCTION}(text) RETURNS text[]
+    LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE AS $$
+        SELECT coalesce(array_agg(DISTINCT lower(substr($1, i, n))), '{{}}')
+        FROM generate_series(1, char_length($1)) AS i, (VALUES (1), (2)) AS sizes(n)
+    $$"""
+BIGRAM_INDEX = 'record_diary_bigram'
+
+
+def diary_bigrams(text):
+    """日記を空白で区切り、各文字から2文字ずつ (末尾は1文字) の語を空白区切りで返す
+
+    「頭痛がする」は「頭痛 痛が がす する る」になる。2文字の語は同じ語と、
+    1文字の語は前方一致で、3文字以上の語は連続する2文字の語の並び (フレーズ)
+    と一致する。
+    """
+    if not text:
+        return ''
+    return ' '.join(run[i:i + 2] for run in text.split() for i in range(len(run)))
+
+
+def register_functions(sender=None, connection=None, **kwargs):
+    """SQLite の接続に records_diary_bigrams を登録する (トリガーが使う)"""
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function(BIGRAM_FUNCTION, 1, diary_bigrams, deterministic=True)
+
+
+
+def install_index(schema_editor):
+    """検索用のインデックスを作る (マイグレーションから呼ぶ)"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        # External-content table: the text lives only in records_dailyrecord.
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"diary, content='{TABLE}', content_rowid='id', tokenize='trigram')"
+        )
+        for sql in FTS_TRIGGERS.values():
+            schema_editor.execute(sql)
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    elif vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {TRGM_INDEX} ON {TABLE} USING gin (diary gin_trgm_ops)'
+        )
+
+
+def drop_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for name in FTS_TRIGGERS:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {TRGM_INDEX}')
+
+
+def _fill_bigram_table(cursor):
+    # A contentless table has no 'rebuild': empty it and index every diary again.
+    cursor.execute(f"INSERT INTO {BIGRAM_FTS_TABLE}({BIGRAM_FTS_TABLE}) VALUES ('delete-all')")
+    cursor.execute(
+        f'INSERT INTO {BIGRAM_FTS_TABLE}(rowid, diary) '
+        f'SELECT id, {BIGRAM_FUNCTION}(diary) FROM {TABLE}'
+    )
+
+
+def install_bigram_index(schema_editor):
+    """3文字未満の語のためのインデックスを作る (マイグレーションから呼ぶ)"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        # The connection may predate the connection_created handler.
+        register_functions(connection=schema_editor.connection)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {BIGRAM_FTS_TABLE} USING fts5("
+            f"diary, content='', prefix='1', tokenize=\"unicode61 categories 'L* M* N* P* S* Co'\")"
+        )
+        for sql in BIGRAM_TRIGGERS.values():
+            schema_editor.execute(sql)
+        with schema_editor.connection.cursor() as cursor:
+            _fill_bigram_table(cursor)
+    elif vendor == 'postgresql':
+        schema_editor.execute(PG_BIGRAM_FUNCTION)
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {BIGRAM_INDEX} ON {TABLE} USING gin ({BIGRAM_FUNCTION}(diary))'
+        )
+
+
+def drop_bigram_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for name in BIGRAM_TRIGGERS:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {BIGRAM_FTS_TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {BIGRAM_INDEX}')
+        schema_editor.execute(f'DROP FUNCTION IF EXISTS {BIGRAM_FUNCTION}(text)')
+
+
+def ensure_index(using='default', **kwargs):
+    """SQLite のトリガーが消えていれば作り直して索引を再構築する (post_migrate)
+
+    SQLite の ALTER TABLE 相当の操作はテーブルを作り直すため、後のマイグレーションで
+    records_dailyrecord が作り直されるとトリガーも一緒に消えてしまう。
+    """
+    from django.db import connections
+
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE 'records_diary_%'")
+        existing = {name for (name,) in cursor.fetchall()}
+        if FTS_TABLE in existing and not existing >= set(FTS_TRIGGERS):
+            for sql in FTS_TRIGGERS.values():
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        if BIGRAM_FTS_TABLE in existing and not existing >= set(BIGRAM_TRIGGERS):
+            for sql in BIGRAM_TRIGGERS.values():
+                cursor.execute(sql)
+            _fill_bigram_table(cursor)
+
+
+def search_terms(query):
+    """空白区切りの検索語 (重複を除き最大 SEARCH_MAX_TERMS 個)"""
+    terms = []
+    for term in (query or '').split():
+        if term not in terms:
+            terms.append(term)
+    return terms[:SEARCH_MAX_TERMS]
+
+
+def _like_pattern(term):
+    return '%' + re.sub(r'([\\%_])', r'\\\1', term) + '%'
+
+
+def _fts_query(terms):
+    # Each term is a quoted FTS5 string, so operators in user input are literal.
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _bigram_query(terms):
+    # One-letter terms match bigrams as a prefix; longer ones the phrase of their bigrams.
+    phrases = []
+    for term in terms:
+        if len(term) == 1:
+            phrases.append('"' + term.replace('"', '""') + '"*')
+        else:
+            bigrams = ' '.join(term[i:i + 2] for i in range(len(term) - 1))
+            phrases.append('"' + bigrams.replace('"', '""') + '"')
+    return ' '.join(phrases)
+
+
+def _search_sqlite(terms, limit, offset):
+    if all(len(term) >= TRIGRAM_LENGTH for term in terms):
+        table, match = FTS_TABLE, _fts_query(terms)
+    else:
+        # A term the trigram index can't answer: the whole query uses the bigram index.
+        table, match = BIGRAM_FTS_TABLE, _bigram_query(terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT count(*) FROM (SELECT 1 FROM {table} WHERE {table} MATCH %s LIMIT %s)',
+            [match, RANKED_MATCH_LIMIT + 1],
+        )
+        # bm25 has to score every match before the LIMIT applies (FTS5
+        # "rank" is ascending: best first); past the limit, newest first.
+        order = 'f.rank, d.date DESC' if cursor.fetchone()[0] <= RANKED_MATCH_LIMIT else 'd.date DESC'
+        cursor.execute(
+            f'SELECT d.id, d.date, d.diary FROM {table} f '
+            f'JOIN {TABLE} d ON d.id = f.rowid '
+            f'WHERE {table} MATCH %s '
+            f'ORDER BY {order} LIMIT %s OFFSET %s',
+            [match, limit, offset],
+        )
+        return cursor.fetchall()
+
+
+def _search_postgresql(terms, limit, offset):
+    # ILIKE uses the trigram index for terms of 3+ letters. A shorter term
+    # must also be in the diary's 1-2 letter array, which its GIN index answers.
+    conditions, params = [], []
+    for term in terms:
+        conditions.append("diary ILIKE %s ESCAPE '\\'")
+        params.append(_like_pattern(term))
+        if len(term) < TRIGRAM_LENGTH:
+            conditions.append(f'{BIGRAM_FUNCTION}(diary) @> ARRAY[lower(%s::text)]')
+            params.append(term)
+    sql = (
+        f'SELECT id, date, diary FROM {TABLE} WHERE {" AND ".join(conditions)} '
+        f'ORDER BY word_similarity(%s, diary) DESC, date DESC LIMIT %s OFFSET %s'
+    )
+    params += [' '.join(terms), limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _search_fallback(terms, limit, offset):
+    queryset = DailyRecord.objects.all()
+    for term in terms:
+        queryset = queryset.filter(diary__icontains=term)
+    return list(queryset.order_by('-date').values_list('id', 'date', 'diary')[offset:offset + limit])
+
+
+def highlight(text, terms, context=SNIPPET_CONTEXT):
+    """最初に一致した箇所の前後を切り出し、検索語を <mark> で囲んだ HTML を返す"""
+    pattern = re.compile('|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    first = pattern.search(text)
+    start = max(0, first.start() - context) if first else 0
+    end = min(len(text), (first.end() if first else 0) + context * 2)
+    excerpt = text[start:end]
+
+    parts, position = [], 0
+    for match in pattern.finditer(excerpt):
+        parts.append(escape(excerpt[position:match.start()]))
+        parts.append(f'<mark>{escape(match.group())}</mark>')
+        position = match.end()
+    parts.append(escape(excerpt[position:]))
+    prefix = '…' if start > 0 else ''
+    suffix = '…' if end < len(text) else ''
+    return mark_safe(prefix + ''.join(parts) + suffix)
+
+
+def search_diary(query, page=1, page_size=SEARCH_PAGE_SIZE):
+    """日記を検索し、(結果のリスト, 次のページがあるか) を返す
+
+    結果は関連度順 (SQLite は bm25、PostgreSQL は word_similarity)。SQLite で
+    一致が RANKED_MATCH_LIMIT 件を超える場合は新しい順。
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], False
+    offset = (page - 1) * page_size
+    search = {
+        'sqlite': _search_sqlite,
+        'postgresql': _search_postgresql,
+    }.get(connection.vendor, _search_fallback)
+    rows = search(terms, page_size + 1, offset)
+    results = [
+        {'id': pk, 'date': date, 'snippet': highlight(diary or '', terms)}
+        for pk, date, diary in rows[:page_size]
+    ]
+    return results, len(rows) > page_size
@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models import F, Func, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .analysis import ANALYSIS_FIELDS, apply_record_change, instance_values
+from .models import DailyRecord, DataVersion
+from .mood_model import maybe_retrain
+from .rollups import refresh_for_dates
+
+DAILY_RECORD_TABLE = DailyRecord._meta.db_table
+# Counts the versions that only added a record, so the in-memory snapshot
+# (records/snapshot.py) can append the new rows instead of reloading.
+DAILY_RECORD_APPENDS = f'{DAILY_RECORD_TABLE}:appends'
+
+_ROW_COUNT = DailyRecord.objects.order_by().annotate(n=Func(F('pk'), function='COUNT')).values('n')
+_LATEST_DATE = DailyRecord.objects.order_by('-date').values('date')[:1]
+
+
+def bump_daily_records(added=None):
+    """DailyRecord のバージョンを進め、行数と最新の日付も同じ UPDATE で更新する
+
+    added は増えた (減った) 行数。None のときや行数がまだないときは数え直す。
+    最新の日付は date のインデックスの末尾から読む。
+    """
+    row_count = Subquery(_ROW_COUNT)
+    if added is not None:
+        row_count = Coalesce(F('row_count') + added, row_count)
+    return DataVersion.bump(DAILY_RECORD_TABLE, row_count=row_count, max_date=Subquery(_LATEST_DATE))
+
+
+@receiver(pre_save, sender=DailyRecord)
+def remember_previous_values(sender, instance, **kwargs):
+    # Needed to take the old row out of the running correlation statistics
+    # and to refresh the rollup of the old date if the date was changed.
+    instance._previous_values = None
+    if instance.pk:
+        instance._previous_values = DailyRecord.objects.filter(pk=instance.pk).values('date', *ANALYSIS_FIELDS).first()
+
+
+@receiver(post_save, sender=DailyRecord)
+def daily_record_saved(sender, instance, created, **kwargs):
+    version = bump_daily_records(1 if created else 0)
+    if created:
+        DataVersion.bump(DAILY_RECORD_APPENDS)
+    previous = getattr(instance, '_previous_values', None)
+    apply_record_change(previous, instance_values(instance), version)
+    refresh_for_dates({instance.date, previous['date'] if previous else None})
+    transaction.on_commit(lambda: maybe_retrain(version))
+
+
+@receiver(post_delete, sender=DailyRecord)
+def daily_record_deleted(sender, instance, **kwargs):
+    version = bump_daily_records(-1)
+    apply_record_change(instance_values(instance), None, version)
+    refresh_for_dates([instance.date])
+    transaction.on_commit(lambda: maybe_retrain(version))
@@ -0,0 +1,199 @@
+"""DailyRecord 全件をプロセスごとに列ごとの NumPy 配列で持つスナップショット
+
+グラフ・分析・エクスポートは、リクエストのたびに全件をモデルや dict に
+するのではなく、このスナップショットの配列を期間で切り出して使う。
+評価 (S〜D) は 5〜1 の小さな整数 (空は 0)、天気などの選択肢は選択肢の
+番号、日付は datetime64[D] で、日付順に並ぶ。
+
+データバージョンが変わったら次に使うときに作り直す。前回からの変更が
+新しい日の記録の追加 (create) だけなら、その行だけを読んで末尾に足す。
+"""
+import threading
+
+import numpy as np
+
+from .analysis import RATING_MAPPING
+from .models import DailyRecord, DataVersion
+from .signals import DAILY_RECORD_APPENDS, DAILY_RECORD_TABLE
+
+FIELDS = [field.name for field in DailyRecord._meta.fields]
+
+FLOAT_FIELDS = ['max_pressure', 'min_pressure', 'max_temperature', 'min_temperature']
+INTEGER_FIELDS = ['humidity']
+RATING_FIELDS = ['pollen', 'pm25', 'my_mood', 'wife_mood']
+# Code -> stored value; 0 is the blank value (and anything not in the choices)
+CHOICE_FIELDS = {
+    'weather': [''] + [value for value, _ in DailyRecord.WEATHER_CHOICES],
+    'headache_medicine': [''] + [value for value, _ in DailyRecord.MEDICINE_CHOICES],
+}
+RATING_VALUES = np.array([''] + sorted(RATING_MAPPING, key=RATING_MAPPING.get), dtype=object)
+
+DTYPES = {
+    'id': np.int64,
+    'date': 'datetime64[D]',
+    **{field: np.float64 for field in FLOAT_FIELDS + INTEGER_FIELDS},
+    **{field: np.int8 for field in RATING_FIELDS + list(CHOICE_FIELDS)},
+    'mishap': np.bool_,
+    'diary': object,
+    # 0 for records without a location
+    'location': np.int64,
+}
+
+# Smallest capacity allocated when rows are appended
+MIN_CAPACITY = 256
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def _encode(rows):
+    """values_list(*FIELDS) の行を列ごとの配列にする"""
+    columns = dict(zip(FIELDS, zip(*rows))) if rows else {field: () for field in FIELDS}
+    encoded = {}
+    for field in FIELDS:
+        values = columns[field]
+        if field in FLOAT_FIELDS or field in INTEGER_FIELDS:
+            values = [np.nan if value is None else value for value in values]
+        elif field in RATING_FIELDS:
+            values = [RATING_MAPPING.get(value, 0) for value in values]
+        elif field in CHOICE_FIELDS:
+            codes = {value: code for code, value in enumerate(CHOICE_FIELDS[field])}
+            values = [codes.get(value, 0) for value in values]
+        elif field == 'location':
+            values = [value or 0 for value in values]
+        encoded[field] = np.array(values, dtype=DTYPES[field])
+    return encoded
+
+
+def to_values(field, values):
+    """列の配列を ORM の values_list と同じ Python の値のリストに戻す"""
+    if field in FLOAT_FIELDS:
+        return [None if value != value else value for value in values.tolist()]
+    if field in INTEGER_FIELDS:
+        return [None if value != value else int(value) for value in values.tolist()]
+    if field in RATING_FIELDS:
+        return RATING_VALUES[values].tolist()
+    if field in CHOICE_FIELDS:
+        return np.array(CHOICE_FIELDS[field], dtype=object)[values].tolist()
+    if field == 'location':
+        return [value or None for value in values.tolist()]
+    return values.tolist()
+
+
+def to_numbers(field, values):
+    """グラフ・分析用の float64 配列 (評価は 5〜1、欠損は NaN)"""
+    if field in RATING_FIELDS:
+        return np.where(values > 0, values, np.nan)
+    return values.astype(np.float64)
+
+
+class Snapshot:
+    """あるデータバージョンの DailyRecord 全件 (日付順)
+
+    snapshot['date'] のように列の配列を返す。配列は読み取り専用として扱うこと。
+    """
+
+    def __init__(self, token, buffers, size):
+        self.token = token
+        self._buffers = buffers
+        self.size = size
+        self.columns = {field: buffer[:size] for field, buffer in buffers.items()}
+        self.max_id = int(self.columns['id'].max()) if size else 0
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def between(self, start=None, end=None):
+        """start〜end (どちらも省略可) の列の配列 (コピーではなくスライス) を返す"""
+        dates = self.columns['date']
+        lo = np.searchsorted(dates, np.datetime64(start, 'D'), 'left') if start else 0
+        hi = np.searchsorted(dates, np.datetime64(end, 'D'), 'right') if end else self.size
+        return {field: column[lo:hi] for field, column in self.columns.items()}
+
+    def extend(self, token, columns):
+        """columns (_encode の結果) を末尾に足したスナップショットを返す
+
+        容量が足りるうちはこのスナップショットの配列の後ろに書き込むので、
+        古いスナップショットの読み手 (先頭 size 行だけを見る) には影響しない。
+        """
+        added = len(columns['id'])
+        buffers = self._buffers
+        capacity = len(buffers['id'])
+        if self.size + added > capacity:
+            capacity = max(self.size + added, 2 * capacity, MIN_CAPACITY)
+            grown = {}
+            for field, buffer in buffers.items():
+                grown[field] = np.empty(capacity, dtype=buffer.dtype)
+                grown[field][:self.size] = buffer[:self.size]
+            buffers = grown
+        for field, values in columns.items():
+            buffers[field][self.size:self.size + added] = values
+        return Snapshot(token, buffers, self.size + added)
+
+
+def snapshot_queryset():
+    return DailyRecord.objects.order_by('date').values_list(*FIELDS)
+
+
+def appended_queryset(max_id):
+    # Ordered by pk so the primary key bounds the scan; sorted by date in NumPy.
+    return DailyRecord.objects.filter(pk__gt=max_id).order_by('pk').values_list(*FIELDS)
+
+
+def _current_token():
+    # One query, so the two counters are read consistently. updated_at tells
+    # apart a version number reused after a rolled-back transaction.
+    versions = {
+        table: (version, updated_at)
+        for table, version, updated_at in DataVersion.objects.filter(
+            table__in=(DAILY_RECORD_TABLE, DAILY_RECORD_APPENDS)
+        ).values_list('table', 'version', 'updated_at')
+    }
+    version, updated_at = versions.get(DAILY_RECORD_TABLE, (0, None))
+    appends, _ = versions.get(DAILY_RECORD_APPENDS, (0, None))
+    return version, updated_at, appends
+
+
+def _load(token):
+    columns = _encode(list(snapshot_queryset()))
+    return Snapshot(token, columns, len(columns['id']))
+
+
+def _append(snapshot, token):
+    """前のスナップショットからの変更が新しい日の追加だけなら、追加した行を足して返す"""
+    if snapshot is None:
+        return None
+    version, _, appends = token
+    previous_version, _, previous_appends = snapshot.token
+    added = appends - previous_appends
+    # Every version bump since must be a create, each adding one row.
+    if added <= 0 or version - previous_version != added:
+        return None
+    rows = list(appended_queryset(snapshot.max_id))
+    if len(rows) != added:
+        return None
+    columns = _encode(rows)
+    order = np.argsort(columns['date'], kind='stable')
+    columns = {field: values[order] for field, values in columns.items()}
+    if snapshot.size and columns['date'][0] <= snapshot['date'][-1]:
+        # A past day was filled in: the rows have to be re-sorted.
+        return None
+    return snapshot.extend(token, columns)
+
+
+def get_snapshot():
+    """現在のデータバージョンのスナップショット。古ければ作り直す (追加だけなら末尾に足す)"""
+    global _snapshot
+    token = _current_token()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.token == token:
+        return snapshot
+    with _lock:
+        snapshot = _snapshot
+        if snapshot is None or snapshot.token != token:
+            snapshot = _append(snapshot, token) or _load(token)
+            _snapshot = snapshot
+    return snapshot
@@ -0,0 +1,158 @@
+"""ベンチマーク・動作確認用の合成データ
+
+同じ seed なら同じデータになる。気圧の変化と頭痛・機嫌に相関を持たせ、
+天気の取得に失敗した日の欠損や空の日記も実際の記録に近い割合で混ぜる。
+"""
+import math
+import random
+from datetime import date, timedelta
+from itertools import islice
+
+from django.db import connection, transaction
+
+from .models import DailyRecord
+from .rollups import rebuild_rollups
+from .signals import bump_daily_records
+
+SYNTHETIC_END = date(2025, 12, 31)
+SEED_BATCH_SIZE = 2000
+
+# Share of days with the Open-Meteo fields missing, and with an empty diary
+WEATHER_MISSING_RATE = 0.03
+POLLEN_MISSING_RATE = 0.1
+DIARY_EMPTY_RATE = 0.35
+MEDICINE_UNKNOWN_RATE = 0.05
+
+RATINGS = ['D', 'C', 'B', 'A', 'S']
+
+DIARY_PHRASES = {
+    'headache': ['頭痛がひどい', '朝から頭が重い', 'こめかみがずきずきする'],
+    'medicine': ['頭痛薬を飲んだ', '薬を飲んで横になった'],
+    'rainy': ['雨で気分が沈む', '一日中雨だった', '傘を忘れて濡れた'],
+    'sunny': ['晴れて気持ちいい', '洗濯物がよく乾いた', '子どもと公園に行った'],
+    'pollen': ['花粉でくしゃみが止まらない', '目がかゆい'],
+    'mishap': ['皿を割ってしまった', '鍵をなくしかけた', '約束の時間を間違えた'],
+    'good': ['妻と散歩した', '夕飯がおいしかった', 'ゆっくり眠れた'],
+    'bad': ['妻と口げんかした', 'なんとなくいらいらする', '仕事でミスをした'],
+    'any': ['仕事が忙しい', '早く寝た', '買い物に行った', '本を読んだ', '掃除をした'],
+}
+
+
+def _rating(score):
+    """1〜5 の数値を D〜S に丸める"""
+    return RATINGS[max(0, min(4, int(round(score)) - 1))]
+
+
+def _sigmoid(x):
+    return 1 / (1 + math.exp(-x))
+
+
+def _diary(rng, tags):
+    if rng.random() < DIARY_EMPTY_RATE:
+        return ''
+    sentences = [rng.choice(DIARY_PHRASES[tag]) for tag in tags]
+    sentences += rng.sample(DIARY_PHRASES['any'], rng.randint(0, 2))
+    if not sentences:
+        sentences = [rng.choice(DIARY_PHRASES['any'])]
+    return '。'.join(sentences) + '。'
+
+
+def generate_records(days, seed=0, end=SYNTHETIC_END):
+    """end までの days 日分の DailyRecord (未保存) を日付順に返す"""
+    rng = random.Random(seed)
+    start = end - timedelta(days=days - 1)
+    anomaly = 0.0
+    previous_pressure = None
+    for i in range(days):
+        day = start + timedelta(days=i)
+        # +1 around late July, -1 around late January
+        season = math.cos(2 * math.pi * (day.timetuple().tm_yday - 200) / 365)
+
+        # Pressure: an AR(1) anomaly around a seasonal mean
+        anomaly = 0.75 * anomaly + rng.gauss(0, 4.5)
+        pressure = 1013 - 3 * season + anomaly
+        change = 0.0 if previous_pressure is None else pressure - previous_pressure
+        previous_pressure = pressure
+        spread = abs(rng.gauss(3, 1.5)) + 1 + abs(change) / 2
+
+        rainy_season = day.month in (6, 7)
+        rain = rng.random() < _sigmoid(-anomaly / 3 - 1.2 + (0.8 if rainy_season else 0))
+        weather = 'rainy' if rain else ('cloudy' if rng.random() < 0.35 else 'sunny')
+        temperature = 16 + 10 * season + rng.gauss(0, 2.5) - (1.5 if rain else 0)
+        humidity = max(15, min(100, int(62 + 12 * season + (18 if rain else 0) + rng.gauss(0, 7))))
+
+        # Ratings: S is the fewest pollen / cleanest air
+        pollen_score = 4.6 - (2.8 if day.month in (2, 3, 4) else 0) + rng.gauss(0, 0.7)
+        pm25_score = 4.2 - (1.2 if day.month in (3, 4, 5) else 0) + rng.gauss(0, 0.8)
+
+        # Headaches follow falling pressure, and the mood follows both.
+        headache = rng.random() < _sigmoid(-change / 2.5 - anomaly / 6 - 1.5)
+        if rng.random() < MEDICINE_UNKNOWN_RATE:
+            medicine = 'unknown'
+        else:
+            medicine = 'yes' if headache and rng.random() < 0.8 else 'no'
+        my_score = (
+            3.4 + 0.12 * change + 0.05 * anomaly - 1.1 * headache
+            + {'sunny': 0.3, 'cloudy': 0.0, 'rainy': -0.3}[weather]
+            - (0.3 if pollen_score < 2.5 else 0) + rng.gauss(0, 0.8)
+        )
+        mishap = rng.random() < (0.12 if my_score < 2.5 else 0.06)
+        wife_score = 0.5 * my_score + 0.5 * (3.3 + rng.gauss(0, 0.9)) - 0.6 * mishap
+
+        tags = []
+        if headache:
+            tags.append('headache')
+            if medicine == 'yes':
+                tags.append('medicine')
+        if weather in ('rainy', 'sunny') and rng.random() < 0.5:
+            tags.append(weather)
+        if pollen_score < 2.5 and rng.random() < 0.5:
+            tags.append('pollen')
+        if mishap:
+            tags.append('mishap')
+        if my_score >= 4 or my_score < 2.5:
+            tags.append('good' if my_score >= 4 else 'bad')
+
+        record = DailyRecord(
+            date=day,
+            weather=weather,
+            max_pressure=round(pressure + spread / 2, 1),
+            min_pressure=round(pressure - spread / 2, 1),
+            max_temperature=round(temperature + 4 + rng.gauss(0, 1), 1),
+            min_temperature=round(temperature - 4 + rng.gauss(0, 1), 1),
+            humidity=humidity,
+            pollen='' if rng.random() < POLLEN_MISSING_RATE else _rating(pollen_score),
+            pm25=_rating(pm25_score),
+            my_mood=_rating(my_score),
+            wife_mood=_rating(wife_score),
+            headache_medicine=medicine,
+            mishap=mishap,
+            diary=_diary(rng, tags),
+        )
+        if rng.random() < WEATHER_MISSING_RATE:
+            # The weather lookup failed: every Open-Meteo field is empty.
+            record.weather = record.pm25 = ''
+            record.max_pressure = record.min_pressure = None
+            record.max_temperature = record.min_temperature = record.humidity = None
+        yield record
+
+
+def seed_records(days, seed=0, end=SYNTHETIC_END, replace=False, batch_size=SEED_BATCH_SIZE):
+    """合成データを保存し、保存した件数を返す。replace なら既存の記録を消してから入れる"""
+    records = generate_records(days, seed, end)
+    saved = 0
+    with transaction.atomic():
+        if replace:
+            # A plain DELETE; QuerySet.delete() would run the per-row signals.
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {DailyRecord._meta.db_table}')
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            DailyRecord.objects.bulk_create(batch)
+            saved += len(batch)
+        # bulk_create doesn't send signals, as in import_rows.
+        bump_daily_records()
+        rebuild_rollups()
+    return saved
@@ -0,0 +1,59 @@
+"""バックグラウンドジョブとして実行する処理 (records/jobs.py)"""
+import os
+import uuid
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+from .exports import export_columns, iter_csv_bytes
+from .jobs import task
+from .models import DailyRecord
+from .weather import fetch_weather_batch, fill_empty_weather
+
+
+@task('enrich_weather')
+def enrich_weather(record_ids):
+    """記録の空の天気項目を Open-Meteo から埋める。入力済みの項目は変えない
+
+    場所ごとにまとめたリクエスト (fetch_weather_batch) で取得する。
+    """
+    records = DailyRecord.objects.filter(pk__in=record_ids).select_related('location')
+    pairs = [(record.location, record.date) for record in records if record.empty_weather_fields()]
+    # Network errors propagate, so the job is retried with backoff.
+    weather = fetch_weather_batch(pairs)
+
+    updated = {}
+    with transaction.atomic():
+        # Re-read: records may have been edited while the API was called.
+        for record in DailyRecord.objects.select_for_update().filter(pk__in=record_ids):
+            values = weather.get((record.location_id, record.date))
+            fields = fill_empty_weather(record, values) if values else []
+            if fields:
+                record.save(update_fields=fields)
+                updated[record.pk] = fields
+    return {'record_ids': list(record_ids), 'updated': updated}
+
+
+@task('export_csv')
+def export_csv(start=None, end=None, compress=False):
+    """export_csv と同じ CSV を JOBS_FILE_DIR に書き出す。ダウンロードは job_download から"""
+    directory = Path(settings.JOBS_FILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    filename = 'daily_records.csv.gz' if compress else 'daily_records.csv'
+    path = directory / f'{uuid.uuid4().hex}_{filename}'
+    columns = export_columns(
+        date.fromisoformat(start) if start else None,
+        date.fromisoformat(end) if end else None,
+    )
+    tmp_path = path.with_name(path.name + '.tmp')
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in iter_csv_bytes(columns, compress=compress):
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return {'file': path.name, 'filename': filename, 'size': path.stat().st_size}
+
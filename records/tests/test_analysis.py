@@ -0,0 +1,54 @@
+from datetime import date
+
+from django.test import TestCase
+
+from ..analysis import STATS_NAME, get_correlation_stats, rebuild_correlation_stats
+from ..models import CorrelationStats, DailyRecord
+from .utils import make_record, make_records
+
+
+class CorrelationStatsTests(TestCase):
+    def setUp(self):
+        make_records(12)
+        rebuild_correlation_stats()
+
+    def assert_matches_rebuild(self):
+        # The incremental statistics must still be the current ones (not
+        # discarded for a rebuild) and equal what a rebuild computes.
+        incremental = get_correlation_stats()
+        n, sums, products = incremental.n, incremental.sums, incremental.products
+        self.assertEqual(CorrelationStats.objects.get(name=STATS_NAME).pk, incremental.pk)
+        rebuilt = rebuild_correlation_stats()
+        self.assertEqual(n, rebuilt.n)
+        for a, b in zip(sums, rebuilt.sums):
+            self.assertAlmostEqual(a, b, places=6)
+        for row_a, row_b in zip(products, rebuilt.products):
+            for a, b in zip(row_a, row_b):
+                self.assertAlmostEqual(a, b, places=4)
+
+    def test_create(self):
+        version_before = CorrelationStats.objects.get(name=STATS_NAME).data_version
+        make_record(date(2025, 2, 1), 20)
+        self.assertEqual(CorrelationStats.objects.get(name=STATS_NAME).data_version, version_before + 1)
+        self.assert_matches_rebuild()
+
+    def test_edit(self):
+        record = DailyRecord.objects.get(date=date(2025, 1, 5))
+        record.my_mood = 'D'
+        record.max_pressure = 990.0
+        record.save()
+        self.assert_matches_rebuild()
+
+    def test_date_move(self):
+        record = DailyRecord.objects.get(date=date(2025, 1, 3))
+        record.date = date(2025, 3, 1)
+        record.save()
+        self.assert_matches_rebuild()
+
+    def test_delete(self):
+        DailyRecord.objects.get(date=date(2025, 1, 7)).delete()
+        self.assert_matches_rebuild()
+
+    def test_record_with_missing_value(self):
+        make_record(date(2025, 2, 2), 3, humidity=None)
+        self.assert_matches_rebuild()
@@ -0,0 +1,78 @@
+import io
+import json
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+
+from ..models import DailyRecord, DataVersion, Location, PeriodRollup
+from .test_weather import StubTestCase
+from .utils import make_record
+
+TABLE = DailyRecord._meta.db_table
+EMPTY_WEATHER = {field: None for field in DailyRecord.WEATHER_FIELDS if field not in ('weather', 'pm25')}
+
+
+class BackfillWeatherTests(StubTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = Path(directory.name) / 'checkpoint.json'
+        for day in range(1, 11):
+            make_record(date(2025, 1, day), day, weather='', pm25='', **EMPTY_WEATHER)
+        # Already filled in: left as it is.
+        make_record(date(2025, 1, 11), 0, weather='sunny', max_pressure=1020.0)
+        make_record(
+            date(2025, 1, 12), 0, weather='', **EMPTY_WEATHER,
+            location=Location.objects.create(name='旅先', latitude=35.0, longitude=135.0),
+        )
+
+    def backfill(self, *args):
+        out = io.StringIO()
+        call_command('backfill_weather', '2025-01-01', '2025-01-12', '--checkpoint', str(self.checkpoint), *args, stdout=out)
+        return out.getvalue()
+
+    def test_fills_empty_fields(self):
+        version = DataVersion.current(TABLE).version
+        output = self.backfill('--chunk-days', '5')
+        self.assertIn('完了: 更新 11 件', output)
+        # One version per chunk that saved something.
+        self.assertEqual(DataVersion.current(TABLE).version, version + 3)
+        self.assertFalse(self.checkpoint.exists())
+
+        record = DailyRecord.objects.get(date=date(2025, 1, 3))
+        self.assertEqual(
+            (record.weather, record.max_pressure, record.min_temperature, record.humidity, record.pm25),
+            ('cloudy', 1016.0, 12.0, 60, 'A'),
+        )
+        untouched = DailyRecord.objects.get(date=date(2025, 1, 11))
+        self.assertEqual((untouched.weather, untouched.max_pressure), ('sunny', 1020.0))
+        self.assertEqual(DailyRecord.objects.get(date=date(2025, 1, 12)).weather, 'cloudy')
+        # Rollups were refreshed from the saved values.
+        week = PeriodRollup.objects.get(period='week', period_start=date(2024, 12, 30))
+        self.assertEqual(week.pressure_max, 1016.0)
+
+    def test_batches_requests(self):
+        self.backfill()
+        # Home and the other location in one request per API.
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_dry_run(self):
+        version = DataVersion.current(TABLE).version
+        output = self.backfill('--dry-run')
+        self.assertIn('[dry-run] 完了: 更新 11 件', output)
+        self.assertEqual(DailyRecord.objects.filter(weather='').count(), 11)
+        self.assertEqual(DataVersion.current(TABLE).version, version)
+
+    def test_resume_from_checkpoint(self):
+        self.checkpoint.write_text(json.dumps({'start': '2025-01-01', 'end': '2025-01-12', 'next': '2025-01-06'}))
+        output = self.backfill()
+        self.assertIn('2025-01-06 から再開します。', output)
+        self.assertEqual(DailyRecord.objects.filter(date__lt=date(2025, 1, 6), weather='').count(), 5)
+        self.assertFalse(DailyRecord.objects.filter(date__gte=date(2025, 1, 6), weather='').exists())
+
+    def test_invalid_range(self):
+        with self.assertRaises(CommandError):
+            call_command('backfill_weather', '2025-01-02', '2025-01-01', stdout=io.StringIO())
@@ -0,0 +1,78 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from .. import caching
+from ..models import DataVersion, HourlySeries
+from .utils import make_record, make_records
+
+HOURLY_TABLE = HourlySeries._meta.db_table
+
+calls = []
+
+
+@caching.cache_on_data_version(tables=[HOURLY_TABLE])
+def counting_view(request):
+    calls.append(request.get_full_path())
+    return HttpResponse(str(len(calls)))
+
+
+class CacheKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        calls.clear()
+        self.factory = RequestFactory()
+
+    def test_key_follows_the_version(self):
+        make_records(2)
+        version = caching.data_version()
+        key = caching.cache_key('view', version, '/list/?page_size=10')
+        self.assertEqual(key, caching.cache_key('view', version, '/list/?page_size=10'))
+        self.assertNotEqual(key, caching.cache_key('view', version, '/list/?page_size=20'))
+        make_record(date(2025, 2, 1))
+        self.assertEqual(caching.data_version(), version + 1)
+        self.assertNotEqual(key, caching.cache_key('view', caching.data_version(), '/list/?page_size=10'))
+
+    def test_version_is_read_once_per_request(self):
+        request = self.factory.get('/')
+        version = caching.data_version(request)
+        make_record(date(2025, 2, 1))
+        with self.assertNumQueries(0):
+            self.assertEqual(caching.data_version(request), version)
+
+    def test_view_cache(self):
+        self.assertEqual(counting_view(self.factory.get('/a/')).content, b'1')
+        self.assertEqual(counting_view(self.factory.get('/a/')).content, b'1')
+        self.assertEqual(counting_view(self.factory.get('/b/')).content, b'2')
+        # Saving a record moves every key to a new version.
+        make_record(date(2025, 2, 1))
+        self.assertEqual(counting_view(self.factory.get('/a/')).content, b'3')
+        self.assertEqual(counting_view(self.factory.get('/a/')).content, b'3')
+        # So does a bump of the extra tables.
+        DataVersion.bump(HOURLY_TABLE)
+        self.assertEqual(counting_view(self.factory.get('/a/')).content, b'4')
+        # POST is never cached.
+        counting_view(self.factory.post('/a/'))
+        self.assertEqual(len(calls), 5)
+
+    def test_fragment_shows_new_records(self):
+        make_record(date(2025, 1, 1))
+        self.assertNotContains(self.client.get(reverse('record_list')), '2025年1月2日')
+        make_record(date(2025, 1, 2))
+        self.assertContains(self.client.get(reverse('record_list')), '2025年1月2日')
+
+    async def test_async_fragment(self):
+        rendered = []
+
+        async def render():
+            rendered.append(1)
+            return f'<p>{len(rendered)}</p>'
+
+        request = self.factory.get('/')
+        self.assertEqual(await caching.acached_fragment(request, 'test', ('x',), render), '<p>1</p>')
+        self.assertEqual(await caching.acached_fragment(self.factory.get('/'), 'test', ('x',), render), '<p>1</p>')
+        await DataVersion.objects.filter(table=caching.DAILY_RECORD_TABLE).aupdate(version=99)
+        self.assertEqual(await caching.acached_fragment(self.factory.get('/'), 'test', ('x',), render), '<p>2</p>')
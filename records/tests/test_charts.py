@@ -0,0 +1,104 @@
+import math
+from datetime import date
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from .. import snapshot
+from ..charts import build_chart_data, lttb_indices
+from ..models import DailyRecord
+from ..views.charts import chart_data_api, chart_data_api_async
+from .utils import make_record, make_records
+
+
+class LttbTests(SimpleTestCase):
+    def test_keeps_endpoints_within_budget(self):
+        series = [[math.sin(i / 7) for i in range(500)], [(i * 37) % 11 for i in range(500)]]
+        for threshold in (3, 10, 99, 499):
+            keep = lttb_indices(series, threshold)
+            self.assertEqual(len(keep), threshold)
+            self.assertEqual(keep[0], 0)
+            self.assertEqual(keep[-1], 499)
+            self.assertEqual(keep, sorted(set(keep)))
+
+    def test_keeps_a_spike(self):
+        values = [0.0] * 200
+        values[123] = 10.0
+        self.assertIn(123, lttb_indices([values], 20))
+
+    def test_missing_values(self):
+        values = [None if i % 3 else float(i) for i in range(100)]
+        keep = lttb_indices([values, [None] * 100], 10)
+        self.assertEqual(len(keep), 10)
+        self.assertEqual((keep[0], keep[-1]), (0, 99))
+
+    def test_nothing_to_drop(self):
+        self.assertEqual(lttb_indices([[1, 2, 3, 4]], 4), [0, 1, 2, 3])
+        self.assertEqual(lttb_indices([[1, 2, 3, 4]], 10), [0, 1, 2, 3])
+        self.assertEqual(lttb_indices([], 10), [])
+
+
+class BuildChartDataTests(TestCase):
+    def setUp(self):
+        snapshot._snapshot = None
+        make_records(60)
+
+    def test_points(self):
+        data = build_chart_data(points=12)
+        self.assertEqual(len(data['dates']), 12)
+        self.assertEqual((data['dates'][0], data['dates'][-1]), ('2025-01-01', '2025-03-01'))
+        for values in data['datasets'].values():
+            self.assertEqual(len(values), 12)
+
+    def test_range(self):
+        data = build_chart_data(start=date(2025, 1, 10), end=date(2025, 1, 19))
+        self.assertEqual(len(data['dates']), 10)
+        self.assertEqual(data['dates'][0], '2025-01-10')
+
+
+class ChartDataApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        snapshot._snapshot = None
+        make_records(10)
+        self.url = reverse('chart_data_api')
+
+    def get(self, view, **headers):
+        request = RequestFactory().get(self.url, {'resolution': 'daily'}, headers=headers)
+        if view is chart_data_api_async:
+            return async_to_sync(view)(request)
+        return view(request)
+
+    def test_revalidation(self):
+        for view in (chart_data_api, chart_data_api_async):
+            with self.subTest(view=view.__name__):
+                response = self.get(view)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('private', response['Cache-Control'])
+                self.assertIn('Last-Modified', response)
+                etag = response['ETag']
+
+                response = self.get(view, if_none_match=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+                self.assertEqual(self.get(view, if_none_match='"other"').status_code, 200)
+
+    def test_etag_changes_after_save(self):
+        etag = self.get(chart_data_api)['ETag']
+        record = DailyRecord.objects.get(date=date(2025, 1, 4))
+        record.my_mood = 'D'
+        record.save()
+        response = self.get(chart_data_api, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        make_record(date(2025, 2, 1), 2)
+        self.assertNotEqual(self.get(chart_data_api)['ETag'], etag)
+
+    def test_parameters_change_the_etag(self):
+        daily = self.get(chart_data_api)['ETag']
+        request = RequestFactory().get(self.url, {'resolution': 'weekly'})
+        self.assertNotEqual(chart_data_api(request)['ETag'], daily)
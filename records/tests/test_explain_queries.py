@@ -0,0 +1,74 @@
+import io
+from datetime import date
+
+from django.core.management import call_command
+from django.db.models import Count, Max
+from django.test import TestCase
+from django.urls import reverse
+
+from ..imports import import_rows
+from ..models import DailyRecord, DataVersion
+from ..rollups import mood_counts
+from ..signals import DAILY_RECORD_TABLE
+from ..synthetic import seed_records
+from .utils import make_record, make_records
+
+
+class RowStatsTests(TestCase):
+    """バージョンの行に持つ行数と最新の日付"""
+
+    def assert_stats(self):
+        version = DataVersion.current(DAILY_RECORD_TABLE)
+        stats = DailyRecord.objects.aggregate(row_count=Count('id'), max_date=Max('date'))
+        self.assertEqual((version.row_count, version.max_date), (stats['row_count'], stats['max_date']))
+
+    def test_signals(self):
+        records = make_records(5)
+        self.assert_stats()
+        records[-1].date = date(2025, 3, 1)
+        records[-1].save()
+        self.assert_stats()
+        records[-1].delete()
+        self.assert_stats()
+        records[0].delete()
+        self.assert_stats()
+
+    def test_recounted_when_missing(self):
+        make_records(3)
+        DataVersion.objects.filter(table=DAILY_RECORD_TABLE).update(row_count=None)
+        make_record(date(2025, 2, 1))
+        self.assert_stats()
+        DataVersion.objects.filter(table=DAILY_RECORD_TABLE).delete()
+        DailyRecord.objects.get(date=date(2025, 2, 1)).delete()
+        self.assert_stats()
+
+    def test_bulk_writers(self):
+        seed_records(30, end=date(2025, 1, 30))
+        self.assert_stats()
+        rows = [(1, {'date': '2025-02-10', 'my_mood': 'S', 'wife_mood': 'A', 'headache_medicine': 'no'})]
+        import_rows(rows)
+        self.assert_stats()
+
+    def test_chart_revalidation_reads_only_the_version_row(self):
+        make_records(5)
+        url = reverse('chart_data_api')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, headers={'if-none-match': etag}).status_code, 304)
+
+
+class MoodCountsTests(TestCase):
+    def test_matches_grouping_the_records(self):
+        make_records(70)
+        expected = dict(DailyRecord.objects.values_list('wife_mood').annotate(days=Count('id')))
+        counts = mood_counts('wife_mood')
+        self.assertEqual({rating: days for rating, days in counts.items() if days}, expected)
+        self.assertEqual(sum(mood_counts('my_mood').values()), 70)
+
+
+class ExplainQueriesTests(TestCase):
+    def test_no_full_scans(self):
+        make_records(30)
+        out = io.StringIO()
+        call_command('explain_queries', stdout=out)
+        self.assertIn('全件スキャンになっているクエリはありません。', out.getvalue())
@@ -0,0 +1,84 @@
+import math
+from datetime import date, timedelta
+
+import numpy as np
+
+from django.test import SimpleTestCase, TestCase
+
+from .. import hourly
+from ..models import DataVersion, HourlySeries
+
+HOME = (35.0, 139.0)
+FIRST = date(2025, 1, 1)
+
+
+def hours(day):
+    return [f'{day.isoformat()}T{hour:02d}:00' for hour in range(24)]
+
+
+def forecast(day, pressures):
+    return {'hourly': {'time': hours(day), 'pressure_msl': pressures}}
+
+
+class PackTests(SimpleTestCase):
+    def test_round_trip(self):
+        values = [1012.5 + i / 4 for i in range(24)]
+        values[5] = None
+        self.assertEqual(hourly.unpack(hourly.pack(values)), values)
+
+    def test_short_and_long_series(self):
+        self.assertEqual(hourly.unpack(hourly.pack([1.0, 2.0])), [1.0, 2.0] + [None] * 22)
+        self.assertEqual(hourly.unpack(hourly.pack(range(30))), [float(i) for i in range(24)])
+        self.assertEqual(len(hourly.pack([])), 96)
+
+
+class HourlySeriesTests(TestCase):
+    def store(self, days):
+        """FIRST から days 日分、1時間に 0.25 hPa ずつ下がり、毎日前日より 10 hPa 低く始まる気圧を保存する"""
+        entries = []
+        for i in range(days):
+            day = FIRST + timedelta(days=i)
+            start = 1020 - 10 * i
+            entries.append((*HOME, day, forecast(day, [start - hour / 4 for hour in range(24)])))
+        return hourly.store_payloads('forecast', entries)
+
+    def test_round_trip(self):
+        self.assertEqual(self.store(3), 3)
+        dates, values = hourly.load_series('pressure', *HOME, FIRST - timedelta(days=1), FIRST + timedelta(days=3))
+        self.assertEqual(len(dates), 5)
+        self.assertEqual(dates[1], np.datetime64(FIRST))
+        self.assertEqual(values.dtype, np.float32)
+        # Days not stored are NaN rows.
+        self.assertTrue(np.isnan(values[0]).all())
+        self.assertTrue(np.isnan(values[4]).all())
+        self.assertEqual(values[2, 0], 1010.0)
+        self.assertEqual(values[2, 23], 1010.0 - 23 / 4)
+
+    def test_apis_fill_their_own_column(self):
+        self.store(1)
+        air = {'hourly': {'time': hours(FIRST), 'pm2_5': [10.5] * 24}}
+        self.assertEqual(hourly.store_payloads('air_quality', [(*HOME, FIRST, air)]), 1)
+        row = HourlySeries.objects.get()
+        self.assertEqual(hourly.unpack(row.pm25), [10.5] * 24)
+        self.assertEqual(hourly.unpack(row.pressure)[0], 1020.0)
+        # A payload without hourly values stores nothing.
+        self.assertEqual(hourly.store_payloads('forecast', [(*HOME, FIRST, {'daily': {}})]), 0)
+
+    def test_store_bumps_the_version(self):
+        table = HourlySeries._meta.db_table
+        self.store(1)
+        version = DataVersion.current(table).version
+        self.store(1)
+        self.assertEqual(DataVersion.current(table).version, version + 1)
+        self.assertEqual(HourlySeries.objects.count(), 1)
+
+    def test_pressure_drops(self):
+        self.store(3)
+        keys = [(*HOME, FIRST + timedelta(days=2)), (*HOME, FIRST), (36.0, 140.0, FIRST), (*HOME, FIRST + timedelta(days=5))]
+        drops = hourly.pressure_drops(keys)
+        # From 21:00 the day before to 00:00: 0.5 hPa, then the 4.25 hPa step at midnight
+        self.assertAlmostEqual(drops[0], 4.75, places=4)
+        # The first day has no day before it, so only its own 3-hour drops count.
+        self.assertAlmostEqual(drops[1], 0.75, places=4)
+        self.assertTrue(math.isnan(drops[2]))
+        self.assertTrue(math.isnan(drops[3]))
@@ -0,0 +1,89 @@
+import io
+from datetime import date
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.forms.models import model_to_dict
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import snapshot
+from ..exports import export_columns, iter_csv_bytes
+from ..imports import import_rows, iter_csv_rows
+from ..models import DailyRecord, Location
+from .utils import make_record, make_records
+
+
+class ImportExportTests(TestCase):
+    def setUp(self):
+        snapshot._snapshot = None
+        self.location = Location.objects.create(name='実家', latitude=35.0, longitude=135.0)
+        make_records(6)
+        make_record(date(2025, 1, 10), 1, location=self.location, diary='改行\nと "引用", カンマ')
+        make_record(date(2025, 1, 11), 2, weather='', pollen='', humidity=None, max_pressure=None)
+
+    def export(self, **kwargs):
+        return b''.join(iter_csv_bytes(export_columns(**kwargs))).decode('utf-8-sig')
+
+    def record_values(self):
+        return [
+            {key: value for key, value in model_to_dict(record).items() if key != 'id'}
+            for record in DailyRecord.objects.order_by('date')
+        ]
+
+    def test_round_trip(self):
+        before = self.record_values()
+        text = self.export()
+        DailyRecord.objects.all().delete()
+
+        result = import_rows(iter_csv_rows(io.StringIO(text, newline='')))
+        self.assertEqual(result.errors, [])
+        self.assertEqual(result.saved, len(before))
+        self.assertEqual(self.record_values(), before)
+        # Exporting again gives the same file apart from the new ids.
+        self.assertEqual(
+            [line.split(',', 1)[1] for line in self.export().splitlines()[1:]],
+            [line.split(',', 1)[1] for line in text.splitlines()[1:]],
+        )
+
+    def test_export_range(self):
+        lines = self.export(start=date(2025, 1, 2), end=date(2025, 1, 4)).splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual([line.split(',')[1] for line in lines[1:]], ['2025-01-02', '2025-01-03', '2025-01-04'])
+
+    def test_dry_run(self):
+        text = self.export().replace('2025-01-11', '2025-02-11')
+        before = self.record_values()
+        result = import_rows(iter_csv_rows(io.StringIO(text, newline='')), dry_run=True)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(result.saved, len(before))
+        self.assertEqual(self.record_values(), before)
+
+    def test_errors(self):
+        text = self.export().replace('実家', '存在しない場所')
+        result = import_rows(iter_csv_rows(io.StringIO(text, newline='')))
+        self.assertEqual(len(result.errors), 1)
+        self.assertIn('存在しない場所', result.errors[0][1])
+
+
+class ImportViewTests(TestCase):
+    def upload(self, name, content):
+        return self.client.post(reverse('import_records'), {'file': SimpleUploadedFile(name, content)}, follow=True)
+
+    def test_csv(self):
+        response = self.upload('records.csv', '日付,自分の機嫌,妻の機嫌\n2025-01-01,S,A\n2025-01-02,X,A\n'.encode())
+        self.assertRedirects(response, reverse('record_list'))
+        messages = [str(message) for message in response.context['messages']]
+        self.assertIn('1 件の記録を取り込みました (エラー 1 件)。', messages)
+        self.assertEqual(DailyRecord.objects.get().date, date(2025, 1, 1))
+
+    def test_malformed_csv(self):
+        response = self.upload('records.csv', b'date,my_mood\n' + b'x' * 200000 + b',S\n')
+        self.assertEqual(response.status_code, 200)
+        messages = [str(message) for message in response.context['messages']]
+        self.assertTrue(messages[0].startswith('ファイルを読み込めませんでした'))
+        self.assertFalse(DailyRecord.objects.exists())
+
+    def test_not_utf8(self):
+        response = self.upload('records.csv', '日付\n2025-01-01\n'.encode('cp932'))
+        messages = [str(message) for message in response.context['messages']]
+        self.assertTrue(messages[0].startswith('ファイルを読み込めませんでした'))
@@ -0,0 +1,68 @@
+import re
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from project_config import instrumentation
+from .utils import make_records
+
+SERVER_TIMING = re.compile(r'app;dur=[\d.]+, db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        make_records(3)
+        instrumentation.get_buffer().clear()
+
+    def test_header(self):
+        response = self.client.get(reverse('record_list'))
+        match = SERVER_TIMING.fullmatch(response['Server-Timing'])
+        self.assertIsNotNone(match, response['Server-Timing'])
+        self.assertGreater(int(match[1]), 0)
+
+    async def test_async_header(self):
+        response = await self.async_client.get(reverse('record_list'))
+        self.assertRegex(response['Server-Timing'], SERVER_TIMING)
+
+    def test_stats(self):
+        for _ in range(3):
+            self.client.get(reverse('record_list'))
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        stats = self.client.get(reverse('timing_stats')).json()
+        self.assertEqual(stats['views']['record_list']['count'], 3)
+        self.assertEqual(set(stats['views']['record_list']['wall_ms']), {'p50', 'p95', 'p99'})
+        self.client.post(reverse('timing_stats'), {'reset': '1'})
+        self.assertNotIn('record_list', instrumentation.get_buffer().summary())
+
+    def test_stats_need_staff(self):
+        response = self.client.get(reverse('timing_stats'))
+        self.assertEqual(response.status_code, 302)
+
+
+class RequestTimingsTests(SimpleTestCase):
+    def test_outbound(self):
+        timings, token = instrumentation.start()
+        try:
+            with instrumentation.outbound_timer():
+                pass
+            with instrumentation.outbound_timer():
+                pass
+        finally:
+            instrumentation.finish(token)
+        self.assertEqual(timings.outbound_calls, 2)
+        self.assertRegex(timings.server_timing(0.5), r'^app;dur=500\.0, .*, ext;dur=[\d.]+;desc="2 requests"$')
+
+    def test_outside_a_request(self):
+        with instrumentation.outbound_timer():
+            pass
+
+    def test_percentiles(self):
+        buffer = instrumentation.TimingBuffer(100)
+        timings = instrumentation.RequestTimings()
+        for ms in range(1, 201):
+            buffer.add('view', ms / 1000, timings)
+        summary = buffer.summary()['view']
+        # Only the last 100 samples are kept.
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['wall_ms'], {'p50': 150.0, 'p95': 195.0, 'p99': 199.0})
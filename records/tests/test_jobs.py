@@ -0,0 +1,133 @@
+import time
+from datetime import timedelta
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .. import jobs
+from ..models import Job
+
+calls = []
+
+
+@jobs.task('test_add')
+def add(a, b):
+    calls.append((a, b))
+    return a + b
+
+
+@jobs.task('test_fail')
+def fail():
+    calls.append(None)
+    raise RuntimeError('boom')
+
+
+@jobs.task('test_slow')
+def slow(seconds):
+    time.sleep(seconds)
+    return Job.objects.get(task='test_slow').locked_at.isoformat()
+
+
+@override_settings(JOBS_BACKOFF=10, JOBS_LOCK_TIMEOUT=600)
+class JobTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def make_due(self, job):
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+
+    def test_success(self):
+        job = jobs.enqueue('test_add', a=1, b=2)
+        self.assertEqual(jobs.work(burst=True), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.attempts), (Job.SUCCEEDED, 3, 1))
+        self.assertIsNone(job.locked_at)
+
+    def test_retry_with_backoff(self):
+        job = jobs.enqueue('test_fail', max_attempts=3)
+        with self.assertLogs('records.jobs', 'WARNING'):
+            jobs.work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertAlmostEqual((job.run_at - timezone.now()).total_seconds(), 10, delta=2)
+        # Not due yet
+        self.assertEqual(jobs.work(burst=True), 0)
+
+        self.make_due(job)
+        with self.assertLogs('records.jobs', 'WARNING'):
+            jobs.work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 2))
+        self.assertAlmostEqual((job.run_at - timezone.now()).total_seconds(), 20, delta=2)
+
+    def test_max_attempts(self):
+        job = jobs.enqueue('test_fail', max_attempts=2)
+        for _ in range(2):
+            self.make_due(job)
+            with self.assertLogs('records.jobs', 'WARNING'):
+                jobs.work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+        self.make_due(job)
+        self.assertEqual(jobs.work(burst=True), 0)
+        self.assertEqual(len(calls), 2)
+
+    def lose_worker(self, job):
+        """ジョブを取り出したワーカーが JOBS_LOCK_TIMEOUT より前に落ちたことにする"""
+        self.make_due(job)
+        claimed = jobs.claim('lost-worker')
+        self.assertEqual(claimed.pk, job.pk)
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(seconds=601))
+
+    def test_stale_job_is_retried(self):
+        job = jobs.enqueue('test_add', a=1, b=2)
+        self.lose_worker(job)
+        with self.assertLogs('records.jobs', 'WARNING'):
+            self.assertEqual(jobs._requeue_stale(), (1, 0))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.worker), (Job.QUEUED, 1, ''))
+        self.assertEqual(job.last_error, jobs.LOST_WORKER_ERROR)
+        self.assertGreater(job.run_at, timezone.now())
+
+    def test_stale_job_fails_at_max_attempts(self):
+        job = jobs.enqueue('test_add', max_attempts=2, a=1, b=2)
+        for expected in [(1, 0), (0, 1)]:
+            self.lose_worker(job)
+            with self.assertLogs('records.jobs', 'WARNING'):
+                self.assertEqual(jobs._requeue_stale(), expected)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(calls, [])
+
+    def test_running_job_is_left_alone(self):
+        job = jobs.enqueue('test_add', a=1, b=2)
+        jobs.claim('worker')
+        self.assertEqual(jobs._requeue_stale(), (0, 0))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+
+    def test_beat(self):
+        job = jobs.enqueue('test_add', a=1, b=2)
+        job = jobs.claim('worker')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(seconds=601))
+        self.assertTrue(jobs._beat(job))
+        self.assertEqual(jobs._requeue_stale(), (0, 0))
+        # Taken over by another worker
+        Job.objects.filter(pk=job.pk).update(worker='other')
+        self.assertFalse(jobs._beat(job))
+
+
+@override_settings(JOBS_HEARTBEAT_INTERVAL=0.05)
+class HeartbeatTests(TransactionTestCase):
+    def test_long_job_keeps_its_lock(self):
+        job = jobs.enqueue('test_slow', seconds=0.3)
+        claimed = jobs.claim('worker')
+        locked_at = claimed.locked_at
+        jobs.run(claimed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        # The task saw a lock refreshed while it ran.
+        self.assertGreater(job.result, locked_at.isoformat())
@@ -0,0 +1,109 @@
+from datetime import date, timedelta
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from .. import snapshot
+from ..lag_analysis import LAG_FEATURES, lag_report, lagged_correlations, load_daily_matrix, rolling_correlations
+from .utils import make_record
+
+TARGET = 'my_mood_num'
+
+
+def pearson(x, y):
+    """NaN の組を除いた素朴なピアソン相関 (比較用)"""
+    mask = ~np.isnan(x) & ~np.isnan(y)
+    if mask.sum() < 3 or np.std(x[mask]) < 1e-6 or np.std(y[mask]) < 1e-6:
+        return np.nan
+    return np.corrcoef(x[mask], y[mask])[0, 1]
+
+
+def random_matrix(days, seed=0):
+    rng = np.random.default_rng(seed)
+    # Offsets like real pressures, so precision loss would show.
+    matrix = rng.normal(size=(days, len(LAG_FEATURES))) + np.arange(len(LAG_FEATURES)) * 100
+    matrix[rng.random(matrix.shape) < 0.1] = np.nan
+    return matrix
+
+
+class LaggedCorrelationTests(SimpleTestCase):
+    def test_matches_pairwise_correlation(self):
+        matrix = random_matrix(120)
+        max_lag = 5
+        corr, n = lagged_correlations(matrix, TARGET, max_lag)
+        self.assertEqual(corr.shape, (max_lag + 1, len(LAG_FEATURES)))
+        y = matrix[max_lag:, LAG_FEATURES.index(TARGET)]
+        for lag in range(max_lag + 1):
+            for f in range(len(LAG_FEATURES)):
+                if lag == 0 and f == LAG_FEATURES.index(TARGET):
+                    self.assertTrue(np.isnan(corr[lag, f]))
+                    continue
+                x = matrix[max_lag - lag:len(matrix) - lag, f]
+                self.assertAlmostEqual(corr[lag, f], pearson(x, y), places=8)
+                self.assertEqual(n[lag, f], (~np.isnan(x) & ~np.isnan(y)).sum())
+
+    def test_finds_the_lag(self):
+        rng = np.random.default_rng(1)
+        matrix = np.full((200, len(LAG_FEATURES)), np.nan)
+        signal = rng.normal(size=200)
+        pressure = LAG_FEATURES.index('max_pressure')
+        matrix[:, pressure] = 1000 + signal
+        matrix[2:, LAG_FEATURES.index(TARGET)] = signal[:-2]
+        corr, _ = lagged_correlations(matrix, TARGET, 4)
+        self.assertEqual(int(np.nanargmax(corr[:, pressure])), 2)
+        self.assertAlmostEqual(corr[2, pressure], 1.0)
+
+    def test_too_few_days(self):
+        corr, n = lagged_correlations(random_matrix(3), TARGET, 5)
+        self.assertTrue(np.isnan(corr).all())
+        self.assertFalse(n.any())
+
+
+class RollingCorrelationTests(SimpleTestCase):
+    def test_matches_pairwise_correlation(self):
+        matrix = random_matrix(150, seed=2)
+        window = 30
+        corr = rolling_correlations(matrix, TARGET, window)
+        self.assertEqual(corr.shape, (150 - window + 1, len(LAG_FEATURES)))
+        target = LAG_FEATURES.index(TARGET)
+        for start in range(0, len(corr), 7):
+            rows = matrix[start:start + window]
+            for f in range(len(LAG_FEATURES)):
+                expected = np.nan if f == target else pearson(rows[:, f], rows[:, target])
+                np.testing.assert_allclose(corr[start, f], expected, atol=1e-7)
+
+    def test_constant_and_empty_columns(self):
+        matrix = random_matrix(60, seed=3)
+        matrix[:, LAG_FEATURES.index('humidity')] = 50.0
+        matrix[:, LAG_FEATURES.index('pm25_num')] = np.nan
+        corr = rolling_correlations(matrix, TARGET, 10)
+        self.assertTrue(np.isnan(corr[:, LAG_FEATURES.index('humidity')]).all())
+        self.assertTrue(np.isnan(corr[:, LAG_FEATURES.index('pm25_num')]).all())
+
+    def test_window_longer_than_the_data(self):
+        self.assertEqual(rolling_correlations(random_matrix(5), TARGET, 10).shape, (0, len(LAG_FEATURES)))
+
+
+class LagReportTests(TestCase):
+    def setUp(self):
+        snapshot._snapshot = None
+        # 2025-01-11 has no record.
+        for i in range(40):
+            if i != 10:
+                make_record(date(2025, 1, 1) + timedelta(days=i), i)
+
+    def test_daily_matrix_has_a_row_per_day(self):
+        dates, matrix = load_daily_matrix()
+        self.assertEqual(len(dates), 40)
+        self.assertEqual(str(dates[10]), '2025-01-11')
+        self.assertTrue(np.isnan(matrix[10, LAG_FEATURES.index(TARGET)]))
+        self.assertEqual(matrix[0, LAG_FEATURES.index(TARGET)], 5.0)
+
+    def test_report(self):
+        report = lag_report('my_mood_num', 3, 10)
+        self.assertEqual(report['lags'], [0, 1, 2, 3])
+        self.assertEqual(report['days'], 40)
+        self.assertEqual(report['latest_window_end'], '2025-02-09')
+        self.assertTrue(report['rows'])
+        for row in report['rows']:
+            self.assertEqual(len(row['lags']), 4)
@@ -0,0 +1,71 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import DailyRecord
+from ..views.pages import _record_page
+from .utils import make_records
+
+
+class RecordPageTests(TestCase):
+    def setUp(self):
+        # Cached tables are keyed on version numbers, which every test reuses.
+        cache.clear()
+        make_records(5)
+
+    def dates(self, page):
+        return [record.date.day for record in page['records']]
+
+    def test_first_page(self):
+        page = _record_page(2, None, None)
+        self.assertEqual(self.dates(page), [5, 4])
+        self.assertIsNone(page['newer_cursor'])
+        self.assertEqual(page['older_cursor'], '2025-01-04')
+
+    def test_walk_older_and_back(self):
+        page = _record_page(2, date(2025, 1, 4), None)
+        self.assertEqual(self.dates(page), [3, 2])
+        self.assertEqual(page['newer_cursor'], '2025-01-03')
+        self.assertEqual(page['older_cursor'], '2025-01-02')
+
+        last = _record_page(2, date(2025, 1, 2), None)
+        self.assertEqual(self.dates(last), [1])
+        self.assertEqual(last['newer_cursor'], '2025-01-01')
+        self.assertIsNone(last['older_cursor'])
+
+        back = _record_page(2, None, date(2025, 1, 3))
+        self.assertEqual(self.dates(back), [5, 4])
+        self.assertIsNone(back['newer_cursor'])
+        self.assertEqual(back['older_cursor'], '2025-01-04')
+
+    def test_after_in_the_middle(self):
+        page = _record_page(2, None, date(2025, 1, 1))
+        self.assertEqual(self.dates(page), [3, 2])
+        self.assertEqual(page['newer_cursor'], '2025-01-03')
+        self.assertEqual(page['older_cursor'], '2025-01-02')
+
+    def test_exactly_one_page(self):
+        page = _record_page(5, None, None)
+        self.assertEqual(self.dates(page), [5, 4, 3, 2, 1])
+        self.assertIsNone(page['newer_cursor'])
+        self.assertIsNone(page['older_cursor'])
+
+    def test_cursor_past_the_ends(self):
+        self.assertEqual(self.dates(_record_page(2, date(2025, 1, 1), None)), [])
+        self.assertEqual(self.dates(_record_page(2, None, date(2025, 1, 5))), [])
+
+    def test_empty(self):
+        DailyRecord.objects.all().delete()
+        page = _record_page(2, None, None)
+        self.assertEqual(page['records'], [])
+        self.assertIsNone(page['newer_cursor'])
+        self.assertIsNone(page['older_cursor'])
+
+    def test_page_size_param(self):
+        url = reverse('record_list')
+        self.assertEqual(len(self.client.get(url, {'size': '2'}).context['records']), 2)
+        # Not a number: the default size; out of range: clamped.
+        self.assertEqual(len(self.client.get(url, {'size': 'x'}).context['records']), 5)
+        self.assertEqual(len(self.client.get(url, {'size': '0'}).context['records']), 1)
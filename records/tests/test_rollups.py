@@ -0,0 +1,73 @@
+from datetime import date
+from importlib import import_module
+
+from django.test import TestCase
+
+from .. import snapshot
+from ..charts import build_chart_data
+from ..models import DailyRecord, PeriodRollup
+from ..rollups import rebuild_rollups
+from .utils import make_record, make_records
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        make_records(40, first=date(2025, 1, 20))
+        rebuild_rollups()
+
+    def rollups(self):
+        rows = PeriodRollup.objects.order_by('period', 'period_start').values()
+        return [{key: value for key, value in row.items() if key != 'id'} for row in rows]
+
+    def assert_matches_rebuild(self):
+        incremental = self.rollups()
+        rebuild_rollups()
+        rebuilt = self.rollups()
+        self.assertEqual(len(incremental), len(rebuilt))
+        for a, b in zip(incremental, rebuilt):
+            self.assertEqual(a.keys(), b.keys())
+            for key in a:
+                if isinstance(a[key], float):
+                    self.assertAlmostEqual(a[key], b[key], places=6, msg=key)
+                else:
+                    self.assertEqual(a[key], b[key], msg=key)
+
+    def test_create(self):
+        make_record(date(2025, 4, 2), 7)
+        self.assert_matches_rebuild()
+
+    def test_edit_and_date_move(self):
+        record = DailyRecord.objects.get(date=date(2025, 1, 31))
+        record.my_mood = 'D'
+        record.date = date(2025, 3, 15)
+        record.save()
+        self.assert_matches_rebuild()
+
+    def test_delete(self):
+        DailyRecord.objects.get(date=date(2025, 2, 3)).delete()
+        self.assert_matches_rebuild()
+
+
+class RollupBackfillTests(TestCase):
+    def test_migration_rebuilds_existing_records(self):
+        # Records saved before the rollups existed, then one save afterwards.
+        make_records(60)
+        PeriodRollup.objects.all().delete()
+        make_record(date(2025, 3, 5), 3)
+        self.assertEqual(PeriodRollup.objects.filter(period='month').count(), 1)
+
+        migration = import_module('records.migrations.0013_backfill_periodrollups')
+        migration.rebuild_rollups(None, None)
+        self.assertEqual(PeriodRollup.objects.filter(period='month').count(), 3)
+
+        snapshot._snapshot = None
+        from_rollups = build_chart_data(resolution='weekly')
+        # A date range is aggregated from the snapshot instead.
+        from_records = build_chart_data(start=date(2025, 1, 1), end=date(2025, 3, 5), resolution='weekly')
+        self.assertEqual(from_rollups['dates'], from_records['dates'])
+        for key, values in from_rollups['datasets'].items():
+            for a, b in zip(values, from_records['datasets'][key]):
+                if a is None or b is None:
+                    self.assertEqual(a, b, msg=key)
+                else:
+                    self.assertAlmostEqual(a, b, places=2, msg=key)
@@ -0,0 +1,117 @@
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import DailyRecord
+from ..search import RANKED_MATCH_LIMIT, diary_bigrams, highlight, search_diary, search_terms
+from .utils import make_record
+
+DIARIES = [
+    '頭痛がひどい。台風のせい',
+    '台風が来た、頭が痛い',
+    '一日中雨だった',
+    '頭痛頭痛、とにかく頭痛',
+    'Headache and "rain"',
+    '雨 と 風',
+]
+
+
+def search(query):
+    results, _ = search_diary(query)
+    diaries = dict(DailyRecord.objects.values_list('pk', 'diary'))
+    return [diaries[result['id']] for result in results]
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        for i, diary in enumerate(DIARIES):
+            make_record(date(2025, 1, 1) + timedelta(days=i), i, diary=diary)
+
+    def expected(self, query):
+        terms = query.lower().split()
+        diaries = DailyRecord.objects.values_list('diary', flat=True)
+        return {diary for diary in diaries if all(term in diary.lower() for term in terms)}
+
+    def test_one_letter_terms(self):
+        for query in ['頭', '痛', '風', '、', 'a', 'H', '頭 雨', '風 雨']:
+            with self.subTest(query=query):
+                self.assertEqual(set(search(query)), self.expected(query))
+
+    def test_two_letter_terms(self):
+        for query in ['頭痛', '台風', '雨だ', 'ai', 'IN', '頭痛 台風', '頭痛 一日']:
+            with self.subTest(query=query):
+                self.assertEqual(set(search(query)), self.expected(query))
+
+    def test_longer_terms(self):
+        for query in ['頭痛が', '台風のせい', 'とにかく頭痛', 'ache', '"rain"', '"', '頭痛が 台風', '頭 台風の']:
+            with self.subTest(query=query):
+                self.assertEqual(set(search(query)), self.expected(query))
+
+    def test_no_match(self):
+        for query in ['嵐', '頭痛薬', '台 嵐', '雨と', '雨 と 嵐']:
+            with self.subTest(query=query):
+                self.assertEqual(search(query), [])
+
+    def test_short_terms_use_the_bigram_index(self):
+        for query in ['頭', '頭痛', '頭 台風の']:
+            with self.subTest(query=query), CaptureQueriesContext(connection) as queries:
+                search_diary(query)
+            sql = ' '.join(query['sql'] for query in queries)
+            self.assertIn('records_diary_bigram_fts MATCH', sql)
+            self.assertNotIn('LIKE', sql)
+
+    def test_ranked(self):
+        # Three occurrences in a short diary come first.
+        self.assertEqual(search('頭痛')[0], '頭痛頭痛、とにかく頭痛')
+        self.assertEqual(search('頭')[0], '頭痛頭痛、とにかく頭痛')
+        self.assertEqual(search('頭痛が')[0], '頭痛がひどい。台風のせい')
+
+    def test_index_follows_edits(self):
+        record = DailyRecord.objects.get(date=date(2025, 1, 3))
+        record.diary = '台風で停電'
+        record.save()
+        self.assertEqual(set(search('台風')), {DIARIES[0], DIARIES[1], '台風で停電'})
+        self.assertEqual(search('一日'), [])
+        DailyRecord.objects.filter(diary__startswith='台風').delete()
+        self.assertEqual(set(search('台')), {DIARIES[0]})
+
+    def test_many_matches_are_newest_first(self):
+        DailyRecord.objects.bulk_create([
+            DailyRecord(date=date(2010, 1, 1) + timedelta(days=i), my_mood='B', wife_mood='B', diary='雨')
+            for i in range(RANKED_MATCH_LIMIT)
+        ])
+        results, has_next = search_diary('雨')
+        self.assertTrue(has_next)
+        self.assertEqual(results[0]['date'], date(2025, 1, 6))
+        self.assertEqual([result['date'] for result in results], sorted((r['date'] for r in results), reverse=True))
+
+    def test_pages(self):
+        first, has_next = search_diary('頭', page_size=2)
+        self.assertTrue(has_next)
+        second, has_next = search_diary('頭', page=2, page_size=2)
+        self.assertFalse(has_next)
+        self.assertEqual(len({result['id'] for result in first + second}), 3)
+
+
+class SearchHelperTests(TestCase):
+    def test_bigrams(self):
+        self.assertEqual(diary_bigrams('頭痛がする'), '頭痛 痛が がす する る')
+        self.assertEqual(diary_bigrams('雨 と\n風'), '雨 と 風')
+        self.assertEqual(diary_bigrams(''), '')
+
+    def test_terms(self):
+        self.assertEqual(search_terms(' 頭痛  雨 頭痛 '), ['頭痛', '雨'])
+        self.assertEqual(len(search_terms(' '.join(str(i) for i in range(20)))), 8)
+
+    def test_highlight(self):
+        self.assertEqual(str(highlight('<b>頭痛</b>がする', ['頭痛'])), '&lt;b&gt;<mark>頭痛</mark>&lt;/b&gt;がする')
+
+
+class SearchViewTests(TestCase):
+    def test_view(self):
+        make_record(date(2025, 1, 1), diary='台風が来た')
+        response = self.client.get(reverse('search_records'), {'q': '台風'})
+        self.assertContains(response, '<mark>台風</mark>が来た')
@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+
+from .. import snapshot
+from ..models import DailyRecord, Location
+from .utils import make_record, make_records
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        # Each test starts from its own data; don't reuse another test's snapshot.
+        snapshot._snapshot = None
+        make_records(10)
+
+    def assert_matches_db(self, current, size=None):
+        rows = list(snapshot.snapshot_queryset()[:size])
+        columns = [snapshot.to_values(field, current[field]) for field in snapshot.FIELDS]
+        self.assertEqual([tuple(row) for row in rows], list(zip(*columns)))
+
+    def test_load(self):
+        self.assert_matches_db(snapshot.get_snapshot())
+
+    def test_append_new_days(self):
+        first = snapshot.get_snapshot()
+        make_record(date(2025, 2, 1), 3)
+        make_record(date(2025, 2, 2), 4, location=Location.objects.create(name='旅先', latitude=1.0, longitude=2.0))
+        with self.assertNumQueries(2):
+            # The version counters, then only the new rows.
+            current = snapshot.get_snapshot()
+        self.assertEqual(len(current), 12)
+        self.assert_matches_db(current)
+        # Readers of the older snapshot still see its rows.
+        self.assertEqual(len(first), 10)
+        self.assert_matches_db(first, 10)
+
+    def test_many_appends_grow_the_buffers(self):
+        snapshot.get_snapshot()
+        for i in range(snapshot.MIN_CAPACITY + 5):
+            make_record(date(2025, 2, 1) + timedelta(days=i), i)
+            snapshot.get_snapshot()
+        self.assert_matches_db(snapshot.get_snapshot())
+
+    def test_edit_reloads(self):
+        snapshot.get_snapshot()
+        record = DailyRecord.objects.get(date=date(2025, 1, 4))
+        record.humidity = None
+        record.my_mood = 'D'
+        record.save()
+        self.assert_matches_db(snapshot.get_snapshot())
+
+    def test_past_day_reloads(self):
+        snapshot.get_snapshot()
+        make_record(date(2024, 12, 1), 5)
+        current = snapshot.get_snapshot()
+        self.assertEqual(str(current['date'][0]), '2024-12-01')
+        self.assert_matches_db(current)
+
+    def test_create_and_edit_reloads(self):
+        snapshot.get_snapshot()
+        make_record(date(2025, 2, 1), 3)
+        DailyRecord.objects.filter(date=date(2025, 1, 2)).first().delete()
+        self.assert_matches_db(snapshot.get_snapshot())
+
+    def test_between(self):
+        columns = snapshot.get_snapshot().between(date(2025, 1, 3), date(2025, 1, 5))
+        self.assertEqual([str(day) for day in columns['date']], ['2025-01-03', '2025-01-04', '2025-01-05'])
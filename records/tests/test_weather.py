@@ -0,0 +1,224 @@
+import socket
+import time
+from datetime import date, timedelta
+
+import requests
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import weather
+from ..models import Location, WeatherCache
+from ..open_meteo_stub import start_stub
+
+PAST_DAY = date(2025, 1, 15)
+
+
+class StubTestCase(TestCase):
+    """スタブの Open-Meteo に向けて weather.py を呼ぶテスト"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server, base_url = start_stub()
+        cls.stub_settings = override_settings(
+            OPEN_METEO_FORECAST_URL=f'{base_url}/v1/forecast',
+            OPEN_METEO_AIR_QUALITY_URL=f'{base_url}/v1/air-quality',
+            OPEN_METEO_RETRIES=0,
+        )
+        cls.stub_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub_settings.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        # The session and the breakers are per process; start from new ones.
+        weather._session = None
+        weather._breakers.clear()
+        self.server.request_count = 0
+
+    def tearDown(self):
+        weather._session = None
+        weather._breakers.clear()
+
+
+class WeatherCacheTests(StubTestCase):
+    def test_cache_hit(self):
+        values = weather.fetch_weather(PAST_DAY)
+        self.assertEqual(values['weather'], 'cloudy')
+        self.assertEqual(values['max_pressure'], 1016.0)
+        self.assertEqual(values['pm25'], 'A')
+        self.assertEqual(self.server.request_count, 2)
+        # Past days never expire.
+        self.assertEqual(set(WeatherCache.objects.values_list('api', 'expires_at')), {
+            (weather.FORECAST_API, None), (weather.AIR_QUALITY_API, None),
+        })
+
+        self.assertEqual(weather.fetch_weather(PAST_DAY), values)
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_coordinates_are_part_of_the_key(self):
+        weather.fetch_weather(PAST_DAY)
+        weather.fetch_weather(PAST_DAY, 35.0, 135.0)
+        self.assertEqual(self.server.request_count, 4)
+        # Rounded to 4 decimals, so this is the cached entry.
+        weather.fetch_weather(PAST_DAY, 35.00001, 135.0)
+        self.assertEqual(self.server.request_count, 4)
+
+    @override_settings(WEATHER_CACHE_TTL=3600)
+    def test_ttl(self):
+        today = timezone.localdate()
+        weather.fetch_weather(today)
+        entry = WeatherCache.objects.get(api=weather.FORECAST_API, date=today)
+        self.assertGreater(entry.expires_at, timezone.now() + timedelta(minutes=59))
+        weather.fetch_weather(today)
+        self.assertEqual(self.server.request_count, 2)
+
+        WeatherCache.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        weather.fetch_weather(today)
+        self.assertEqual(self.server.request_count, 4)
+        self.assertEqual(WeatherCache.objects.filter(date=today).count(), 2)
+
+    def test_partial_cache(self):
+        weather.fetch_apis((weather.FORECAST_API,), PAST_DAY)
+        self.assertEqual(self.server.request_count, 1)
+        weather.fetch_weather(PAST_DAY)
+        self.assertEqual(self.server.request_count, 2)
+
+
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/v1/forecast'
+
+
+class CircuitBreakerTests(StubTestCase):
+    def test_open_and_half_open(self):
+        params = weather.api_params(weather.FORECAST_API, 34.0, 133.0, PAST_DAY, PAST_DAY)
+        with override_settings(
+            OPEN_METEO_FORECAST_URL=closed_port_url(), OPEN_METEO_BREAKER_THRESHOLD=2, OPEN_METEO_BREAKER_RESET=0.2,
+        ):
+            for _ in range(2):
+                with self.assertRaises(requests.exceptions.ConnectionError):
+                    weather.request_json(weather.FORECAST_API, params)
+            # Open: fails without a request.
+            with self.assertRaises(weather.CircuitOpenError):
+                weather.request_json(weather.FORECAST_API, params)
+            # The other API has its own breaker.
+            weather.request_json(weather.AIR_QUALITY_API, params)
+
+            time.sleep(0.25)
+            # Half-open: one probe goes out, and its failure opens it again at once.
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                weather.request_json(weather.FORECAST_API, params)
+            with self.assertRaises(weather.CircuitOpenError):
+                weather.request_json(weather.FORECAST_API, params)
+
+        time.sleep(0.25)
+        # A successful probe closes it.
+        weather.request_json(weather.FORECAST_API, params)
+        breaker = weather.get_breaker(weather.FORECAST_API)
+        self.assertEqual((breaker.failures, breaker.opened_at), (0, None))
+
+    def test_failed_api_is_not_cached(self):
+        with override_settings(OPEN_METEO_FORECAST_URL=closed_port_url()):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                weather.fetch_weather(PAST_DAY)
+        # The air quality response was kept; the retry only fetches the forecast.
+        self.assertEqual(list(WeatherCache.objects.values_list('api', flat=True)), [weather.AIR_QUALITY_API])
+        self.server.request_count = 0
+        weather.fetch_weather(PAST_DAY)
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_view_logs_the_failure(self):
+        url = reverse('get_weather_data')
+        with override_settings(OPEN_METEO_FORECAST_URL=closed_port_url()):
+            with self.assertLogs('records.views.weather', 'ERROR') as logs:
+                response = self.client.get(url, {'date': PAST_DAY.isoformat()})
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('APIの呼び出しに失敗しました', response.json()['error'])
+        self.assertIn('Weather API request failed', logs.output[0])
+        self.assertIsNotNone(logs.records[0].exc_info)
+
+
+class ConcurrentFetchTests(StubTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server.RequestHandlerClass.latency = 0.3
+
+    def test_apis_are_fetched_concurrently(self):
+        started = time.perf_counter()
+        weather.fetch_weather(PAST_DAY)
+        self.assertLess(time.perf_counter() - started, 0.55)
+        self.assertEqual(self.server.request_count, 2)
+
+
+class FetchWeatherBatchTests(StubTestCase):
+    def test_locations_share_a_request(self):
+        places = [Location.objects.create(name=f'場所{i}', latitude=35 + i, longitude=139) for i in range(3)]
+        pairs = [(place, PAST_DAY + timedelta(days=i)) for place in [None, *places] for i in range(5)]
+        values = weather.fetch_weather_batch(pairs)
+        self.assertEqual(len(values), 20)
+        self.assertEqual(values[(places[2].pk, PAST_DAY)]['max_pressure'], 1016.0)
+        self.assertEqual(values[(None, PAST_DAY)]['pm25'], 'A')
+        # One request per API for four locations and five days
+        self.assertEqual(self.server.request_count, 2)
+        self.assertEqual(WeatherCache.objects.count(), 40)
+        self.server.request_count = 0
+        self.assertEqual(weather.fetch_weather_batch(pairs), values)
+        self.assertEqual(self.server.request_count, 0)
+
+
+class PlanBatchesTests(SimpleTestCase):
+    def plan(self, missing):
+        return list(weather._plan_batches(missing))
+
+    def test_nothing_missing(self):
+        self.assertEqual(self.plan({}), [])
+
+    def test_one_location(self):
+        home = (35.0, 139.0)
+        days = {date(2025, 1, 1), date(2025, 1, 5), date(2025, 2, 1)}
+        self.assertEqual(self.plan({home: days}), [([home], date(2025, 1, 1), date(2025, 2, 1))])
+
+    def test_days_are_split_into_windows(self):
+        home = (35.0, 139.0)
+        first = date(2025, 1, 1)
+        days = {first + timedelta(days=i) for i in range(200)}
+        batches = self.plan({home: days})
+        self.assertEqual(batches, [
+            ([home], first, first + timedelta(days=91)),
+            ([home], first + timedelta(days=92), first + timedelta(days=183)),
+            ([home], first + timedelta(days=184), first + timedelta(days=199)),
+        ])
+        for _, start, end in batches:
+            self.assertLessEqual((end - start).days + 1, weather.BATCH_MAX_DAYS)
+
+    def test_a_gap_starts_a_new_window(self):
+        home = (35.0, 139.0)
+        batches = self.plan({home: {date(2024, 1, 1), date(2025, 1, 1)}})
+        self.assertEqual(batches, [([home], date(2024, 1, 1), date(2024, 1, 1)), ([home], date(2025, 1, 1), date(2025, 1, 1))])
+
+    def test_locations_are_grouped(self):
+        missing = {(35.0 + i, 139.0): {date(2025, 1, 1 + i)} for i in range(25)}
+        batches = self.plan(missing)
+        self.assertEqual([len(coords) for coords, _, _ in batches], [10, 10, 5])
+        self.assertEqual(sorted(c for coords, _, _ in batches for c in coords), sorted(missing))
+        # Each request only spans the days its own locations need.
+        self.assertEqual(batches[0][1:], (date(2025, 1, 1), date(2025, 1, 10)))
+        self.assertEqual(batches[2][1:], (date(2025, 1, 21), date(2025, 1, 25)))
+
+    def test_locations_without_days_in_a_window_are_left_out(self):
+        a, b = (35.0, 139.0), (36.0, 140.0)
+        batches = self.plan({a: {date(2025, 1, 1)}, b: {date(2025, 1, 2), date(2025, 6, 1)}})
+        self.assertEqual(batches, [
+            ([a, b], date(2025, 1, 1), date(2025, 1, 2)),
+            ([b], date(2025, 6, 1), date(2025, 6, 1)),
+        ])
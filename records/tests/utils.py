@@ -0,0 +1,29 @@
+from datetime import date, timedelta
+
+from ..models import DailyRecord
+
+RATINGS = 'SABCD'
+
+
+def make_record(day, i=0, **fields):
+    """i で値を変えた記録を作る (シグナルが走る通常の保存)"""
+    values = {
+        'weather': ['sunny', 'cloudy', 'rainy'][i % 3],
+        'max_pressure': 1005.0 + (i * 7) % 13,
+        'min_pressure': 995.0 + (i * 5) % 11,
+        'max_temperature': 10.0 + (i * 3) % 17,
+        'min_temperature': 2.0 + i % 9,
+        'humidity': 40 + (i * 11) % 50,
+        'pollen': RATINGS[(i * 2) % 5],
+        'pm25': RATINGS[(i * 3) % 5],
+        'my_mood': RATINGS[i % 5],
+        'wife_mood': RATINGS[(i * 4 + 1) % 5],
+        'headache_medicine': ['yes', 'no', 'unknown'][i % 3],
+        'mishap': i % 4 == 0,
+        **fields,
+    }
+    return DailyRecord.objects.create(date=day, **values)
+
+
+def make_records(count, first=date(2025, 1, 1)):
+    return [make_record(first + timedelta(days=i), i) for i in range(count)]
@@ -1,14 +1,26 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+def _view(sync_view, async_view):
+    # Under ASGI (ASYNC_VIEWS) the network-bound and read-only views are
+    # served by their async versions.
+    return async_view if settings.ASYNC_VIEWS else sync_view
+
 urlpatterns = [
     path('', views.index, name='index'),
-    path('list/', views.record_list, name='record_list'),
+    path('list/', _view(views.record_list, views.record_list_async), name='record_list'),
+    path('search/', views.search_records, name='search_records'),
     path('new/', views.create_record, name='create_record'),
     path('<int:pk>/edit/', views.update_record, name='update_record'),
     path('<int:pk>/delete/', views.delete_record, name='delete_record'),
     path('visualize/', views.data_visualization, name='data_visualization'),
-    path('api/get-weather/', views.get_weather_data, name='get_weather_data'),
+    path('api/chart-data/', _view(views.chart_data_api, views.chart_data_api_async), name='chart_data_api'),
+    path('api/get-weather/', _view(views.get_weather_data, views.get_weather_data_async), name='get_weather_data'),
+    path('api/predict-mood/', _view(views.predict_mood, views.predict_mood_async), name='predict_mood'),
     path('export/csv/', views.export_csv, name='export_csv'),
+    path('import/', views.import_records, name='import_records'),
     path('analysis/', views.ai_analysis, name='ai_analysis'),
+    path('api/jobs/<int:pk>/', views.job_status, name='job_status'),
+    path('jobs/<int:pk>/download/', views.job_download, name='job_download'),
 ]
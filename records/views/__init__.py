@@ -0,0 +1,15 @@
+"""ビュー
+
+重い依存 (requests, NumPy) はそれを使うビューの中で読み込むので、
+起動時にはこのパッケージの import だけでは読み込まれない。
+*_async は ASGI で動かすとき (ASYNC_VIEWS) に使う非同期版。
+"""
+from .analysis import ai_analysis, lag_analysis
+from .charts import chart_data_api, chart_data_api_async, data_visualization
+from .exports import export_csv
+from .imports import import_records
+from .jobs import job_download, job_status
+from .pages import create_record, delete_record, index, record_list, record_list_async, update_record
+from .predictions import predict_mood, predict_mood_async
+from .search import search_records
+from .weather import get_weather_data, get_weather_data_async
@@ -0,0 +1,58 @@
+from django.shortcuts import render
+
+from ..analysis import get_correlation_stats, mood_correlations
+from ..caching import cache_on_data_version
+from ..models import HourlySeries
+from .utils import int_param, parse_date_param
+
+LAG_ANALYSIS_MAX_LAG = 30
+LAG_ANALYSIS_MAX_WINDOW = 365
+
+# The lag report also uses the hourly pressure series.
+@cache_on_data_version(tables=[HourlySeries._meta.db_table])
+def ai_analysis(request):
+    # The in-memory snapshot of the records; NumPy is loaded on first use.
+    from ..snapshot import get_snapshot
+
+    if len(get_snapshot()) < 5:
+        return render(request, 'records/ai_analysis.html', {'error': '分析するにはデータが不足しています。少なくとも5日分の記録を入力してください。'})
+
+    if request.GET.get('mode') == 'lag':
+        return lag_analysis(request)
+
+    # Correlations are maintained incrementally from save/delete signals and
+    # only rebuilt from scratch when the stored data version is stale.
+    stats = get_correlation_stats()
+    if stats.n < 2:
+        return render(request, 'records/ai_analysis.html', {'error': '分析可能な数値データが不足しています。'})
+
+    context = {
+        'sample_size': stats.n,
+        'my_mood_corr': mood_correlations(stats, 'my_mood_num'),
+        'wife_mood_corr': mood_correlations(stats, 'wife_mood_num'),
+    }
+    if not context['my_mood_corr'] or not context['wife_mood_corr']:
+        return render(request, 'records/ai_analysis.html', {'error': '機嫌のデータが不足しているため、相関を計算できません。'})
+
+    return render(request, 'records/ai_analysis.html', context)
+
+def lag_analysis(request):
+    # NumPy is only loaded by workers that actually serve this page.
+    from ..lag_analysis import lag_report
+
+    target = request.GET.get('target', 'my_mood')
+    if target not in ('my_mood', 'wife_mood'):
+        target = 'my_mood'
+    max_lag = int_param(request, 'max_lag', 7, 0, LAG_ANALYSIS_MAX_LAG)
+    window = int_param(request, 'window', 30, 5, LAG_ANALYSIS_MAX_WINDOW)
+    report = lag_report(f'{target}_num', max_lag, window,
+                        start=parse_date_param(request.GET.get('start')),
+                        end=parse_date_param(request.GET.get('end')))
+    context = {
+        'mode': 'lag',
+        'target': target,
+        'max_lag': max_lag,
+        'window': window,
+        'report': report,
+    }
+    return render(request, 'records/ai_analysis.html', context)
@@ -0,0 +1,88 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import render
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from ..caching import cache_on_data_version
+from ..charts import RESOLUTIONS, build_chart_data
+from ..models import DailyRecord, DataVersion
+from .utils import parse_date_param
+
+CHART_MAX_POINTS = 2000
+
+def _chart_params(request):
+    start = parse_date_param(request.GET.get('start'))
+    end = parse_date_param(request.GET.get('end'))
+    resolution = request.GET.get('resolution', 'daily')
+    if resolution not in RESOLUTIONS:
+        resolution = 'daily'
+    try:
+        points = int(request.GET.get('points') or 0)
+    except ValueError:
+        points = 0
+    points = min(points, CHART_MAX_POINTS) if points >= 3 else None
+    return {'start': start, 'end': end, 'resolution': resolution, 'points': points}
+
+@cache_on_data_version
+def data_visualization(request):
+    # The chart data itself is fetched from chart_data_api so the browser can cache it.
+    context = _chart_params(request)
+    context['chart_data_url'] = f"{reverse('chart_data_api')}?{request.GET.urlencode()}"
+    return render(request, 'records/visualization.html', context)
+
+def _chart_validators(params, version):
+    # The row count and newest date are kept on the version row by the
+    # DailyRecord signals, so revalidating doesn't read the records table.
+    validator = '|'.join(str(v) for v in (
+        version.version if version else 0,
+        version.row_count if version else 0,
+        version.max_date if version else None,
+        params['start'], params['end'], params['resolution'], params['points'],
+    ))
+    etag = quote_etag(hashlib.md5(validator.encode(), usedforsecurity=False).hexdigest())
+    last_modified = int(version.updated_at.timestamp()) if version else None
+    return etag, last_modified
+
+def _chart_response(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def _chart_json(params, etag):
+    # The ETag already covers the data version and every parameter.
+    key = f'records:chart_data:{etag}'
+    content = cache.get(key)
+    if content is None:
+        content = JsonResponse(build_chart_data(**params), json_dumps_params={'separators': (',', ':')}).content
+        cache.set(key, content, settings.VIEW_CACHE_TIMEOUT)
+    return HttpResponse(content, content_type='application/json')
+
+def chart_data_api(request):
+    params = _chart_params(request)
+    version = DataVersion.current(DailyRecord._meta.db_table)
+    etag, last_modified = _chart_validators(params, version)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _chart_json(params, etag)
+    return _chart_response(response, etag, last_modified)
+
+async def chart_data_api_async(request):
+    # Revalidation (304) only needs the one async query for the version row;
+    # building the data is CPU-bound and runs in a worker thread.
+    params = _chart_params(request)
+    version = await DataVersion.acurrent(DailyRecord._meta.db_table)
+    etag, last_modified = _chart_validators(params, version)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = await sync_to_async(_chart_json)(params, etag)
+    return _chart_response(response, etag, last_modified)
@@ -0,0 +1,29 @@
+from django.http import StreamingHttpResponse
+
+from ..exports import export_columns, iter_csv_bytes
+from ..jobs import enqueue
+from .jobs import job_accepted
+from .utils import parse_date_param
+
+def export_csv(request):
+    # Streamed in chunks, each converted from the in-memory snapshot's arrays.
+    start = parse_date_param(request.GET.get('from'))
+    end = parse_date_param(request.GET.get('to'))
+    compress = request.GET.get('gzip') in ('1', 'true')
+    if request.GET.get('background') in ('1', 'true'):
+        # For large exports: written to a file by a job, downloaded when done.
+        job = enqueue(
+            'export_csv',
+            start=start.isoformat() if start else None,
+            end=end.isoformat() if end else None,
+            compress=compress,
+        )
+        return job_accepted(job)
+    columns = export_columns(start, end)
+    if compress:
+        response = StreamingHttpResponse(iter_csv_bytes(columns, compress=True), content_type='application/gzip')
+        response['Content-Disposition'] = 'attachment; filename="daily_records.csv.gz"'
+    else:
+        response = StreamingHttpResponse(iter_csv_bytes(columns), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="daily_records.csv"'
+    return response
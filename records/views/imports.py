@@ -0,0 +1,29 @@
+import csv
+import io
+
+from django.contrib import messages
+from django.shortcuts import render, redirect
+
+from ..imports import import_rows, iter_csv_rows, iter_json_rows
+
+def import_records(request):
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if upload is None:
+            messages.error(request, 'ファイルを選択してください。')
+            return render(request, 'records/record_import.html')
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        if upload.name.endswith(('.json', '.jsonl')):
+            rows = iter_json_rows(stream)
+        else:
+            rows = iter_csv_rows(stream)
+        try:
+            result = import_rows(rows)
+        except (UnicodeDecodeError, ValueError, csv.Error) as e:
+            messages.error(request, f'ファイルを読み込めませんでした: {e}')
+            return render(request, 'records/record_import.html')
+        for line, message in result.errors[:10]:
+            messages.warning(request, f'{line}行目: {message}')
+        messages.success(request, f'{result.saved} 件の記録を取り込みました (エラー {len(result.errors)} 件)。')
+        return redirect('record_list')
+    return render(request, 'records/record_import.html')
@@ -0,0 +1,42 @@
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.cache import never_cache
+
+from ..jobs import job_file
+from ..models import Job
+
+def job_accepted(job):
+    """ジョブを登録したビューの応答 (202 とジョブの状態の URL)"""
+    status_url = reverse('job_status', args=[job.pk])
+    response = JsonResponse({'job_id': job.pk, 'status': job.status, 'status_url': status_url}, status=202)
+    response['Location'] = status_url
+    return response
+
+@never_cache
+def job_status(request, pk):
+    job = get_object_or_404(Job, pk=pk)
+    data = {
+        'job_id': job.pk,
+        'task': job.task,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == Job.SUCCEEDED:
+        data['result'] = job.result
+        if job_file(job) is not None:
+            data['download_url'] = reverse('job_download', args=[job.pk])
+    elif job.last_error:
+        # Just the exception line, not the whole traceback
+        data['error'] = job.last_error.strip().splitlines()[-1]
+    return JsonResponse(data)
+
+def job_download(request, pk):
+    job = get_object_or_404(Job, pk=pk, status=Job.SUCCEEDED)
+    path = job_file(job)
+    if path is None or not path.is_file():
+        raise Http404('ファイルが見つかりません。')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=job.result.get('filename', path.name))
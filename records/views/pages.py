@@ -0,0 +1,122 @@
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+
+from ..caching import acached_fragment, cached_fragment
+from ..forms import DailyRecordForm
+from ..jobs import enqueue
+from ..models import DailyRecord
+from .utils import int_param, parse_date_param
+
+def index(request):
+    return render(request, 'records/index.html')
+
+RECORD_LIST_PAGE_SIZE = 50
+RECORD_LIST_MAX_PAGE_SIZE = 200
+
+def _record_list_params(request):
+    page_size = int_param(request, 'size', RECORD_LIST_PAGE_SIZE, 1, RECORD_LIST_MAX_PAGE_SIZE)
+    return page_size, parse_date_param(request.GET.get('before')), parse_date_param(request.GET.get('after'))
+
+def _record_list_context(records, page_size, has_newer, has_older):
+    return {
+        'records': records,
+        'page_size': page_size,
+        'newer_cursor': records[0].date.isoformat() if has_newer else None,
+        'older_cursor': records[-1].date.isoformat() if has_older else None,
+    }
+
+def _record_page(page_size, before, after):
+    # Keyset pagination on the unique `date` column: `?before=` walks to older
+    # records, `?after=` to newer ones. No OFFSET, so every page costs the same.
+
+    # The table only shows these columns, so don't load `diary` and friends.
+    queryset = DailyRecord.objects.only('date', 'weather', 'my_mood', 'wife_mood')
+    if after is not None and before is None:
+        records = list(queryset.filter(date__gt=after).order_by('date')[:page_size + 1])
+        has_newer = len(records) > page_size
+        records = records[:page_size][::-1]
+        has_older = bool(records) and DailyRecord.objects.filter(date__lt=records[-1].date).exists()
+    else:
+        if before is not None:
+            queryset = queryset.filter(date__lt=before)
+        records = list(queryset.order_by('-date')[:page_size + 1])
+        has_older = len(records) > page_size
+        records = records[:page_size]
+        has_newer = bool(records) and before is not None and DailyRecord.objects.filter(date__gt=records[0].date).exists()
+    return _record_list_context(records, page_size, has_newer, has_older)
+
+async def _arecord_page(page_size, before, after):
+    # Same queries as _record_page, through the async ORM.
+    queryset = DailyRecord.objects.only('date', 'weather', 'my_mood', 'wife_mood')
+    if after is not None and before is None:
+        records = [record async for record in queryset.filter(date__gt=after).order_by('date')[:page_size + 1]]
+        has_newer = len(records) > page_size
+        records = records[:page_size][::-1]
+        has_older = bool(records) and await DailyRecord.objects.filter(date__lt=records[-1].date).aexists()
+    else:
+        if before is not None:
+            queryset = queryset.filter(date__lt=before)
+        records = [record async for record in queryset.order_by('-date')[:page_size + 1]]
+        has_older = len(records) > page_size
+        records = records[:page_size]
+        has_newer = bool(records) and before is not None and await DailyRecord.objects.filter(date__gt=records[0].date).aexists()
+    return _record_list_context(records, page_size, has_newer, has_older)
+
+def record_list(request):
+    # The table is cached per data version; the page around it isn't, since
+    # it shows the flash messages.
+    page_size, before, after = _record_list_params(request)
+    table = cached_fragment(
+        request, 'record_list', (page_size, before, after),
+        lambda: render_to_string('records/record_table.html', _record_page(page_size, before, after)),
+    )
+    return render(request, 'records/record_list.html', {'record_table': table})
+
+async def record_list_async(request):
+    page_size, before, after = _record_list_params(request)
+
+    async def render_table():
+        return render_to_string('records/record_table.html', await _arecord_page(page_size, before, after))
+
+    table = await acached_fragment(request, 'record_list', (page_size, before, after), render_table)
+    # Rendering may touch the session (messages), which is sync-only.
+    return await sync_to_async(render)(request, 'records/record_list.html', {'record_table': table})
+
+def create_record(request):
+    if request.method == 'POST':
+        form = DailyRecordForm(request.POST)
+        if form.is_valid():
+            record = form.save()
+            messages.success(request, '記録が正常に作成されました。')
+            if record.empty_weather_fields():
+                enqueue('enrich_weather', record_ids=[record.pk])
+                messages.info(request, '空の天気の項目はバックグラウンドで取得します。')
+            return redirect('record_list')
+        else:
+            if 'date' in form.errors:
+                messages.error(request, 'この日付の記録は既に存在します。編集してください。')
+    else:
+        form = DailyRecordForm()
+    return render(request, 'records/record_form.html', {'form': form})
+
+def update_record(request, pk):
+    record = get_object_or_404(DailyRecord, pk=pk)
+    if request.method == 'POST':
+        form = DailyRecordForm(request.POST, instance=record)
+        if form.is_valid():
+            form.save()
+            messages.success(request, '記録が正常に更新されました。')
+            return redirect('record_list')
+    else:
+        form = DailyRecordForm(instance=record)
+    return render(request, 'records/record_form.html', {'form': form})
+
+def delete_record(request, pk):
+    record = get_object_or_404(DailyRecord, pk=pk)
+    if request.method == 'POST':
+        record.delete()
+        messages.success(request, '記録が正常に削除されました。')
+        return redirect('record_list')
+    return render(request, 'records/record_confirm_delete.html', {'record': record})
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+
+from ..models import DailyRecord
+from ..mood_model import FORECAST_FIELDS, predict_moods
+from .utils import parse_date_param
+
+NUMBER_FIELDS = ('max_pressure', 'min_pressure', 'max_temperature', 'min_temperature', 'humidity')
+
+def _prediction_params(request):
+    target_date = parse_date_param(request.GET.get('date'))
+    if target_date is None:
+        return None, None, JsonResponse({'error': '日付をYYYY-MM-DD形式で指定してください。'}, status=400)
+    values = {field: request.GET[field] for field in FORECAST_FIELDS if request.GET.get(field)}
+    try:
+        for field in NUMBER_FIELDS:
+            if field in values:
+                values[field] = float(values[field])
+    except ValueError:
+        return None, None, JsonResponse({'error': '数値の形式が正しくありません。'}, status=400)
+    return target_date, values, None
+
+def _previous_day(target_date):
+    return DailyRecord.objects.filter(date=target_date - timedelta(days=1)).values('max_pressure', 'min_pressure')
+
+def _prediction_response(target_date, values, previous):
+    prediction = predict_moods(values, previous)
+    if prediction is None:
+        return JsonResponse({'error': '予測モデルがまだ学習されていません。'}, status=503)
+    return JsonResponse({'date': target_date.isoformat(), **prediction})
+
+def predict_mood(request):
+    # Scores the weather values passed in (as filled in by get_weather_data);
+    # with only a date, the forecast is looked up first.
+    target_date, values, error = _prediction_params(request)
+    if error is not None:
+        return error
+    if not values:
+        import requests
+        from ..weather import fetch_weather
+
+        try:
+            values = fetch_weather(target_date)
+        except requests.exceptions.RequestException as e:
+            return JsonResponse({'error': f'APIの呼び出しに失敗しました: {e}'}, status=502)
+    return _prediction_response(target_date, values, _previous_day(target_date).first())
+
+async def predict_mood_async(request):
+    target_date, values, error = _prediction_params(request)
+    if error is not None:
+        return error
+    if not values:
+        import httpx
+        from ..weather import CircuitOpenError
+        from ..weather_async import fetch_weather
+
+        try:
+            values = await fetch_weather(target_date)
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            return JsonResponse({'error': f'APIの呼び出しに失敗しました: {e}'}, status=502)
+    previous = await _previous_day(target_date).afirst()
+    # Loading the model (joblib, scikit-learn) blocks, so it runs in a worker thread.
+    return await sync_to_async(_prediction_response)(target_date, values, previous)
@@ -0,0 +1,19 @@
+from django.shortcuts import render
+
+from ..search import SEARCH_PAGE_SIZE, search_diary
+from .utils import int_param
+
+SEARCH_MAX_PAGE = 500
+
+def search_records(request):
+    query = request.GET.get('q', '').strip()
+    page = int_param(request, 'page', 1, 1, SEARCH_MAX_PAGE)
+    results, has_next = search_diary(query, page, SEARCH_PAGE_SIZE)
+    context = {
+        'query': query,
+        'results': results,
+        'page': page,
+        'previous_page': page - 1 if page > 1 else None,
+        'next_page': page + 1 if has_next else None,
+    }
+    return render(request, 'records/search.html', context)
@@ -0,0 +1,82 @@
+import logging
+from datetime import datetime
+
+from django.http import JsonResponse
+
+from ..models import Location
+
+logger = logging.getLogger(__name__)
+
+def _location_id(request):
+    # `location` is optional; without it the default (home) coordinates are used.
+    value = request.GET.get('location')
+    if not value:
+        return None, None
+    if not value.isdigit():
+        return None, JsonResponse({'error': '場所の指定が正しくありません。'}, status=400)
+    return int(value), None
+
+def _location_not_found():
+    return JsonResponse({'error': '指定された場所が見つかりません。'}, status=404)
+
+def _target_date(request):
+    target_date_str = request.GET.get('date')
+    if not target_date_str:
+        return None, JsonResponse({'error': '日付が指定されていません。'}, status=400)
+    try:
+        return datetime.strptime(target_date_str, '%Y-%m-%d').date(), None
+    except ValueError:
+        return None, JsonResponse({'error': '無効な日付形式です。YYYY-MM-DD形式で指定してください。'}, status=400)
+
+def get_weather_data(request):
+    target_date, error = _target_date(request)
+    if error is None:
+        location_id, error = _location_id(request)
+    if error is not None:
+        return error
+    location = None
+    if location_id is not None:
+        location = Location.objects.filter(pk=location_id).first()
+        if location is None:
+            return _location_not_found()
+    # requests and the HTTP client are only imported once a lookup is made.
+    import requests
+    from ..weather import coordinates, fetch_weather
+
+    try:
+        mapped_data = fetch_weather(target_date, *coordinates(location))
+        return JsonResponse(mapped_data)
+    except requests.exceptions.RequestException as e:
+        logger.exception('Weather API request failed')
+        return JsonResponse({'error': f'APIの呼び出しに失敗しました: {e}'}, status=500)
+    except Exception:
+        logger.exception('Weather data processing failed')
+        return JsonResponse({'error': 'サーバーで予期せぬエラーが発生しました。'}, status=500)
+
+
+async def get_weather_data_async(request):
+    # The ASGI version: the event loop keeps serving other requests while
+    # Open-Meteo answers.
+    target_date, error = _target_date(request)
+    if error is None:
+        location_id, error = _location_id(request)
+    if error is not None:
+        return error
+    location = None
+    if location_id is not None:
+        location = await Location.objects.filter(pk=location_id).afirst()
+        if location is None:
+            return _location_not_found()
+    import httpx
+    from ..weather import CircuitOpenError, coordinates
+    from ..weather_async import fetch_weather
+
+    try:
+        mapped_data = await fetch_weather(target_date, *coordinates(location))
+        return JsonResponse(mapped_data)
+    except (httpx.HTTPError, CircuitOpenError) as e:
+        logger.exception('Weather API request failed')
+        return JsonResponse({'error': f'APIの呼び出しに失敗しました: {e}'}, status=500)
+    except Exception:
+        logger.exception('Weather data processing failed')
+        return JsonResponse({'error': 'サーバーで予期せぬエラーが発生しました。'}, status=500)
@@ -0,0 +1,27 @@
+"""重い依存を前もって読み込む (gunicorn の --preload 用)
+
+プリロードしたマスタープロセスで読み込んでおけば、fork したワーカーは
+そのメモリを共有するので、最初のリクエストで import の時間がかからない。
+"""
+import importlib
+
+# Modules the views import lazily
+LAZY_MODULES = [
+    'requests',
+    'numpy',
+    'records.weather',
+    'records.snapshot',
+    'records.lag_analysis',
+    'records.mood_training',
+]
+
+
+def preload(modules=None):
+    """モジュールを読み込み、読み込めなかったものの名前を返す"""
+    failed = []
+    for name in modules or LAZY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            failed.append(name)
+    return failed
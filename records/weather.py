@@ -0,0 +1,360 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from project_config.instrumentation import outbound_timer
+
+from .hourly import store_payloads
+from .models import DailyRecord, WeatherCache
+
+DEFAULT_LATITUDE = 34.0663
+DEFAULT_LONGITUDE = 132.9949
+
+FORECAST_API = 'forecast'
+AIR_QUALITY_API = 'air_quality'
+
+WEATHER_CODE_MAPPING = {0: 'sunny', 1: 'sunny', 2: 'cloudy', 3: 'cloudy', 45: 'cloudy', 48: 'cloudy', 51: 'rainy', 53: 'rainy', 55: 'rainy', 61: 'rainy', 63: 'rainy', 65: 'rainy', 80: 'rainy', 81: 'rainy', 82: 'rainy'}
+
+DAILY_VARIABLES = "weather_code,temperature_2m_max,temperature_2m_min,pressure_msl_max,pressure_msl_min,relative_humidity_2m_mean"
+
+WEATHER_FIELDS = DailyRecord.WEATHER_FIELDS
+
+# Limits of one batched request (fetch_weather_batch): Open-Meteo takes
+# comma-separated coordinates and a shared date range.
+BATCH_MAX_LOCATIONS = 10
+BATCH_MAX_DAYS = 92
+
+
+def is_empty(value):
+    return value is None or value == ''
+
+
+def fill_empty_weather(record, values):
+    """record の空の天気項目を values で埋め、埋めた項目名のリストを返す (保存はしない)"""
+    if values.get('humidity') is not None:
+        values = {**values, 'humidity': round(values['humidity'])}
+    fields = [field for field in record.empty_weather_fields() if not is_empty(values.get(field))]
+    for field in fields:
+        setattr(record, field, values[field])
+    return fields
+
+
+def coordinates(location=None):
+    """場所の (緯度, 経度)。キャッシュのキーと同じく小数点以下4桁に丸める。None なら自宅"""
+    if location is None:
+        return round(DEFAULT_LATITUDE, 4), round(DEFAULT_LONGITUDE, 4)
+    return round(location.latitude, 4), round(location.longitude, 4)
+
+
+def api_url(api):
+    if api == FORECAST_API:
+        return settings.OPEN_METEO_FORECAST_URL
+    return settings.OPEN_METEO_AIR_QUALITY_URL
+
+
+def api_params(api, lat, lon, start_date, end_date):
+    # lat/lon may also be comma-separated lists (several locations in one request).
+    params = {"latitude": lat, "longitude": lon, "timezone": "Asia/Tokyo", "start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+    if api == FORECAST_API:
+        params["daily"] = DAILY_VARIABLES
+        # Kept as hourly series (records/hourly.py), e.g. for the 3-hour pressure drop
+        params["hourly"] = "pressure_msl"
+    else:
+        params["hourly"] = "pm2_5"
+    return params
+
+
+def pm25_rating(pm25_avg):
+    if pm25_avg is None:
+        return ''
+    if pm25_avg <= 12: return 'S'
+    elif pm25_avg <= 35: return 'A'
+    elif pm25_avg <= 55: return 'B'
+    elif pm25_avg <= 150: return 'C'
+    else: return 'D'
+
+
+def map_weather(weather_data, air_data):
+    """Open-Meteo の応答 (1日分) をフォームの項目に変換する"""
+    daily_data = weather_data.get('daily', {})
+    weather_code = daily_data.get('weather_code', [None])[0]
+    pm25_avg = None
+    if air_data.get('hourly', {}).get('pm2_5'):
+        pm25_values = [v for v in air_data['hourly']['pm2_5'] if v is not None]
+        if pm25_values:
+            pm25_avg = sum(pm25_values) / len(pm25_values)
+    return {'weather': WEATHER_CODE_MAPPING.get(weather_code, ''), 'max_temperature': daily_data.get('temperature_2m_max', [None])[0], 'min_temperature': daily_data.get('temperature_2m_min', [None])[0], 'max_pressure': daily_data.get('pressure_msl_max', [None])[0], 'min_pressure': daily_data.get('pressure_msl_min', [None])[0], 'humidity': daily_data.get('relative_humidity_2m_mean', [None])[0], 'pm25': pm25_rating(pm25_avg)}
+
+
+def split_days(payload):
+    """期間指定の応答を (日付, 1日分の応答) に分ける。1日分の応答は fetch_apis がキャッシュする形"""
+    days = defaultdict(dict)
+    daily = payload.get('daily', {})
+    for i, day in enumerate(daily.get('time', [])):
+        days[day]['daily'] = {key: values[i:i + 1] for key, values in daily.items()}
+    hourly = payload.get('hourly', {})
+    hours = defaultdict(lambda: defaultdict(list))
+    for i, timestamp in enumerate(hourly.get('time', [])):
+        for key, values in hourly.items():
+            hours[timestamp[:10]][key].append(values[i] if i < len(values) else None)
+    for day, values in hours.items():
+        days[day]['hourly'] = dict(values)
+    for day, day_payload in days.items():
+        yield date.fromisoformat(day), day_payload
+
+
+def _cache_expiry(target_date):
+    # Past days are final and never expire; today/future forecasts get a short TTL.
+    if target_date < timezone.localdate():
+        return None
+    return timezone.now() + timedelta(seconds=settings.WEATHER_CACHE_TTL)
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    pass
+
+
+class CircuitBreaker:
+    """連続して失敗した API への呼び出しを一定時間止める"""
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def before_call(self, name):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f'{name} は一時的に停止中です')
+            # Half-open: let this call through as a probe.
+            self.opened_at = None
+            self.failures = self.failure_threshold - 1
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+_session = None
+_session_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='open-meteo')
+_breakers = {}
+
+
+def get_session():
+    """keep-alive の接続を使い回す共有セッション"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=settings.OPEN_METEO_RETRIES,
+                backoff_factor=settings.OPEN_METEO_BACKOFF,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=('GET',),
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def get_breaker(api):
+    with _session_lock:
+        if api not in _breakers:
+            _breakers[api] = CircuitBreaker(settings.OPEN_METEO_BREAKER_THRESHOLD, settings.OPEN_METEO_BREAKER_RESET)
+        return _breakers[api]
+
+
+def request_json(api, params):
+    breaker = get_breaker(api)
+    breaker.before_call(api)
+    try:
+        with outbound_timer():
+            response = get_session().get(
+                api_url(api),
+                params=params,
+                timeout=(settings.OPEN_METEO_CONNECT_TIMEOUT, settings.OPEN_METEO_READ_TIMEOUT),
+            )
+            response.raise_for_status()
+            payload = response.json()
+    except requests.exceptions.RequestException:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return payload
+
+
+def _submit(fn, *args):
+    # Run in a copy of the caller's context so outbound time is counted
+    # against the request that started the lookup.
+    return _executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def fetch_apis(apis, target_date, lat=DEFAULT_LATITUDE, lon=DEFAULT_LONGITUDE):
+    """1日分の Open-Meteo の応答を API ごとに返す
+
+    キャッシュにないものだけを並行して取得する。DB へのアクセスは
+    呼び出し元のスレッドだけで行う。
+    """
+    lat, lon = round(lat, 4), round(lon, 4)
+    now = timezone.now()
+    payloads = {}
+    for cached in WeatherCache.objects.filter(latitude=lat, longitude=lon, date=target_date, api__in=apis):
+        if cached.expires_at is None or cached.expires_at > now:
+            payloads[cached.api] = cached.payload
+
+    missing = [api for api in apis if api not in payloads]
+    futures = {
+        api: _submit(request_json, api, api_params(api, lat, lon, target_date, target_date))
+        for api in missing
+    }
+    error = None
+    for api, future in futures.items():
+        try:
+            payloads[api] = future.result()
+        except requests.exceptions.RequestException as e:
+            error = error or e
+            continue
+        # Keep whatever succeeded so a retry only needs the failed API.
+        WeatherCache.objects.update_or_create(
+            latitude=lat, longitude=lon, date=target_date, api=api,
+            defaults={'payload': payloads[api], 'expires_at': _cache_expiry(target_date)},
+        )
+        store_payloads(api, [(lat, lon, target_date, payloads[api])])
+    if error is not None:
+        raise error
+    return payloads
+
+
+def fetch_weather(target_date, lat=DEFAULT_LATITUDE, lon=DEFAULT_LONGITUDE):
+    payloads = fetch_apis((FORECAST_API, AIR_QUALITY_API), target_date, lat, lon)
+    return map_weather(payloads[FORECAST_API], payloads[AIR_QUALITY_API])
+
+
+def _plan_batches(missing):
+    """{座標: 取得したい日付の集合} を (座標のリスト, 開始日, 終了日) のリクエストに分ける
+
+    日付順に BATCH_MAX_DAYS 日以内の区間にまとめ、区間ごとに必要な場所を
+    BATCH_MAX_LOCATIONS か所ずつ1回のリクエストにする。
+    """
+    all_days = sorted(set().union(*missing.values())) if missing else []
+    windows = []
+    for day in all_days:
+        if windows and (day - windows[-1][0]).days < BATCH_MAX_DAYS:
+            windows[-1][1] = day
+        else:
+            windows.append([day, day])
+    for window_start, window_end in windows:
+        needed = {
+            coords: [day for day in days if window_start <= day <= window_end]
+            for coords, days in missing.items()
+        }
+        needed = {coords: days for coords, days in needed.items() if days}
+        coords_list = sorted(needed)
+        for i in range(0, len(coords_list), BATCH_MAX_LOCATIONS):
+            chunk = coords_list[i:i + BATCH_MAX_LOCATIONS]
+            yield chunk, min(min(needed[c]) for c in chunk), max(max(needed[c]) for c in chunk)
+
+
+def _request_batch(api, coords_list, start_date, end_date):
+    params = api_params(
+        api,
+        ','.join(str(lat) for lat, _ in coords_list),
+        ','.join(str(lon) for _, lon in coords_list),
+        start_date, end_date,
+    )
+    payload = request_json(api, params)
+    # A single location comes back as an object, several as a list in request order.
+    return dict(zip(coords_list, payload if isinstance(payload, list) else [payload]))
+
+
+def fetch_weather_batch(pairs):
+    """(場所, 日付) の組の天気をまとめて取得し、{(場所の id, 日付): フォームの項目} を返す
+
+    場所が None の組は自宅の座標。キャッシュ済みの組と重複は取得せず、残りを
+    _plan_batches の単位 (場所をまとめた期間指定) で API ごとに取得する。
+    取得した期間の全日分をキャッシュに保存する。
+    """
+    keys = {}
+    wanted = defaultdict(set)
+    for location, day in pairs:
+        coords = coordinates(location)
+        keys[(location.pk if location is not None else None, day)] = coords
+        wanted[coords].add(day)
+    if not keys:
+        return {}
+
+    apis = (FORECAST_API, AIR_QUALITY_API)
+    now = timezone.now()
+    payloads = {}
+    cached = WeatherCache.objects.filter(
+        latitude__in={lat for lat, _ in wanted}, longitude__in={lon for _, lon in wanted},
+        date__in=set().union(*wanted.values()), api__in=apis,
+    )
+    for entry in cached:
+        if (entry.expires_at is None or entry.expires_at > now) and entry.date in wanted.get((entry.latitude, entry.longitude), ()):
+            payloads[(entry.latitude, entry.longitude), entry.date, entry.api] = entry.payload
+
+    futures = []
+    for api in apis:
+        missing = {
+            coords: {day for day in days if (coords, day, api) not in payloads}
+            for coords, days in wanted.items()
+        }
+        missing = {coords: days for coords, days in missing.items() if days}
+        for coords_list, start_date, end_date in _plan_batches(missing):
+            futures.append((api, _submit(_request_batch, api, coords_list, start_date, end_date)))
+
+    error = None
+    fetched = []
+    for api, future in futures:
+        try:
+            results = future.result()
+        except requests.exceptions.RequestException as e:
+            error = error or e
+            continue
+        for coords, payload in results.items():
+            for day, day_payload in split_days(payload):
+                payloads[coords, day, api] = day_payload
+                fetched.append(WeatherCache(
+                    latitude=coords[0], longitude=coords[1], date=day, api=api,
+                    payload=day_payload, expires_at=_cache_expiry(day),
+                ))
+    if fetched:
+        # Keep whatever succeeded so a retry only needs the failed requests.
+        WeatherCache.objects.bulk_create(
+            fetched, batch_size=500, update_conflicts=True,
+            unique_fields=['latitude', 'longitude', 'date', 'api'],
+            update_fields=['payload', 'expires_at', 'fetched_at'],
+        )
+        for api in apis:
+            store_payloads(api, [(e.latitude, e.longitude, e.date, e.payload) for e in fetched if e.api == api])
+    if error is not None:
+        raise error
+    return {
+        key: map_weather(payloads.get((coords, key[1], FORECAST_API), {}), payloads.get((coords, key[1], AIR_QUALITY_API), {}))
+        for key, coords in keys.items()
+    }
+
@@ -0,0 +1,101 @@
+"""Open-Meteo の非同期クライアント (ASGI で動かすときの非同期ビュー用)
+
+weather.py と同じキャッシュ・サーキットブレーカー・リトライ設定を使い、
+HTTP だけを httpx.AsyncClient で行う。待っている間もイベントループは
+ほかのリクエストを処理できる。
+"""
+import asyncio
+import weakref
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from project_config.instrumentation import outbound_timer
+
+from .hourly import store_payloads
+from .models import WeatherCache
+from .weather import (
+    AIR_QUALITY_API, DEFAULT_LATITUDE, DEFAULT_LONGITUDE, FORECAST_API,
+    _cache_expiry, api_params, api_url, get_breaker, map_weather,
+)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# An AsyncClient belongs to the event loop it was first used on.
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    """実行中のイベントループ用の共有クライアント (keep-alive の接続を使い回す)"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.OPEN_METEO_READ_TIMEOUT, connect=settings.OPEN_METEO_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def request_json(api, params):
+    breaker = get_breaker(api)
+    breaker.before_call(api)
+    try:
+        with outbound_timer():
+            for attempt in range(settings.OPEN_METEO_RETRIES + 1):
+                last_attempt = attempt == settings.OPEN_METEO_RETRIES
+                try:
+                    response = await get_client().get(api_url(api), params=params)
+                except httpx.TransportError:
+                    if last_attempt:
+                        raise
+                else:
+                    if response.status_code not in RETRY_STATUSES or last_attempt:
+                        response.raise_for_status()
+                        payload = response.json()
+                        break
+                # Same backoff as urllib3's Retry
+                await asyncio.sleep(settings.OPEN_METEO_BACKOFF * (2 ** attempt))
+    except (httpx.HTTPError, ValueError):
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return payload
+
+
+async def fetch_apis(apis, target_date, lat=DEFAULT_LATITUDE, lon=DEFAULT_LONGITUDE):
+    """weather.fetch_apis の非同期版"""
+    lat, lon = round(lat, 4), round(lon, 4)
+    now = timezone.now()
+    payloads = {}
+    async for cached in WeatherCache.objects.filter(latitude=lat, longitude=lon, date=target_date, api__in=apis):
+        if cached.expires_at is None or cached.expires_at > now:
+            payloads[cached.api] = cached.payload
+
+    missing = [api for api in apis if api not in payloads]
+    results = await asyncio.gather(
+        *(request_json(api, api_params(api, lat, lon, target_date, target_date)) for api in missing),
+        return_exceptions=True,
+    )
+    error = None
+    for api, result in zip(missing, results):
+        if isinstance(result, BaseException):
+            error = error or result
+            continue
+        payloads[api] = result
+        await WeatherCache.objects.aupdate_or_create(
+            latitude=lat, longitude=lon, date=target_date, api=api,
+            defaults={'payload': result, 'expires_at': _cache_expiry(target_date)},
+        )
+        await sync_to_async(store_payloads)(api, [(lat, lon, target_date, result)])
+    if error is not None:
+        raise error
+    return payloads
+
+
+async def fetch_weather(target_date, lat=DEFAULT_LATITUDE, lon=DEFAULT_LONGITUDE):
+    payloads = await fetch_apis((FORECAST_API, AIR_QUALITY_API), target_date, lat, lon)
+    return map_weather(payloads[FORECAST_API], payloads[AIR_QUALITY_API])